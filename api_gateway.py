@@ -0,0 +1,266 @@
+"""
+Local HTTP/JSON API gateway in front of the PLC
+
+All callers (WMS, C#/Node.js integrations, dashboards) share the single
+PLC connection owned by WMSService:
+
+    GET  /status              latest status from the shared cache
+    POST /aisles/{n}/open     queue "open aisle n" (concurrent identical requests coalesce)
+    GET  /history?since=&limit=
+    GET  /events              server-sent events: snapshot, then decoded deltas only
+    GET  /lighting            server-sent events: lighting word (8 hex chars) per change
+    GET  /gang-grid           standalone gang-grid page fed by /lighting
+    GET  /health
+
+Usage:
+    python api_gateway.py --host 1.1.1.2 --port 2000 --api-port 8080
+"""
+
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from utils.frame_cache import FrameCache
+from utils.gang_grid import frame_lighting_word, render_gang_grid
+from wms_service import WMSService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_PORT = 8080
+COMMAND_TIMEOUT = 10.0  # seconds a caller waits for its queued command
+SSE_HEARTBEAT = 15.0    # seconds between keep-alive comments on idle streams
+
+_AISLE_OPEN = re.compile(r"^/aisles/(\d+)/open$")
+
+
+# '"frame": ..., "status": {...}' per distinct frame (counter included), so
+# a frame repeated across /status and /history requests is serialised once
+_frame_json = FrameCache("frame_json", maxsize=1024)
+
+
+def _sample_fields(sample: Tuple[float, bytes, Mapping[str, Any]]) -> str:
+    """JSON members (without braces) of a (timestamp, frame, status) sample"""
+    timestamp, frame, status = sample
+    body = _frame_json.get(frame, lambda: '"frame": %s, "status": %s' % (
+        json.dumps(frame.hex()), json.dumps(status, default=dict)))
+    return '"timestamp": %s, %s' % (json.dumps(timestamp), body)
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """Request handler; the WMSService is attached by APIGateway"""
+
+    service: WMSService = None
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, code: int, payload: Any):
+        self._send_json_text(code, json.dumps(payload))
+
+    def _send_json_text(self, code: int, text: str):
+        body = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/status":
+            sample = self.service.snapshot()
+            fields = _sample_fields(sample) if sample else '"timestamp": null, "frame": null, "status": null'
+            self._send_json_text(200, '{%s, "connected": %s, "active_alarms": %s}' % (
+                fields, json.dumps(self.service.connected), json.dumps(sorted(self.service.alarms.active_alarms))))
+        elif url.path == "/history":
+            query = parse_qs(url.query)
+            try:
+                since = float(query['since'][0]) if 'since' in query else None
+                limit = int(query['limit'][0]) if 'limit' in query else 100
+            except ValueError:
+                self._send_json(400, {'error': "since must be a number and limit an integer"})
+                return
+            samples = self.service.recorder.history(since=since, limit=limit)
+            self._send_json_text(200, '{"samples": [%s]}' % ", ".join(
+                "{%s}" % _sample_fields(sample) for sample in samples))
+        elif url.path == "/events":
+            self._stream_events()
+        elif url.path == "/lighting":
+            self._stream_lighting()
+        elif url.path == "/gang-grid":
+            sample = self.service.snapshot()
+            word = frame_lighting_word(sample[1]) if sample else 0
+            self._send_html(render_gang_grid(word, "/lighting"))
+        elif url.path == "/health":
+            state = self.service.health()
+            self._send_json(200 if state['ok'] else 503, state)
+        else:
+            self._send_json(404, {'error': "not found"})
+
+    def _stream_events(self):
+        """Server-sent events: one 'snapshot' event, then 'delta' events as frames change"""
+        subscriber = self.service.deltas.subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            state = self.service.state()
+            if state is not None:
+                self._write_event("snapshot", state)
+
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    # Dropped for falling behind; the client reconnects and resyncs
+                    return
+                self._write_event("delta", event, event['seq'])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.service.deltas.unsubscribe(subscriber)
+
+    def _stream_lighting(self):
+        """Server-sent events carrying only the lighting word, current value first"""
+        subscriber = self.service.deltas.subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+            sample = self.service.snapshot()
+            if sample is not None:
+                self.wfile.write(b"data: %08X\n\n" % frame_lighting_word(sample[1]))
+                self.wfile.flush()
+
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    return
+                if 'lighting' in event:
+                    self.wfile.write(b"data: %08X\n\n" % event['lighting']['word'])
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.service.deltas.unsubscribe(subscriber)
+
+    def _send_html(self, html: str):
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_event(self, name: str, payload: Dict[str, Any], event_id: Optional[int] = None):
+        """Write one SSE event"""
+        data = f"event: {name}\n"
+        if event_id is not None:
+            data += f"id: {event_id}\n"
+        data += f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+        self.wfile.write(data.encode("utf-8"))
+        self.wfile.flush()
+
+    def do_POST(self):
+        # Drain any request body so keep-alive connections stay in sync
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        match = _AISLE_OPEN.match(urlparse(self.path).path)
+        if not match:
+            self._send_json(404, {'error': "not found"})
+            return
+
+        aisle = int(match.group(1))
+        if not 1 <= aisle <= 19:
+            self._send_json(400, {'error': "aisle must be between 1 and 19"})
+            return
+
+        start = time.perf_counter()
+        future = self.service.submit_command(aisle)
+        try:
+            response = future.result(timeout=COMMAND_TIMEOUT)
+        except FutureTimeout:
+            self._send_json(504, {'error': "command timed out", 'aisle': aisle})
+            return
+
+        if response is None:
+            self._send_json(502, {'error': "no response from controller", 'aisle': aisle})
+            return
+        self._send_json(200, {
+            'aisle': aisle,
+            'response': response.hex(),
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+        })
+
+    def log_message(self, format, *args):
+        logger.debug("api %s - %s", self.address_string(), format % args)
+
+
+class APIGateway:
+    """HTTP server thread exposing a WMSService"""
+
+    def __init__(self, service: WMSService, port: int = DEFAULT_API_PORT, host: str = "0.0.0.0"):
+        """
+        Initialize gateway
+
+        Args:
+            service (WMSService): Service owning the PLC connection
+            port (int): Listen port (0 = any free port)
+            host (str): Listen address
+        """
+        handler = type("BoundGatewayHandler", (GatewayHandler,), {"service": service})
+        self.service = service
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        """Serve requests in a daemon thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="wms-api-gateway", daemon=True)
+        self._thread.start()
+        logger.info("API gateway listening on port %s", self.port)
+
+    def stop(self):
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the service with the gateway enabled (wms_service.main, --api-port defaults to API_PORT/8080)"""
+    from wms_service import main as service_main
+    service_main(argv, defaults={'api_port': int(os.getenv("API_PORT", DEFAULT_API_PORT))})
+
+
+if __name__ == "__main__":
+    main()
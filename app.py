@@ -3,27 +3,31 @@ WMS Mobile Racking TCP-IP Communication Streamlit App
 """
 
 import streamlit as st
-import pandas as pd
 import time
 import struct
 import os
-import subprocess
-import base64
 import socket
 from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
 from typing import Dict, Any, List
 
+# pandas, plotly, subprocess and protocol_generators are imported inside the
+# pages that use them to keep cold start and reruns cheap on the RevPi
+
 # Local imports
-from tcp_client import TCPClient
+from tcp_client import TCPClient, intern_status_frame
+from connection_supervisor import BreakerState, ConnectionSupervisor
+from wms_shared_state import SharedFrameReader, segment_name
 from wms_protocol import WMS_DATA_STRUCTURE, WMSCommands, get_status_description
 from utils.data_parser import (
-    format_hex_data, parse_lighting_rules, validate_status_data, 
-    format_timestamp
+    format_hex_data, parse_lighting_rules, validate_status_frame,
+    format_timestamp, detect_alarm_transitions
 )
+from utils.frame_cache import FrameCache, status_key
 from utils.logger import wms_logger
-from protocol_generators import get_available_languages, generate_protocol_code, get_file_extension
+from utils.status_cards import Card, render_alerts, render_card_row
+from utils.event_log import wms_event_log
+from utils.metrics import metrics
+from utils.metrics_exporter import start_metrics_server
 
 # Page config
 st.set_page_config(
@@ -101,9 +105,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Metrics endpoint for monitoring (one exporter thread per process, METRICS_PORT=0 disables)
+if os.getenv('METRICS_PORT', '9108') != '0':
+    start_metrics_server()
+
+# Frames older than this in the engine's shared-memory segment are ignored
+SHARED_FRAME_MAX_AGE = float(os.getenv('WMS_SHARED_MAX_AGE', '5.0'))
+
+# Sessions on one controller reuse a status polled this many seconds ago
+STATUS_MAX_AGE = float(os.getenv('WMS_STATUS_MAX_AGE', '1.0'))
+
+@st.cache_resource
+def get_detailed_status_cache() -> FrameCache:
+    """Detailed status tables per parsed layout and raw frame, shared by all sessions and reruns"""
+    return FrameCache("detailed_status", maxsize=64)
+
+@st.cache_resource
+def get_supervisor(host: str, port: int) -> ConnectionSupervisor:
+    """One supervised PLC connection per controller, shared by all sessions and reruns"""
+    supervisor = ConnectionSupervisor(TCPClient(host, port, event_log=wms_event_log))
+    supervisor.start()
+    return supervisor
+
 # Session state initialization
 if 'client' not in st.session_state:
     st.session_state.client = None
+if 'supervisor' not in st.session_state:
+    st.session_state.supervisor = None
 if 'connected' not in st.session_state:
     st.session_state.connected = False
 if 'status_history' not in st.session_state:
@@ -116,8 +144,6 @@ if 'real_time_mode' not in st.session_state:
     st.session_state.real_time_mode = False
 if 'refresh_interval' not in st.session_state:
     st.session_state.refresh_interval = 3
-if 'last_refresh_time' not in st.session_state:
-    st.session_state.last_refresh_time = 0
 if 'generated_code' not in st.session_state:
     st.session_state.generated_code = ""
 if 'selected_language' not in st.session_state:
@@ -149,38 +175,28 @@ def create_connection():
         """)
         return False
     
-    # Progress bar and status updates
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    if engine_configured():
+        # The engine process owns the PLC connection; no client in this worker
+        st.session_state.connected = True
+        st.success(f"✅ Reading {host}:{port} from the WMS engine (no direct PLC connection)")
+        return True
     
     try:
-        status_text.text("🔍 Initializing connection...")
-        progress_bar.progress(10)
-        
-        if st.session_state.client:
-            st.session_state.client.disconnect()
-        
-        status_text.text(f"🔌 Connecting to {host}:{port}...")
-        progress_bar.progress(30)
-        
-        st.session_state.client = TCPClient(host, port)
-        
-        status_text.text("📡 TCP handshake...")
-        progress_bar.progress(60)
-        
-        success = st.session_state.client.connect()
-        progress_bar.progress(100)
+        # Shared with every session on this controller; connects in the
+        # background, so this never waits for the connect timeout
+        supervisor = get_supervisor(host, int(port))
+        st.session_state.supervisor = supervisor
+        st.session_state.client = supervisor.client
+        success = supervisor.available
         
         if success:
             st.session_state.connected = True
-            status_text.empty()
-            progress_bar.empty()
             st.success(f"✅ Connected to {host}:{port}")
             wms_logger.log_connection(host, port, True)
             
             # Test directly with a status request
             with st.spinner("📊 Testing connection with status request..."):
-                status = st.session_state.client.get_status()
+                status = supervisor.get_status()
                 if status:
                     st.info("🎉 Status successfully received - connection works!")
                 else:
@@ -206,13 +222,15 @@ def create_connection():
                     
                     **The app is ready** - will work as soon as Mobile Racking software is active!
                     """)
+        elif supervisor.breaker.state == BreakerState.CLOSED:
+            st.session_state.connected = False
+            st.info(f"🔌 Connecting to {host}:{port} in the background...")
         else:
             st.session_state.connected = False
-            status_text.empty()
-            progress_bar.empty()
             
             # Detailed error message
             st.error(f"❌ Connection failed to {host}:{port}")
+            st.info("🔄 Reconnecting in the background with backoff")
             
             # Give specific diagnostic tips
             with st.expander("🔍 Diagnostics and solutions", expanded=True):
@@ -257,8 +275,6 @@ def create_connection():
             
     except Exception as e:
         st.session_state.connected = False
-        progress_bar.empty()
-        status_text.empty()
         st.error(f"❌ Unexpected error: {e}")
         
         with st.expander("📋 Technical details"):
@@ -266,26 +282,111 @@ def create_connection():
             st.markdown("**Debug info:** Check logs for more details")
 
 def disconnect():
-    """Disconnect from controller"""
-    if st.session_state.client:
-        st.session_state.client.disconnect()
+    """Detach this session from the controller (the shared connection serves other sessions)"""
     st.session_state.connected = False
     st.session_state.client = None
+    st.session_state.supervisor = None
     st.info("Connection closed")
 
-def get_system_status():
-    """Get system status with enhanced HMI change detection"""
-    if not st.session_state.connected or not st.session_state.client:
+def show_reconnect_notice(supervisor: ConnectionSupervisor):
+    """Explain that the PLC is down and requests are failing fast"""
+    state = supervisor.describe()
+    if state['state'] == 'open':
+        st.warning(f"⏳ PLC unreachable - circuit open, next reconnect attempt in {state['retry_in']:.0f}s")
+    else:
+        st.warning("🔄 PLC connection lost - reconnecting in the background")
+
+def engine_configured() -> bool:
+    """True if another process owns the PLC connection (WMS_SHARED_MEMORY=1 or WMS_ENGINE_SOCKET)"""
+    return os.getenv("WMS_SHARED_MEMORY") == "1" or bool(os.getenv("WMS_ENGINE_SOCKET"))
+
+def selected_controller_id() -> str:
+    """Controller id of the configured PLC (TCPClient.controller_id format)"""
+    return f"{st.session_state.get('host', '1.1.1.2')}:{st.session_state.get('port', 2000)}"
+
+def read_shared_status(controller_id: str):
+    """Status from the engine's shared-memory frame (WMS_SHARED_MEMORY=1) if it is fresh"""
+    if os.getenv("WMS_SHARED_MEMORY") != "1":
+        return None
+    reader = st.session_state.get('shared_reader')
+    if reader is None or reader.name != segment_name(controller_id):
+        reader = SharedFrameReader(controller_id)
+        st.session_state.shared_reader = reader
+    sample = reader.read_fresh(SHARED_FRAME_MAX_AGE)
+    if sample is None:
+        return None
+    return intern_status_frame(sample.frame)[1]
+
+def get_engine_client():
+    """IPC client of the engine process (WMS_ENGINE_SOCKET), or None"""
+    path = os.getenv("WMS_ENGINE_SOCKET")
+    if not path:
+        return None
+    if st.session_state.get('engine') is None:
+        from wms_ipc import IPCClient
+        st.session_state.engine = IPCClient(path)
+    return st.session_state.engine
+
+def read_engine_status():
+    """Status from the engine's latest frame, or None if no engine is reachable"""
+    engine = get_engine_client()
+    if engine is None:
         return None
+    try:
+        sample = engine.snapshot()
+    except Exception as e:
+        wms_logger.warning("Engine not reachable: %s", e)
+        return None
+    if sample is None:
+        return None
+    return intern_status_frame(sample[1])[1]
+
+def get_system_status(max_age: float = STATUS_MAX_AGE):
+    """
+    Get system status with enhanced HMI change detection
+    
+    Args:
+        max_age (float): Reuse the shared supervisor's status if it was polled
+            at most this many seconds ago (by any session or the heartbeat)
+    """
+    if engine_configured():
+        # Frames come from the engine process: shared memory first, then IPC
+        controller_id = selected_controller_id()
+        supervisor = None
+    else:
+        supervisor = st.session_state.supervisor
+        if supervisor is None or not st.session_state.client:
+            return None
+        if not supervisor.available:
+            show_reconnect_notice(supervisor)
+            return None
+        controller_id = supervisor.client.controller_id
+    st.session_state.connected = True
     
     try:
-        status = st.session_state.client.get_status()
-        if status:
-            # Add timestamp
-            status['timestamp'] = datetime.now()
+        if supervisor is None:
+            decoded = read_shared_status(controller_id) or read_engine_status()
+            if decoded is None:
+                st.warning("⏳ No recent frame from the WMS engine - is it running?")
+                return None
+        else:
+            decoded = supervisor.get_status(max_age)
+        metrics.counter("wms_polls_total", "Status polls", controller=controller_id).inc()
+        if decoded:
+            # Add timestamp (the decoded status is interned, shared and read-only)
+            timestamp = datetime.now()
+            status = dict(decoded, timestamp=timestamp)
             
             # Check for operating mode changes from previous status
             previous_status = st.session_state.get('last_status', {})
+            
+            for alarm, active in detect_alarm_transitions(previous_status, status):
+                metrics.counter(
+                    "wms_alarm_transitions_total", "Alarm raised/cleared transitions",
+                    alarm=alarm, state="raised" if active else "cleared"
+                ).inc()
+                if active:
+                    wms_logger.log_alarm(alarm)
             if previous_status and 'operation_mode' in previous_status:
                 if status.get('operation_mode') != previous_status.get('operation_mode'):
                     st.success(f"🔄 **Operating Mode Changed!** {previous_status.get('operation_mode')} → {status.get('operation_mode')}")
@@ -308,8 +409,8 @@ def get_system_status():
                     for change in changes_detected:
                         st.info(f"📊 **HMI Change Detected:** {change}")
             
-            # Add to history
-            st.session_state.status_history.append(status.copy())
+            # Add to history (timestamp plus a reference to the shared decoded status)
+            st.session_state.status_history.append((timestamp, decoded))
             
             # Keep only last 100 entries
             if len(st.session_state.status_history) > 100:
@@ -318,6 +419,8 @@ def get_system_status():
             st.session_state.last_status = status
             return status
         else:
+            metrics.counter("wms_poll_failures_total", "Status polls without response", controller=controller_id).inc()
+            
             # Enhanced simulation with time-based mode switching to demonstrate HMI monitoring
             st.info("💡 **Using enhanced Mobile Racking simulation** (Node-RED compatible)")
             
@@ -403,7 +506,7 @@ def get_system_status():
                     st.success(f"🔄 **Simulated HMI Change!** Mode: {previous_status.get('operation_mode_text', 'Unknown')} → {simulated_status.get('operation_mode_text')}")
             
             # Add to history
-            st.session_state.status_history.append(simulated_status.copy())
+            st.session_state.status_history.append((simulated_status['timestamp'], simulated_status))
             if len(st.session_state.status_history) > 100:
                 st.session_state.status_history = st.session_state.status_history[-100:]
                 
@@ -434,20 +537,29 @@ def get_system_status():
         return None
 
 def send_command(command: int):
-    """Send command to controller"""
-    if not st.session_state.connected or not st.session_state.client:
-        st.error("No connection")
+    """Send command to controller (through the engine when WMS_ENGINE_SOCKET is set)"""
+    engine = get_engine_client()
+    supervisor = st.session_state.supervisor
+    if engine is None and engine_configured():
+        # The shared-memory segment is read-only; commands need the engine's IPC socket
+        st.error("Commands need WMS_ENGINE_SOCKET (the engine owns the PLC connection)")
         return False
+    if engine is None:
+        if supervisor is None or not st.session_state.client:
+            st.error("No connection")
+            return False
+        if not supervisor.available:
+            show_reconnect_notice(supervisor)
+            return False
     
     try:
-        response = st.session_state.client.send_command(command)
+        # The exchange itself is recorded in the structured event log by the client
+        response = engine.submit_command(command) if engine is not None else supervisor.send_command(command)
         if response:
             st.success(f"Command {command} sent")
-            wms_logger.log_command(command, len(response))
             return True
         else:
             st.error(f"Command {command} failed")
-            wms_logger.log_command(command, None)
             return False
             
     except Exception as e:
@@ -490,12 +602,21 @@ def render_sidebar():
         st.session_state.port = port
         
         # Connection status indicator with Stow styling
+        supervisor = st.session_state.supervisor
+        if supervisor is not None:
+            st.session_state.connected = supervisor.available
         if st.session_state.connected:
             st.markdown("""
             <div style="background: #27ae60; color: white; padding: 0.5rem; border-radius: 5px; text-align: center; margin: 1rem 0;">
                 🟢 Connected to {}:{}
             </div>
             """.format(host, port), unsafe_allow_html=True)
+        elif supervisor is not None:
+            st.markdown("""
+            <div style="background: #f39c12; color: white; padding: 0.5rem; border-radius: 5px; text-align: center; margin: 1rem 0;">
+                🟠 Reconnecting ({})
+            </div>
+            """.format(supervisor.describe()['state'].replace('_', '-')), unsafe_allow_html=True)
         else:
             st.markdown("""
             <div style="background: #e74c3c; color: white; padding: 0.5rem; border-radius: 5px; text-align: center; margin: 1rem 0;">
@@ -511,7 +632,7 @@ def render_sidebar():
                 create_connection()
         
         with col2:
-            if st.button("Disconnect", disabled=not st.session_state.connected):
+            if st.button("Disconnect", disabled=supervisor is None and not st.session_state.connected):
                 disconnect()
         
         st.divider()
@@ -551,6 +672,7 @@ def render_sidebar():
                     """)
                 else:
                     try:
+                        import subprocess
                         result = subprocess.run(['ping', host, '-n', '1'], 
                                               capture_output=True, text=True, timeout=10)
                         if result.returncode == 0:
@@ -662,200 +784,120 @@ def render_status_overview(status: Dict[str, Any]):
             st.metric("Operation Mode", status.get('operation_mode', 0), help="514 = Current Mode")
     
     # Validation
-    validation = validate_status_data(status)
+    validation = validate_status_frame(status)
     
-    # Alerts with Stow styling
-    if validation['errors']:
-        for error in validation['errors']:
-            st.markdown(f"""
-            <div style="background: #e74c3c; color: white; padding: 1rem; border-radius: 5px; margin: 0.5rem 0;">
-                🚨 <strong>Error:</strong> {error}
-            </div>
-            """, unsafe_allow_html=True)
+    # Alerts with Stow styling (one block for all errors and warnings)
+    alerts_html = render_alerts(validation['errors'], validation['warnings'])
+    if alerts_html:
+        st.markdown(alerts_html, unsafe_allow_html=True)
     
-    if validation['warnings']:
-        for warning in validation['warnings']:
-            st.markdown(f"""
-            <div style="background: #f39c12; color: white; padding: 1rem; border-radius: 5px; margin: 0.5rem 0;">
-                ⚠️ <strong>Warning:</strong> {warning}
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Status metrics with enhanced styling
+    # Status metrics with enhanced styling (one templated block per section)
     st.markdown("### System Metrics")
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        # TCP status - if real Node-RED data, it's working
-        tcp_status = "🟢 Connected" if status.get('tcp_ip_connection', False) or status.get('real_node_red_data', False) else "🔴 Disconnected"
-        tcp_color = "#27ae60" if status.get('tcp_ip_connection', False) or status.get('real_node_red_data', False) else "#e74c3c"
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin: 0; color: {tcp_color};">TCP-IP Connection</h4>
-            <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{tcp_status}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        # System active status from real data
-        system_active = status.get('system_active', False) or status.get('ready_to_operate', False)
-        power_status = "🟢 Active" if system_active else "🔴 Inactive"
-        power_color = "#27ae60" if system_active else "#e74c3c"
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin: 0; color: {power_color};">System Status</h4>
-            <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{power_status}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        # Enhanced operation mode display with change detection
-        if status.get('real_node_red_data') or status.get('simulation_enhanced'):
-            # Use enhanced mode detection from simulation
-            if status.get('operation_mode_text'):
-                mode = status.get('operation_mode_text')
-                mode_detail = f" ({status.get('operation_mode', 'N/A')})"
-            else:
-                # Fallback to basic detection
-                if status.get('automatic_mode_on', False):
-                    mode = "Automatic"
-                elif status.get('manual_mode', False):
-                    mode = "Manual"
-                elif status.get('maintenance_mode', False):
-                    mode = "Maintenance"
-                elif status.get('setup_mode', False):
-                    mode = "Setup"
-                else:
-                    mode = "Unknown"
-                mode_detail = f" ({status.get('operation_mode', 'N/A')})"
-        else:
-            # Standard mode detection
-            mode = "Automatic" if status.get('automatic_mode_on', False) else "Manual"
-            mode_detail = ""
-        
-        # Enhanced color coding for different modes
-        if mode == "Automatic":
-            mode_color = "#27ae60"  # Green for automatic
-            mode_icon = "🤖"
-        elif mode == "Manual":
-            mode_color = "#f39c12"  # Orange for manual
-            mode_icon = "👤"
-        elif mode == "Maintenance":
-            mode_color = "#e74c3c"  # Red for maintenance
-            mode_icon = "🔧"
-        elif mode == "Setup":
-            mode_color = "#9b59b6"  # Purple for setup
-            mode_icon = "⚙️"
-        else:
-            mode_color = "#95a5a6"  # Gray for unknown
-            mode_icon = "❓"
-            
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin: 0; color: {mode_color};">Operation Mode</h4>
-            <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{mode_icon} {mode}{mode_detail}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        # Mobile quantity or data
-        if status.get('real_node_red_data'):
-            mobile_data = status.get('mobile_data', 0)
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #8e44ad;">Mobile Data</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{mobile_data}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            mobile_qty = status.get('mobile_quantity', 0)
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #8e44ad;">Mobile Units</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{mobile_qty} Active</p>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(render_card_row(system_metric_cards(status)), unsafe_allow_html=True)
     
     # Additional metrics
     st.markdown("### Position & Status Details")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if status.get('real_node_red_data'):
-            pos_data = status.get('position_data', 0)
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #16a085;">Position Data</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{pos_data} units</p>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            pos1 = status.get('position_1', 0) / 100.0
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #16a085;">Position 1</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{pos1:.2f}m</p>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col2:
-        pos2 = status.get('position_2', 0)
-        if status.get('real_node_red_data'):
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #16a085;">Raw Words</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 0.9rem; font-weight: bold;">{len(status.get('words', []))} values</p>
-            </div>
-            """, unsafe_allow_html=True)
+    st.markdown(render_card_row(position_detail_cards(status)), unsafe_allow_html=True)
+
+def system_metric_cards(status: Dict[str, Any]) -> List[Card]:
+    """Cards for the System Metrics section"""
+    # TCP status - if real Node-RED data, it's working
+    tcp_ok = status.get('tcp_ip_connection', False) or status.get('real_node_red_data', False)
+    tcp_card = Card("TCP-IP Connection", "🟢 Connected" if tcp_ok else "🔴 Disconnected",
+                    "#27ae60" if tcp_ok else "#e74c3c")
+    
+    # System active status from real data
+    system_active = status.get('system_active', False) or status.get('ready_to_operate', False)
+    power_card = Card("System Status", "🟢 Active" if system_active else "🔴 Inactive",
+                      "#27ae60" if system_active else "#e74c3c")
+    
+    # Enhanced operation mode display with change detection
+    if status.get('real_node_red_data') or status.get('simulation_enhanced'):
+        # Use enhanced mode detection from simulation
+        if status.get('operation_mode_text'):
+            mode = status.get('operation_mode_text')
         else:
-            pos2_val = pos2 / 100.0
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #16a085;">Position 2</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{pos2_val:.2f}m</p>
-            </div>
-            """, unsafe_allow_html=True)
+            # Fallback to basic detection
+            if status.get('automatic_mode_on', False):
+                mode = "Automatic"
+            elif status.get('manual_mode', False):
+                mode = "Manual"
+            elif status.get('maintenance_mode', False):
+                mode = "Maintenance"
+            elif status.get('setup_mode', False):
+                mode = "Setup"
+            else:
+                mode = "Unknown"
+        mode_detail = f" ({status.get('operation_mode', 'N/A')})"
+    else:
+        # Standard mode detection
+        mode = "Automatic" if status.get('automatic_mode_on', False) else "Manual"
+        mode_detail = ""
+    
+    # Enhanced color coding for different modes
+    mode_color, mode_icon = {
+        "Automatic": ("#27ae60", "🤖"),    # Green for automatic
+        "Manual": ("#f39c12", "👤"),       # Orange for manual
+        "Maintenance": ("#e74c3c", "🔧"),  # Red for maintenance
+        "Setup": ("#9b59b6", "⚙️"),        # Purple for setup
+    }.get(mode, ("#95a5a6", "❓"))         # Gray for unknown
+    mode_card = Card("Operation Mode", f"{mode_icon} {mode}{mode_detail}", mode_color)
+    
+    # Mobile quantity or data
+    if status.get('real_node_red_data'):
+        mobile_card = Card("Mobile Data", str(status.get('mobile_data', 0)), "#8e44ad")
+    else:
+        mobile_card = Card("Mobile Units", f"{status.get('mobile_quantity', 0)} Active", "#8e44ad")
     
-    with col3:
-        lighting = "🟢 On" if status.get('lighting_on', False) else "🔴 Off"
-        lighting_color = "#f39c12" if status.get('lighting_on', False) else "#95a5a6"
-        
-        if status.get('real_node_red_data'):
+    return [tcp_card, power_card, mode_card, mobile_card]
+
+def position_detail_cards(status: Dict[str, Any]) -> List[Card]:
+    """Cards for the Position & Status Details section"""
+    if status.get('real_node_red_data'):
+        return [
+            Card("Position Data", f"{status.get('position_data', 0)} units", "#16a085"),
+            Card("Raw Words", f"{len(status.get('words', []))} values", "#16a085", "0.9rem"),
             # Show connection method
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: #27ae60;">Data Source</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.0rem; font-weight: bold;">Node-RED ✅</p>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="metric-card">
-                <h4 style="margin: 0; color: {lighting_color};">Lighting System</h4>
-                <p style="margin: 0.5rem 0 0 0; font-size: 1.2rem; font-weight: bold;">{lighting}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            Card("Data Source", "Node-RED ✅", "#27ae60", "1.0rem"),
+        ]
+    
+    lighting_on = status.get('lighting_on', False)
+    return [
+        Card("Position 1", f"{status.get('position_1', 0) / 100.0:.2f}m", "#16a085"),
+        Card("Position 2", f"{status.get('position_2', 0) / 100.0:.2f}m", "#16a085"),
+        Card("Lighting System", "🟢 On" if lighting_on else "🔴 Off", "#f39c12" if lighting_on else "#95a5a6"),
+    ]
 
-def render_detailed_status(status: Dict[str, Any]):
-    """Render detailed status table"""
-    st.header("📋 Detailed Status")
-    
-    # Create DataFrame
-    status_data = []
+# Bookkeeping fields that are not status parameters
+DETAILED_STATUS_HIDDEN = ('timestamp', 'raw_response')
+
+def detailed_status_rows(status: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Rows of the detailed status table"""
+    rows = []
     descriptions = get_status_description(status)
     
     for key, value in status.items():
-        if key != 'timestamp':
+        if key not in DETAILED_STATUS_HIDDEN:
             field_info = WMS_DATA_STRUCTURE.get(key)
-            status_data.append({
+            rows.append({
                 'Parameter': key.replace('_', ' ').title(),
                 'Value': descriptions.get(key, str(value)),
                 'Type': field_info.data_type.value if field_info else 'Unknown',
                 'Offset': str(field_info.offset) if field_info else 'N/A',
                 'Description': field_info.comment if field_info else 'N/A'
             })
+    return rows
+
+def detailed_status_table(status: Dict[str, Any]):
+    """Detailed status DataFrame, built once per distinct raw frame (read-only)"""
+    import pandas as pd
+    return get_detailed_status_cache().get(status_key(status), lambda: pd.DataFrame(detailed_status_rows(status)))
+
+def render_detailed_status(status: Dict[str, Any]):
+    """Render detailed status table"""
+    st.header("📋 Detailed Status")
     
-    df = pd.DataFrame(status_data)
+    df = detailed_status_table(status)
     
     # Filter options
     col1, col2 = st.columns(2)
@@ -864,7 +906,7 @@ def render_detailed_status(status: Dict[str, Any]):
     with col2:
         show_only_active = st.checkbox("Only active values")
     
-    # Apply filters
+    # Apply filters (boolean masks on the cached table return new frames)
     if filter_type != "All":
         df = df[df['Type'] == filter_type]
     
@@ -971,8 +1013,13 @@ def render_history_chart():
         st.info("No history data available")
         return
     
-    # Create DataFrame from history
-    history_df = pd.DataFrame(st.session_state.status_history)
+    import pandas as pd
+    import plotly.express as px
+    
+    # Create DataFrame from history ((timestamp, status) pairs)
+    history_df = pd.DataFrame([
+        dict(status, timestamp=timestamp) for timestamp, status in st.session_state.status_history
+    ])
     
     # Select parameters to plot
     numeric_params = [
@@ -999,6 +1046,11 @@ def render_history_chart():
 
 def render_protocol_generator():
     """Render multi-language protocol code generator with Stow branding"""
+    from protocol_generators import (
+        get_available_languages, get_code_types, generate_protocol_code,
+        generate_protocol_bundle, get_file_extension
+    )
+    
     st.markdown("""
     <div style="background: linear-gradient(135deg, #3498db, #2980b9); padding: 1rem; border-radius: 10px; color: white; margin-bottom: 2rem;">
         <h2 style="margin: 0;">💻 Stow Multi-Language Protocol Generator</h2>
@@ -1038,15 +1090,11 @@ def render_protocol_generator():
         port = st.number_input("Port", value=2001, min_value=1, max_value=65535)
         
         # Code type selection
+        code_types = get_code_types()
         code_type = st.selectbox(
             "Code Type",
-            ["complete", "connection", "command", "parsing"],
-            format_func=lambda x: {
-                "complete": "Complete Example",
-                "connection": "Connection Only",
-                "command": "Send Command",
-                "parsing": "Parse Response"
-            }[x]
+            list(code_types),
+            format_func=lambda x: code_types[x]
         )
         
         # Manual command input for command type
@@ -1087,6 +1135,14 @@ def render_protocol_generator():
                 )
                 st.session_state.generated_code = generated_code
         
+        # Bulk export: same code type for every language in one zip
+        st.download_button(
+            label="📦 Download All Languages (zip)",
+            data=generate_protocol_bundle(code_type, host, int(port), int(manual_command)),
+            file_name=f"stow_wms_clients_{code_type}.zip",
+            mime="application/zip"
+        )
+        
         # Manual test field
         st.markdown("---")
         st.markdown("""
@@ -1240,6 +1296,7 @@ def render_diagnostics_page(current_status=None):
                 with st.spinner("Testing connectivity..."):
                     # Simple ping test simulation
                     try:
+                        import subprocess
                         result = subprocess.run(['ping', host, '-n', '1'], 
                                               capture_output=True, text=True, timeout=10)
                         if result.returncode == 0:
@@ -1357,9 +1414,11 @@ def render_diagnostics_page(current_status=None):
             3. Verify port configuration
             """)
 
-def get_logo_base64():
-    """Get base64 encoded logo for embedding"""
-    logo_path = "stow_logo.jpg"
+@st.cache_data(show_spinner=False)
+def get_logo_base64(logo_path: str = "stow_logo.jpg"):
+    """Get base64 encoded logo for embedding (encoded once per process, not per rerun)"""
+    import base64
+    
     if os.path.exists(logo_path):
         try:
             with open(logo_path, "rb") as f:
@@ -1371,24 +1430,44 @@ def get_logo_base64():
     # Fallback: return empty string if logo not found
     return ""
 
-def main():
-    """Main function with Stow branding and auto-refresh for HMI monitoring"""
-    import time
+def render_live_dashboard():
+    """Dashboard tabs; runs as a fragment so auto-refresh re-renders only this part"""
+    status = get_system_status()
+    tab1, tab2, tab3 = st.tabs([
+        "📊 Status Overview", "📋 Detailed View", "📈 History & Trends"
+    ])
+    
+    with tab1:
+        if status:
+            render_status_overview(status)
+            st.caption(f"🕒 Last update: {status['timestamp'].strftime('%H:%M:%S')}")
+        else:
+            st.info("🔄 **Getting system status...** Enable auto-refresh for continuous monitoring")
     
-    # Check if auto-refresh should trigger
-    current_time = time.time()
+    with tab2:
+        if status:
+            render_detailed_status(status)
+        else:
+            st.info("No status received yet")
+    
+    with tab3:
+        render_history_chart()
+
+def render_dashboard(refresh_interval=None):
+    """
+    Dashboard tabs
+    
+    All tabs are one fragment that fetches the status every refresh_interval
+    seconds (None = only on full reruns), so the detailed view and history
+    stay as fresh as the overview. Sessions share the controller's latest
+    poll (see get_system_status), so a refresh is not a PLC request each.
+    """
+    st.fragment(run_every=refresh_interval)(render_live_dashboard)()
+
+def main():
+    """Main function with Stow branding and fragment-based auto-refresh for HMI monitoring"""
     auto_refresh_enabled = st.session_state.get('auto_refresh', False) or st.session_state.get('real_time_mode', False)
     refresh_interval = st.session_state.get('refresh_interval', 3)
-    last_refresh = st.session_state.get('last_refresh_time', 0)
-    
-    # Auto-refresh logic for detecting HMI changes
-    if (auto_refresh_enabled and 
-        st.session_state.connected and 
-        current_time - last_refresh >= refresh_interval):
-        
-        st.session_state.last_refresh_time = current_time
-        # Trigger a rerun to refresh the data
-        st.rerun()
     
     # Header with Stow branding
     logo_b64 = get_logo_base64()
@@ -1436,7 +1515,7 @@ def main():
         col1, col2, col3 = st.columns([1, 1, 4])
         with col1:
             if st.button("🔄 Refresh Status"):
-                get_system_status()
+                get_system_status(max_age=0.0)
                 st.rerun()
         
         with col2:
@@ -1445,9 +1524,13 @@ def main():
                 refresh_interval = st.session_state.get('refresh_interval', 3)
                 st.info(f"⏱️ Auto: {refresh_interval}s")
         
+        if selected_page == "📊 Dashboard":
+            # Live status refreshes in a fragment instead of rerunning the whole script
+            render_dashboard(refresh_interval if auto_refresh_enabled else None)
+            return
+        
         # Automatically get status when connected and no manual action taken
-        auto_get_status = (selected_page == "📊 Dashboard" or 
-                          st.session_state.get('auto_refresh') or 
+        auto_get_status = (st.session_state.get('auto_refresh') or 
                           st.session_state.get('real_time_mode') or
                           not st.session_state.last_status)
         
@@ -1459,22 +1542,7 @@ def main():
         if status:
             current_status = status
             
-            if selected_page == "📊 Dashboard":
-                # Tabs for different views
-                tab1, tab2, tab3 = st.tabs([
-                    "📊 Status Overview", "📋 Detailed View", "📈 History & Trends"
-                ])
-                
-                with tab1:
-                    render_status_overview(current_status)
-                
-                with tab2:
-                    render_detailed_status(current_status)
-                
-                with tab3:
-                    render_history_chart()
-            
-            elif selected_page == "🎛️ Controls":
+            if selected_page == "🎛️ Controls":
                 # Control tabs
                 tab1, tab2 = st.tabs([
                     "💡 Lighting Control", "🎛️ System Commands"
@@ -1644,4 +1712,9 @@ def main():
             """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
+    _render_start = time.perf_counter()
     main()
+    metrics.histogram(
+        "wms_streamlit_render_seconds", "Script run time per page",
+        page=st.session_state.get('navigation', 'unknown')
+    ).observe(time.perf_counter() - _render_start)
@@ -1,9 +1,16 @@
 import streamlit as st
+import os
 import socket
 import struct
 import datetime
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from wms_codec import FixedFrameDecoder, Framing, LegacyFrameDecoder, encode_command, encode_legacy_open_aisle
+from wms_negotiation import capability_cache
+
+DEFAULT_PLC_IP = os.getenv("PLC_IP", "1.1.1.2")
+DEFAULT_PLC_PORT = int(os.getenv("PLC_PORT", "2000"))
 
 # Page config
 st.set_page_config(page_title="Stow WMS Gang Besturing", layout="wide")
@@ -143,6 +150,27 @@ def get_status_summary(status: Dict[str, Any]) -> str:
     else:
         return "🔴 SYSTEEM INACTIEF - Niet beschikbaar"
 
+def receive_frame(sock: socket.socket, decoder: FixedFrameDecoder,
+                  legacy_decoder: Optional[LegacyFrameDecoder] = None) -> bytes:
+    """
+    Read one complete response, however recv() splits it
+    
+    The decoders belong to the connection, so bytes past the response stay
+    buffered for the next read. Native responses are 20-byte status frames;
+    with a legacy_decoder an STX/ETX framed reply is accepted as well. As in
+    wms_negotiation.probe_port, a status frame wins.
+    """
+    while True:
+        chunk = sock.recv(64)
+        if not chunk:
+            raise ConnectionError("Connection closed before a complete response")
+        frames = decoder.feed(chunk)
+        replies = legacy_decoder.feed(chunk) if legacy_decoder else []
+        if frames:
+            return frames[-1]
+        if replies:
+            return replies[-1].encode()
+
 def send_aisle_command(aisle_number: int, plc_ip: str = "1.1.1.2", plc_port: int = 2000, use_legacy_protocol: bool = True):
     """Send aisle command and get response"""
     try:
@@ -153,23 +181,17 @@ def send_aisle_command(aisle_number: int, plc_ip: str = "1.1.1.2", plc_port: int
         
         if use_legacy_protocol:
             # Legacy WMS Protocol: STX + LEN + CMD + AISLE + CHK + ETX
-            start_byte = 0x02
-            length = 2
-            command = 0x4F  # 'O' for Open
-            aisle_byte = aisle_number
-            checksum = length ^ command ^ aisle_byte
-            end_byte = 0x03
-            
-            command_bytes = bytes([start_byte, length, command, aisle_byte, checksum, end_byte])
+            command_bytes = encode_legacy_open_aisle(aisle_number)
         else:
             # Simple 2-byte protocol: [aisle_number, 1]
-            command_bytes = bytes([aisle_number, 1])
+            command_bytes = encode_command(aisle_number)
         
         # Send command
-        sock.send(command_bytes)
+        sock.sendall(command_bytes)
         
-        # Wait for response
-        response = sock.recv(20)  # Expect 20-byte response
+        # Wait for the complete response
+        response = receive_frame(sock, FixedFrameDecoder(),
+                                 LegacyFrameDecoder() if use_legacy_protocol else None)
         sock.close()
         
         return {"success": True, "response": response, "command_sent": command_bytes}
@@ -186,13 +208,13 @@ def send_status_request(plc_ip: str = "1.1.1.2", plc_port: int = 2000):
         sock.connect((plc_ip, plc_port))
         
         # Status request: [0, 2]
-        command_bytes = bytes([0, 2])
+        command_bytes = encode_command(0)
         
         # Send command
-        sock.send(command_bytes)
+        sock.sendall(command_bytes)
         
-        # Wait for response
-        response = sock.recv(20)  # Expect 20-byte response
+        # Wait for the complete 20-byte response
+        response = receive_frame(sock, FixedFrameDecoder())
         sock.close()
         
         return {"success": True, "response": response, "command_sent": command_bytes}
@@ -205,8 +227,6 @@ if 'machine_status' not in st.session_state:
     st.session_state.machine_status = None
 if 'last_response_time' not in st.session_state:
     st.session_state.last_response_time = None
-if 'use_legacy_protocol' not in st.session_state:
-    st.session_state.use_legacy_protocol = True
 
 # Header
 st.title("🎯 Stow WMS Gang Besturing")
@@ -215,6 +235,16 @@ st.markdown("**Revolution Pi Connect SE - Gang Commando Interface**")
 # Direct gang besturing - GEEN TABS, GEEN SIDEBAR
 st.header("Gang Besturing Commando's")
 
+# PLC selected under Connection Settings (widget state from the previous run)
+plc_ip = st.session_state.get('plc_ip', DEFAULT_PLC_IP)
+plc_port = int(st.session_state.get('plc_port', DEFAULT_PLC_PORT))
+
+if st.session_state.get('framing_host') != plc_ip:
+    # Start with the framing found by negotiation for this PLC (python wms_negotiation.py <ip>)
+    capabilities = capability_cache.get(plc_ip)
+    st.session_state.use_legacy_protocol = capabilities is None or capabilities.framing == Framing.LEGACY.value
+    st.session_state.framing_host = plc_ip
+
 # Protocol selector
 protocol_col1, protocol_col2 = st.columns([3, 1])
 
@@ -346,7 +376,7 @@ CMD: 0x01 (Open)
     with col_send1:
         if st.button(f"✅ OPEN GANG {aisle_number}", type="primary", use_container_width=True):
             with st.spinner(f"📡 Commando wordt verzonden naar gang {aisle_number}..."):
-                result = send_aisle_command(aisle_number, "1.1.1.2", 2000, st.session_state.use_legacy_protocol)
+                result = send_aisle_command(aisle_number, plc_ip, plc_port, st.session_state.use_legacy_protocol)
                 
                 if result["success"]:
                     st.success(f"🎉 Commando verzonden naar gang {aisle_number}!")
@@ -383,10 +413,10 @@ CMD: 0x01 (Open)
             with st.spinner("📡 Status wordt opgehaald..."):
                 if st.session_state.use_legacy_protocol:
                     # For legacy, use a dummy gang command to get status
-                    result = send_aisle_command(1, "1.1.1.2", 2000, True)
+                    result = send_aisle_command(1, plc_ip, plc_port, True)
                 else:
                     # Use dedicated status request
-                    result = send_status_request("1.1.1.2", 2000)
+                    result = send_status_request(plc_ip, plc_port)
                 
                 if result["success"]:
                     status = parse_mobile_racking_response(result["response"])
@@ -407,7 +437,7 @@ with col2:
     for aisle in quick_aisles:
         if st.button(f"Gang {aisle}", key=f"quick_{aisle}", use_container_width=True):
             with st.spinner(f"📡 Gang {aisle} wordt geopend..."):
-                result = send_aisle_command(aisle, "1.1.1.2", 2000, st.session_state.use_legacy_protocol)
+                result = send_aisle_command(aisle, plc_ip, plc_port, st.session_state.use_legacy_protocol)
                 
                 if result["success"]:
                     st.success(f"✅ Gang {aisle} geopend!")
@@ -438,7 +468,7 @@ with col2:
     st.markdown("---")
     st.subheader("🌐 Netwerk")
     st.text("RevPi: 192.168.0.12")
-    st.text("PLC: 1.1.1.2:2000")
+    st.text(f"PLC: {plc_ip}:{plc_port}")
 
 # Machine Status Section
 if st.session_state.machine_status:
@@ -579,10 +609,10 @@ st.header("⚙️ Connection Settings")
 col_net1, col_net2, col_net3 = st.columns(3)
 
 with col_net1:
-    plc_ip = st.text_input("PLC IP Address", value="1.1.1.2")
+    plc_ip = st.text_input("PLC IP Address", value=DEFAULT_PLC_IP, key="plc_ip")
 
 with col_net2:
-    plc_port = st.number_input("PLC Port", value=2000, min_value=1, max_value=65535)
+    plc_port = st.number_input("PLC Port", value=DEFAULT_PLC_PORT, min_value=1, max_value=65535, key="plc_port")
 
 with col_net3:
     if st.button("🔗 Test PLC Verbinding", type="secondary"):
@@ -20,6 +20,7 @@ try:
     from enhanced_response_parser import (
         parse_enhanced_mobile_response, 
         get_safety_assessment, 
+        get_frame_safety_assessment,
         format_status_for_customer,
         decode_boolean_flags_byte5,
         decode_alarm_flags
@@ -42,7 +43,7 @@ def get_status_color_indicator(status: Dict[str, Any]) -> str:
         return "⚫ UNKNOWN"
     
     if PARSER_AVAILABLE:
-        safety_color, safety_status, _ = get_safety_assessment(status)
+        safety_color, safety_status, _ = get_frame_safety_assessment(status)
         return f"{safety_color} {safety_status}"
     else:
         # Fallback logic without parser
@@ -4,8 +4,9 @@ Complete one-pager met alle commando's, real-time monitoring en visualisaties
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
-import time
+import os
 import socket
 import datetime
 from datetime import datetime
@@ -14,11 +15,14 @@ import plotly.express as px
 from typing import Dict, Any, List
 import json
 
+from utils.gang_grid import (GANG_GRID_HEIGHT, LIGHTING_PUSH_HEIGHT, lighting_word,
+                             render_gang_grid, render_lighting_push)
+
 # Import enhanced parser
 try:
     from enhanced_response_parser import (
         parse_enhanced_mobile_response, 
-        get_safety_assessment, 
+        get_frame_safety_assessment,
         decode_boolean_flags_byte5,
         decode_alarm_flags
     )
@@ -26,6 +30,9 @@ try:
 except ImportError:
     PARSER_AVAILABLE = False
 
+# Seconds between automatic status requests while live monitoring is on
+LIVE_REFRESH_SECONDS = 5
+
 # Page config
 st.set_page_config(
     page_title="STOW WMS Mission Control",
@@ -158,48 +165,27 @@ def send_plc_command(command_bytes: bytes, command_description: str):
         st.session_state.command_history.append(error_log)
         return {"success": False, "error": str(e)}
 
+def gang_grid_stream():
+    """Lighting word SSE URL when the API gateway is configured (WMS_API_URL), else None"""
+    api_url = os.getenv('WMS_API_URL')
+    return f"{api_url}/lighting" if api_url else None
+
 def create_gang_visualization():
-    """Create visual representation of gang status"""
+    """
+    Embed the gang grid component (static SVG, updated from the 32-bit lighting word)
+
+    The grid document is constant, so Streamlit keeps the same iframe across
+    reruns. It follows the gateway's /lighting stream when WMS_API_URL is
+    set; otherwise a zero-height push frame posts the current word to it.
+    """
     if not st.session_state.last_status:
-        return None
-    
-    # Create gang status grid
-    fig = go.Figure()
-    
-    # Grid layout for 32 gangs (8x4)
-    rows, cols = 4, 8
-    gang_states = st.session_state.last_status.get('aisle_lighting', {})
-    
-    for i in range(1, 33):
-        row = (i - 1) // cols
-        col = (i - 1) % cols
-        
-        is_lit = gang_states.get(i, False)
-        color = '#4CAF50' if is_lit else '#E0E0E0'
-        
-        fig.add_shape(
-            type="rect",
-            x0=col, y0=3-row, x1=col+0.8, y1=3-row+0.8,
-            fillcolor=color,
-            line=dict(color='black', width=1)
-        )
-        
-        fig.add_annotation(
-            x=col+0.4, y=3-row+0.4,
-            text=str(i),
-            showarrow=False,
-            font=dict(color='white' if is_lit else 'black', size=12, family="Arial Black")
-        )
-    
-    fig.update_layout(
-        title="Gang Verlichting Status (Real-time)",
-        xaxis=dict(range=[-0.5, 8.5], showgrid=False, showticklabels=False),
-        yaxis=dict(range=[-0.5, 4.5], showgrid=False, showticklabels=False),
-        height=300,
-        margin=dict(l=20, r=20, t=40, b=20)
-    )
+        return
     
-    return fig
+    stream_url = gang_grid_stream()
+    components.html(render_gang_grid(0, stream_url), height=GANG_GRID_HEIGHT)
+    if not stream_url:
+        gang_states = st.session_state.last_status.get('aisle_lighting', {})
+        components.html(render_lighting_push(lighting_word(gang_states)), height=LIGHTING_PUSH_HEIGHT)
 
 def create_alarm_heatmap():
     """Create alarm status heatmap"""
@@ -276,7 +262,7 @@ with col1:
         st.subheader("📈 System Status")
         
         if PARSER_AVAILABLE:
-            safety_color, safety_status, safety_advice = get_safety_assessment(st.session_state.last_status)
+            safety_color, safety_status, safety_advice = get_frame_safety_assessment(st.session_state.last_status)
             
             if "🟢" in safety_color:
                 st.success(f"{safety_color} {safety_status}")
@@ -425,17 +411,21 @@ with col3:
         st.session_state.command_history = []
         st.rerun()
 
-# Visualizations section
-if st.session_state.last_status:
+def render_live_visualizations():
+    """Gang grid and alarm heatmap; a fragment that polls on its own while live monitoring is on"""
+    if st.session_state.live_monitoring:
+        # Send status request automatically
+        send_plc_command(bytes([0, 2]), "Auto Status Request")
+    if not st.session_state.last_status:
+        return
+    
     st.subheader("📈 Live Visualizations")
     
     viz_col1, viz_col2 = st.columns(2)
     
     with viz_col1:
         # Gang lighting visualization
-        gang_fig = create_gang_visualization()
-        if gang_fig:
-            st.plotly_chart(gang_fig, use_container_width=True)
+        create_gang_visualization()
     
     with viz_col2:
         # Alarm heatmap
@@ -443,13 +433,11 @@ if st.session_state.last_status:
         if alarm_fig:
             st.plotly_chart(alarm_fig, use_container_width=True)
 
-# Live monitoring auto-refresh
+# Visualizations section; live monitoring re-runs only this fragment
+st.fragment(run_every=LIVE_REFRESH_SECONDS if st.session_state.live_monitoring else None)(render_live_visualizations)()
+
 if st.session_state.live_monitoring:
-    st.info("🔴 Live monitoring actief - Auto-refresh elke 5 seconden")
-    time.sleep(5)
-    # Send status request automatically
-    result = send_plc_command(bytes([0, 2]), "Auto Status Request")
-    st.rerun()
+    st.info(f"🔴 Live monitoring actief - Auto-refresh elke {LIVE_REFRESH_SECONDS} seconden")
 
 # Footer
 st.markdown("---")
@@ -4,7 +4,9 @@ Met simulatie mode voor lokale development en testing
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import os
 import time
 import socket
 import datetime
@@ -15,11 +17,14 @@ from typing import Dict, Any, List
 import json
 import random
 
+from utils.gang_grid import (GANG_GRID_HEIGHT, LIGHTING_PUSH_HEIGHT, lighting_word,
+                             render_gang_grid, render_lighting_push)
+
 # Import enhanced parser
 try:
     from enhanced_response_parser import (
         parse_enhanced_mobile_response, 
-        get_safety_assessment, 
+        get_frame_safety_assessment,
         decode_boolean_flags_byte5,
         decode_alarm_flags
     )
@@ -27,6 +32,9 @@ try:
 except ImportError:
     PARSER_AVAILABLE = False
 
+# Seconds between automatic status requests while live monitoring is on
+LIVE_REFRESH_SECONDS = 3
+
 # Page config
 st.set_page_config(
     page_title="STOW WMS Mission Control (LOCAL)",
@@ -268,74 +276,30 @@ def send_plc_command(command_bytes: bytes, command_description: str):
     
     return {"success": True, "response": response, "parsed": parsed_status}
 
+def gang_grid_stream():
+    """Lighting word SSE URL when the API gateway is configured (WMS_API_URL), else None"""
+    api_url = os.getenv('WMS_API_URL')
+    return f"{api_url}/lighting" if api_url else None
+
 def create_enhanced_gang_visualization():
-    """Create enhanced gang visualization with animations"""
+    """
+    Embed the gang grid component (static SVG, updated from the 32-bit lighting word)
+
+    The grid document is constant, so Streamlit keeps the same iframe across
+    reruns. It follows the gateway's /lighting stream when WMS_API_URL is
+    set; otherwise a zero-height push frame posts the current word to it.
+    """
+    stream_url = gang_grid_stream()
+    components.html(render_gang_grid(0, stream_url), height=GANG_GRID_HEIGHT)
+    if stream_url:
+        return
+    
     if not st.session_state.last_status:
         # Use simulated states if no real data
         gang_states = st.session_state.gang_states
     else:
         gang_states = st.session_state.last_status.get('aisle_lighting', {})
-    
-    fig = go.Figure()
-    
-    # Create 3D-like gang grid
-    rows, cols = 4, 8
-    
-    for i in range(1, 33):
-        row = (i - 1) // cols
-        col = (i - 1) % cols
-        
-        is_lit = gang_states.get(i, False)
-        
-        # Color scheme based on status
-        if is_lit:
-            color = '#00E676'  # Bright green for active
-            border_color = '#4CAF50'
-            text_color = 'white'
-        else:
-            color = '#37474F'  # Dark gray for inactive  
-            border_color = '#607D8B'
-            text_color = '#B0BEC5'
-        
-        # Main rectangle
-        fig.add_shape(
-            type="rect",
-            x0=col*1.2, y0=(3-row)*1.2, x1=col*1.2+1, y1=(3-row)*1.2+1,
-            fillcolor=color,
-            line=dict(color=border_color, width=2)
-        )
-        
-        # Add glow effect for active gangs
-        if is_lit:
-            fig.add_shape(
-                type="rect",
-                x0=col*1.2-0.1, y0=(3-row)*1.2-0.1, x1=col*1.2+1.1, y1=(3-row)*1.2+1.1,
-                fillcolor='rgba(0, 230, 118, 0.3)',
-                line=dict(color='rgba(0, 230, 118, 0.5)', width=1)
-            )
-        
-        # Gang number
-        fig.add_annotation(
-            x=col*1.2+0.5, y=(3-row)*1.2+0.5,
-            text=f"<b>{i}</b>",
-            showarrow=False,
-            font=dict(color=text_color, size=14, family="Arial Black")
-        )
-    
-    fig.update_layout(
-        title=dict(
-            text="🏭 Gang Status Grid - Real-time Monitoring",
-            font=dict(size=16, color='#1a1a1a')
-        ),
-        xaxis=dict(range=[-0.5, 9.5], showgrid=False, showticklabels=False, zeroline=False),
-        yaxis=dict(range=[-0.5, 5], showgrid=False, showticklabels=False, zeroline=False),
-        height=350,
-        margin=dict(l=20, r=20, t=50, b=20),
-        plot_bgcolor='rgba(248, 249, 250, 0.8)',
-        paper_bgcolor='white'
-    )
-    
-    return fig
+    components.html(render_lighting_push(lighting_word(gang_states)), height=LIGHTING_PUSH_HEIGHT)
 
 def create_status_trend_chart():
     """Create trending chart of system metrics"""
@@ -438,7 +402,7 @@ with header_col2:
 with header_col3:
     st.session_state.live_monitoring = st.toggle("🔴 Live Monitoring", value=st.session_state.live_monitoring)
     if st.session_state.live_monitoring:
-        st.caption("📡 Auto-refresh every 3s")
+        st.caption(f"📡 Auto-refresh every {LIVE_REFRESH_SECONDS}s")
 
 # Connection and system status row
 status_col1, status_col2, status_col3, status_col4 = st.columns(4)
@@ -464,7 +428,7 @@ with status_col2:
 
 with status_col3:
     if st.session_state.last_status and PARSER_AVAILABLE:
-        safety_color, safety_status, _ = get_safety_assessment(st.session_state.last_status)
+        safety_color, safety_status, _ = get_frame_safety_assessment(st.session_state.last_status)
         st.metric("System Status", f"{safety_color} {safety_status}")
     else:
         st.metric("System Status", "⚫ Unknown")
@@ -601,42 +565,48 @@ with control_col2:
         st.session_state.command_history = []
         st.rerun()
 
-# Visualizations section
-st.subheader("📈 Live System Visualizations")
+def render_live_visualizations():
+    """Visualizations and analytics; a fragment that polls on its own while live monitoring is on"""
+    if st.session_state.live_monitoring:
+        # Send automatic status request
+        send_plc_command(bytes([0, 2]), "Auto Status Request")
+    
+    st.subheader("📈 Live System Visualizations")
 
-viz_col1, viz_col2 = st.columns(2)
+    viz_col1, viz_col2 = st.columns(2)
 
-with viz_col1:
-    gang_fig = create_enhanced_gang_visualization()
-    if gang_fig:
-        st.plotly_chart(gang_fig, use_container_width=True)
+    with viz_col1:
+        create_enhanced_gang_visualization()
 
-with viz_col2:
-    trend_fig = create_status_trend_chart()
-    if trend_fig:
-        st.plotly_chart(trend_fig, use_container_width=True)
-    else:
-        st.info("📊 Waiting for more data to show trends...")
+    with viz_col2:
+        trend_fig = create_status_trend_chart()
+        if trend_fig:
+            st.plotly_chart(trend_fig, use_container_width=True)
+        else:
+            st.info("📊 Waiting for more data to show trends...")
 
-# Additional analytics
-analytics_col1, analytics_col2 = st.columns(2)
+    # Additional analytics
+    analytics_col1, analytics_col2 = st.columns(2)
 
-with analytics_col1:
-    freq_fig = create_command_frequency_chart()
-    if freq_fig:
-        st.plotly_chart(freq_fig, use_container_width=True)
+    with analytics_col1:
+        freq_fig = create_command_frequency_chart()
+        if freq_fig:
+            st.plotly_chart(freq_fig, use_container_width=True)
 
-with analytics_col2:
-    if st.session_state.last_status and PARSER_AVAILABLE and 'alarms' in st.session_state.last_status:
-        st.write("**🚨 Active Alarms:**")
-        alarms = st.session_state.last_status['alarms']
-        active_alarms = [alarm for alarm, active in alarms.items() if active]
+    with analytics_col2:
+        if st.session_state.last_status and PARSER_AVAILABLE and 'alarms' in st.session_state.last_status:
+            st.write("**🚨 Active Alarms:**")
+            alarms = st.session_state.last_status['alarms']
+            active_alarms = [alarm for alarm, active in alarms.items() if active]
         
-        if active_alarms:
-            for alarm in active_alarms[:8]:  # Show max 8
-                st.error(f"🚨 {alarm.replace('_', ' ').title()}")
-        else:
-            st.success("✅ No active alarms")
+            if active_alarms:
+                for alarm in active_alarms[:8]:  # Show max 8
+                    st.error(f"🚨 {alarm.replace('_', ' ').title()}")
+            else:
+                st.success("✅ No active alarms")
+
+# Visualizations section; live monitoring re-runs only this fragment
+st.fragment(run_every=LIVE_REFRESH_SECONDS if st.session_state.live_monitoring else None)(render_live_visualizations)()
 
 # Live monitoring auto-refresh
 if st.session_state.live_monitoring:
@@ -647,11 +617,6 @@ if st.session_state.live_monitoring:
         <span class="live-indicator"></span>LIVE
     </div>
     """, unsafe_allow_html=True)
-    
-    time.sleep(3)  # 3 second refresh
-    # Send automatic status request
-    result = send_plc_command(bytes([0, 2]), "Auto Status Request")
-    st.rerun()
 
 # Footer
 st.markdown("---")
@@ -19,6 +19,7 @@ from typing import Dict, Any, List
 from enhanced_response_parser import (
     parse_enhanced_mobile_response, 
     get_safety_assessment, 
+    get_frame_safety_assessment,
     format_status_for_customer,
     decode_boolean_flags_byte5,
     decode_alarm_flags
@@ -145,7 +146,7 @@ def render_official_status_display():
         status = st.session_state['last_status']
         
         # Safety assessment using official logic
-        safety_color, safety_status, safety_advice = get_safety_assessment(status)
+        safety_color, safety_status, safety_advice = get_frame_safety_assessment(status)
         
         # Main status display
         col1, col2, col3, col4 = st.columns(4)
@@ -69,6 +69,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Seconden tussen live updates bij auto-refresh
+AUTO_REFRESH_INTERVAL = 30
+
 # Eenvoudige simulatie data voor RevPi testing
 def get_system_status():
     """Simuleer PLC data voor testing"""
@@ -119,9 +122,8 @@ with st.sidebar:
 # Main interface
 tab1, tab2, tab3 = st.tabs(["Live Monitoring", "System Status", "Configuration"])
 
-with tab1:
-    st.header("Real-time HMI Monitoring")
-    
+def render_live_metrics():
+    """Live status metrics; runs as a fragment so auto-refresh re-renders only this part"""
     col1, col2, col3, col4 = st.columns(4)
     
     # Get current status
@@ -154,13 +156,14 @@ with tab1:
             "Revolution Pi Connect SE",
             delta="192.168.0.12"
         )
+
+with tab1:
+    st.header("Real-time HMI Monitoring")
     
-    # Auto-refresh
+    # Auto-refresh: alleen de live metrics worden elke 30s opnieuw gerenderd,
+    # niet het hele script (geen sleep/rerun loop meer)
     auto_refresh = st.checkbox("Auto-refresh (30s)", value=True)
-    
-    if auto_refresh:
-        time.sleep(0.1)  # Kleine delay voor smooth updates
-        st.rerun()
+    st.fragment(run_every=AUTO_REFRESH_INTERVAL if auto_refresh else None)(render_live_metrics)()
 
 with tab2:
     st.header("System Status Overview")
@@ -285,9 +288,3 @@ st.markdown("""
     <p>Industrial TCP/IP Communication Interface | Version 1.0</p>
 </div>
 """, unsafe_allow_html=True)
-
-# Auto-refresh voor live monitoring
-if auto_refresh and st.session_state.get('last_refresh', 0) + 30 < time.time():
-    st.session_state.last_refresh = time.time()
-    time.sleep(1)
-    st.rerun()
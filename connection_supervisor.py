@@ -0,0 +1,277 @@
+"""
+Reconnect supervisor with circuit breaker for the PLC connection
+
+While the controller is down, callers fail fast instead of each waiting
+for the 10 s connect timeout. A background thread reconnects with
+jittered exponential backoff; once the breaker's open interval expires,
+a single half-open probe (connect + status request) decides whether the
+circuit closes again or stays open for twice as long.
+
+    closed     requests go through; consecutive failures are counted
+    open       requests fail immediately until the backoff expires
+    half-open  one probe is in flight; success closes, failure re-opens
+
+Usage:
+    supervisor = ConnectionSupervisor(TCPClient(host, port))
+    supervisor.start()
+    response = supervisor.send_command(0)   # None at once while open
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from tcp_client import TCPClient, intern_status_frame
+from utils.event_log import EventOutcome
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Status request sent when the connection has been idle this long (0 = off);
+# proves the controller application answers, not just its TCP stack
+HEARTBEAT_INTERVAL = float(os.getenv("WMS_HEARTBEAT_INTERVAL", "5.0"))
+
+
+class BreakerState(str, Enum):
+    """Circuit breaker state"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+_STATE_VALUES = {BreakerState.CLOSED: 0, BreakerState.OPEN: 1, BreakerState.HALF_OPEN: 2}
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with exponential open intervals"""
+
+    def __init__(self, name: str = "plc", failure_threshold: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 30.0, jitter: float = 0.5):
+        """
+        Initialize breaker
+
+        Args:
+            name (str): Label for logs and metrics (controller id)
+            failure_threshold (int): Consecutive failures that open the circuit
+            base_delay (float): First open interval in seconds
+            max_delay (float): Upper bound for the open interval
+            jitter (float): Fraction of the interval randomized away (0-1)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+        self._m_state = metrics.gauge("wms_circuit_state", "0 closed, 1 open, 2 half-open", controller=name)
+        self._m_trips = metrics.counter("wms_circuit_trips_total", "Times the circuit opened", controller=name)
+
+    def _set_state(self, state: BreakerState):
+        if state != self.state:
+            logger.info("Circuit %s: %s -> %s", self.name, self.state.value, state.value)
+            self.state = state
+        self._m_state.set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be attempted now
+
+        After the open interval expires exactly one caller is let through
+        as the half-open probe.
+        """
+        with self._lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.OPEN and time.monotonic() >= self._open_until:
+                self._set_state(BreakerState.HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self):
+        """Close the circuit and reset the backoff"""
+        with self._lock:
+            self.failures = 0
+            self._trips = 0
+            self._set_state(BreakerState.CLOSED)
+
+    def record_failure(self):
+        """Count a failure; opens the circuit at the threshold or after a failed probe"""
+        with self._lock:
+            self.failures += 1
+            if self.state == BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+                delay = min(self.max_delay, self.base_delay * (2 ** self._trips))
+                delay *= 1.0 - random.uniform(0.0, self.jitter)
+                self._trips += 1
+                self._open_until = time.monotonic() + delay
+                self._m_trips.inc()
+                self._set_state(BreakerState.OPEN)
+
+    def retry_in(self) -> float:
+        """Seconds until the next attempt is allowed (0 unless open)"""
+        if self.state != BreakerState.OPEN:
+            return 0.0
+        return max(0.0, self._open_until - time.monotonic())
+
+
+class ConnectionSupervisor:
+    """Keeps a TCPClient connected from a background thread"""
+
+    def __init__(self, client: TCPClient, breaker: Optional[CircuitBreaker] = None,
+                 check_interval: float = 1.0, heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        """
+        Initialize supervisor
+
+        Args:
+            client (TCPClient): Client to supervise (not connected yet is fine)
+            breaker (Optional[CircuitBreaker]): Breaker (default one per controller)
+            check_interval (float): Seconds between checks while connected
+            heartbeat_interval (float): Idle seconds before a heartbeat status request (0 = off)
+        """
+        self.client = client
+        self.breaker = breaker or CircuitBreaker(client.controller_id)
+        self.check_interval = check_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._m_heartbeats = metrics.counter("wms_heartbeats_total", "Heartbeat status requests",
+                                             controller=client.controller_id)
+        self._io_lock = threading.Lock()
+        self._latest: Optional[Tuple[float, Mapping[str, Any]]] = None  # (time.monotonic(), status)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        """True if requests are sent to the controller (connected, circuit closed)"""
+        return self.client.connected and self.breaker.state == BreakerState.CLOSED
+
+    def start(self):
+        """Start the reconnect thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="wms-reconnect", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 12.0):
+        """Stop the reconnect thread and disconnect"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._io_lock:
+            self.client.disconnect()
+
+    def _probe(self) -> bool:
+        """Connect and prove the controller answers a status request"""
+        with self._io_lock:
+            if not self.client.connected and not self.client.connect():
+                return False
+            return self.client.send_command(0) is not None
+
+    def _run(self):
+        """Reconnect loop"""
+        while not self._stop.is_set():
+            if self.client.connected and self.breaker.state == BreakerState.CLOSED:
+                if self.heartbeat_interval and self.client.idle_seconds >= self.heartbeat_interval:
+                    self._heartbeat()
+                self._wake.wait(self.check_interval)
+                self._wake.clear()
+                continue
+
+            if not self.breaker.allow():
+                self._stop.wait(max(0.05, self.breaker.retry_in()))
+                continue
+
+            if self._probe():
+                logger.info("Controller %s reachable", self.client.controller_id)
+                self.breaker.record_success()
+            else:
+                with self._io_lock:
+                    self.client.disconnect()
+                self.breaker.record_failure()
+
+    def _heartbeat(self):
+        """Status request on an idle connection; a missing answer counts as a failure"""
+        self._m_heartbeats.inc()
+        with self._io_lock:
+            if self.client.idle_seconds < self.heartbeat_interval:
+                return  # a caller used the connection meanwhile
+            response = self.client.send_command(0)
+        if response is None:
+            logger.warning("Heartbeat to %s failed", self.client.controller_id)
+        else:
+            self._latest = (time.monotonic(), intern_status_frame(response)[1])
+        self._record(response is not None)
+
+    def _fail_fast(self) -> bool:
+        """True (and outcome set) if the request must not touch the socket"""
+        if self.available:
+            return False
+        self.client.last_outcome = EventOutcome.NOT_CONNECTED
+        self._wake.set()
+        return True
+
+    def _record(self, ok: bool):
+        if ok:
+            self.breaker.record_success()
+            return
+        self.breaker.record_failure()
+        with self._io_lock:
+            self.client.disconnect()
+        self._wake.set()
+
+    def send_command(self, command: int) -> Optional[bytes]:
+        """
+        Send a command, failing fast while the controller is unavailable
+
+        Returns:
+            Optional[bytes]: 20-byte response or None
+        """
+        if self._fail_fast():
+            return None
+        with self._io_lock:
+            response = self.client.send_command(command)
+        self._record(response is not None)
+        return response
+
+    def get_status(self, max_age: float = 0.0) -> Optional[Mapping[str, Any]]:
+        """
+        Parsed status via TCPClient.get_status, failing fast while unavailable
+
+        Args:
+            max_age (float): Reuse a status polled (by any caller or heartbeat)
+                at most this many seconds ago instead of asking the PLC again
+
+        Returns:
+            Optional[Mapping]: Interned read-only status or None
+        """
+        if self._fail_fast():
+            return None
+        with self._io_lock:
+            # Callers queued behind a poll reuse its result
+            latest = self._latest
+            if latest is not None and time.monotonic() - latest[0] <= max_age:
+                return latest[1]
+            status = self.client.get_status()
+            if status is not None:
+                self._latest = (time.monotonic(), status)
+        self._record(status is not None)
+        return status
+
+    def describe(self) -> Dict[str, Any]:
+        """State for display: circuit state, seconds to next probe, failures"""
+        return {
+            'state': self.breaker.state.value,
+            'connected': self.client.connected,
+            'retry_in': round(self.breaker.retry_in(), 1),
+            'failures': self.breaker.failures,
+        }
@@ -8,6 +8,12 @@ import struct
 import datetime
 from typing import Dict, Any, List, Tuple
 
+from utils.frame_cache import FrameCache, status_key
+from utils.metrics import metrics
+
+_parse_timer = metrics.histogram("wms_parse_seconds", "Status frame parse time", parser="enhanced")
+_safety_cache = FrameCache("safety")
+
 def decode_boolean_flags_byte5(byte_value: int) -> Dict[str, bool]:
     """
     Decode byte 5 Boolean flags according to official WMS-Data specification
@@ -87,6 +93,11 @@ def parse_enhanced_mobile_response(response_bytes: bytes) -> Dict[str, Any]:
     if len(response_bytes) != 20:
         raise ValueError(f"Expected 20 bytes, got {len(response_bytes)}")
     
+    with _parse_timer.time():
+        return _parse_enhanced_mobile_response(response_bytes)
+
+def _parse_enhanced_mobile_response(response_bytes: bytes) -> Dict[str, Any]:
+    """Decode a validated 20-byte response (see parse_enhanced_mobile_response)"""
     # Convert to list for easy access
     bytes_list = list(response_bytes)
     
@@ -177,6 +188,10 @@ def get_safety_assessment(status: Dict[str, Any]) -> Tuple[str, str, str]:
     else:
         return ("🟡", "BEPERKT KLAAR", "Controleer status voordat u doorgaat")
 
+def get_frame_safety_assessment(status: Dict[str, Any]) -> Tuple[str, str, str]:
+    """get_safety_assessment computed once per distinct raw frame"""
+    return _safety_cache.get(status_key(status), lambda: get_safety_assessment(status))
+
 def format_status_for_customer(status: Dict[str, Any]) -> str:
     """
     Format complete status in customer-friendly Dutch
@@ -0,0 +1,150 @@
+"""
+Native-protocol multiplexing proxy
+
+Listens on the controller's own port (2000 by default) and speaks the same
+protocol as the PLC, so Node-RED flows and the clients in examples/ can
+point at the RevPi unchanged while sharing one PLC session:
+
+    (0, 2)      answered with the last frame received from the controller,
+                byte for byte (a fresh poll is queued only when that frame is
+                older than STATUS_MAX_AGE)
+    (n, 1)      open aisle n, forwarded over the single upstream connection
+    other       legacy 16-bit commands, forwarded as well
+
+Every request gets one 20-byte response. If the controller cannot answer,
+the client connection is closed, just as an unreachable PLC would.
+
+Usage:
+    python native_proxy.py --host 1.1.1.2 --port 2000 --listen-port 2000
+"""
+
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import List, Optional
+
+from utils.metrics import metrics
+from wms_codec import FixedFrameDecoder, decode_command
+from wms_service import WMSService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LISTEN_PORT = 2000
+REQUEST_SIZE = 2
+STATUS_MAX_AGE = 2.0      # seconds a cached frame may be served for (0,2)
+COMMAND_TIMEOUT = 10.0    # seconds a client waits for a forwarded command
+
+_m_clients = metrics.gauge("wms_proxy_clients", "Connected native-protocol proxy clients")
+_m_cached = metrics.counter("wms_proxy_requests_total", "Proxy requests", kind="status_cached")
+_m_polled = metrics.counter("wms_proxy_requests_total", "Proxy requests", kind="status_polled")
+_m_forwarded = metrics.counter("wms_proxy_requests_total", "Proxy requests", kind="command")
+_m_failed = metrics.counter("wms_proxy_failures_total", "Proxy requests closed without a response")
+
+
+class NativeProxyHandler(socketserver.BaseRequestHandler):
+    """One downstream client; the WMSService is attached by NativeProxy"""
+
+    service: WMSService = None
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        _m_clients.inc()
+        logger.info("Proxy client %s:%s connected", *self.client_address[:2])
+
+    def finish(self):
+        _m_clients.dec()
+        logger.info("Proxy client %s:%s disconnected", *self.client_address[:2])
+
+    def handle(self):
+        decoder = FixedFrameDecoder(REQUEST_SIZE)
+        while True:
+            try:
+                chunk = self.request.recv(256)
+            except OSError:
+                return
+            if not chunk:
+                return
+            # Clients may pipeline: answer every complete request in order
+            for request in decoder.feed(chunk):
+                response = self._respond(decode_command(request))
+                if response is None:
+                    _m_failed.inc()
+                    return
+                try:
+                    self.request.sendall(response)
+                except OSError:
+                    return
+
+    def _respond(self, command: int) -> Optional[bytes]:
+        """20-byte response for one request, or None if the controller did not answer"""
+        if command == 0:
+            sample = self.service.snapshot()
+            if sample is not None and time.time() - sample[0] <= STATUS_MAX_AGE:
+                _m_cached.inc()
+                # The received bytes, message counter included
+                timestamp, frame, _ = sample
+                return frame
+            _m_polled.inc()
+        else:
+            _m_forwarded.inc()
+
+        try:
+            return self.service.submit_command(command).result(timeout=COMMAND_TIMEOUT)
+        except FutureTimeout:
+            logger.warning("Proxy command %s timed out", command)
+            return None
+        except Exception as e:
+            logger.warning("Proxy command %s failed: %s", command, e)
+            return None
+
+
+class _ProxyServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class NativeProxy:
+    """TCP server thread exposing a WMSService over the native protocol"""
+
+    def __init__(self, service: WMSService, port: int = DEFAULT_LISTEN_PORT, host: str = "0.0.0.0"):
+        """
+        Initialize proxy
+
+        Args:
+            service (WMSService): Service owning the PLC connection
+            port (int): Listen port (0 = any free port)
+            host (str): Listen address
+        """
+        handler = type("BoundNativeProxyHandler", (NativeProxyHandler,), {"service": service})
+        self.service = service
+        self.server = _ProxyServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        """Serve clients in a daemon thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="wms-native-proxy", daemon=True)
+        self._thread.start()
+        logger.info("Native protocol proxy listening on port %s", self.port)
+
+    def stop(self):
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the service with the proxy enabled (wms_service.main, --listen-port defaults to PROXY_PORT/2000)"""
+    from wms_service import main as service_main
+    service_main(argv, defaults={'proxy_port': int(os.getenv("PROXY_PORT", DEFAULT_LISTEN_PORT))})
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,24 @@ Multi-Language Protocol Generators for WMS Mobile Racking Communication
 Generates TCP-IP communication code in various programming languages
 """
 
+import io
 import json
+import re
+import zipfile
+from functools import lru_cache
 from typing import Dict, Any, List
 from wms_protocol import WMSCommands
 
+# Leading 'use strict', header comment block or module docstring of a generated client
+_CLIENT_HEADER = re.compile(r"\A(?:'use strict';\n)?(?:\"\"\"[\s\S]*?\"\"\"\n|(?:(?://|#)[^\n]*\n)+)")
+
 class ProtocolGenerator:
     """Base class for protocol code generators"""
     
     def __init__(self):
         self.language = "base"
         self.file_extension = ".txt"
+        self.usage_marker = ""  # where generate_production_client's usage example starts
     
     def generate_connection_code(self, host: str, port: int) -> str:
         """Generate connection establishment code"""
@@ -33,6 +41,21 @@ class ProtocolGenerator:
     def generate_complete_example(self, host: str, port: int) -> str:
         """Generate complete working example"""
         raise NotImplementedError
+    
+    def generate_production_client(self, host: str, port: int) -> str:
+        """Generate persistent client with 20-byte framing, reconnect backoff and pipelined polling"""
+        raise NotImplementedError
+    
+    def generate_benchmark_code(self, host: str, port: int) -> str:
+        """Generate load/latency benchmark of the production client printing throughput and latency percentiles"""
+        raise NotImplementedError
+    
+    def _production_library(self, host: str, port: int) -> str:
+        """Production client code without its header comment and usage example (embedded by the benchmark)"""
+        code = self.generate_production_client(host, port)
+        code = code[:code.index(self.usage_marker)]
+        code = _CLIENT_HEADER.sub("", code, count=1)
+        return code.strip("\n") + "\n"
 
 class NodeJSGenerator(ProtocolGenerator):
     """Node.js TCP-IP communication code generator"""
@@ -41,6 +64,7 @@ class NodeJSGenerator(ProtocolGenerator):
         super().__init__()
         self.language = "Node.js"
         self.file_extension = ".js"
+        self.usage_marker = '// Usage example'
     
     def generate_connection_code(self, host: str, port: int) -> str:
         return f"""const net = require('net');
@@ -224,6 +248,220 @@ async function main() {{
 // Run the example
 main();"""
 
+    def generate_production_client(self, host: str, port: int) -> str:
+        return f"""'use strict';
+// Stow WMS production client
+// One persistent connection, 20-byte framing over partial reads,
+// reconnect with exponential backoff and pipelined status polling.
+
+const net = require('net');
+
+const FRAME_SIZE = 20;
+const STATUS_REQUEST = Buffer.from([0x00, 0x02]);
+
+function openAisleRequest(aisle) {{
+    if (aisle < 1 || aisle > 19) throw new RangeError('aisle must be between 1 and 19');
+    return Buffer.from([aisle, 0x01]);
+}}
+
+// Decode a 20-byte status frame (official WMS-Data mapping)
+function parseStatus(frame) {{
+    const flags = frame[5];
+    return {{
+        softwareVersion: `${{frame[2]}}.${{frame[3]}}`,
+        tcpConnectionOk: (flags & 0x01) !== 0,
+        autoMode: (flags & 0x02) !== 0,
+        installationReleased: (flags & 0x04) !== 0,
+        manualMode: (flags & 0x08) !== 0,
+        nightMode: (flags & 0x10) !== 0,
+        moving: (flags & 0x20) !== 0,
+        powerOn: (flags & 0x40) !== 0,
+        trolleyCount: frame[6],
+        forkliftCount: frame[7],
+        alarmWord: frame.readUInt16LE(8),
+        lightingWord: frame.readUInt32LE(10),
+        aisleToOpen: frame[14],
+        lastOpenAisle: frame[15]
+    }};
+}}
+
+class WMSProductionClient {{
+    constructor({{ host = '{host}', port = {port}, pipelineDepth = 2, responseTimeoutMs = 5000,
+                  backoffInitialMs = 500, backoffMaxMs = 30000 }} = {{}}) {{
+        this.host = host;
+        this.port = port;
+        this.pipelineDepth = pipelineDepth;
+        this.responseTimeoutMs = responseTimeoutMs;
+        this.backoffInitialMs = backoffInitialMs;
+        this.backoffMaxMs = backoffMaxMs;
+        this.backoffMs = backoffInitialMs;
+        this.socket = null;
+        this.buffer = Buffer.alloc(0);
+        this.pending = [];   // in-flight requests, answered in order
+        this.waiting = [];   // requests waiting for a pipeline slot
+        this.stopped = false;
+    }}
+
+    connect() {{
+        const socket = net.createConnection({{ host: this.host, port: this.port }});
+        socket.setNoDelay(true);
+        socket.setKeepAlive(true, 10000);
+        socket.on('connect', () => {{
+            console.log(`Connected to ${{this.host}}:${{this.port}}`);
+            this.socket = socket;
+            this.backoffMs = this.backoffInitialMs;
+            this.pump();
+        }});
+        socket.on('data', (chunk) => this.onData(chunk));
+        socket.on('error', (err) => console.error('Connection error:', err.message));
+        socket.on('close', () => this.onClose());
+        return new Promise((resolve) => socket.once('connect', resolve));
+    }}
+
+    onData(chunk) {{
+        // TCP may deliver partial or multiple frames per chunk
+        this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+        while (this.buffer.length >= FRAME_SIZE) {{
+            const frame = Buffer.from(this.buffer.subarray(0, FRAME_SIZE));
+            this.buffer = this.buffer.subarray(FRAME_SIZE);
+            const request = this.pending.shift();
+            if (!request) continue;
+            clearTimeout(request.timer);
+            const latencyMs = Number(process.hrtime.bigint() - request.sent) / 1e6;
+            request.resolve({{ frame, status: parseStatus(frame), latencyMs }});
+        }}
+        this.pump();
+    }}
+
+    onClose() {{
+        // Framing is lost with the connection: fail everything in flight
+        this.socket = null;
+        this.buffer = Buffer.alloc(0);
+        for (const request of this.pending.concat(this.waiting)) {{
+            clearTimeout(request.timer);
+            request.reject(new Error('connection closed'));
+        }}
+        this.pending = [];
+        this.waiting = [];
+        if (this.stopped) return;
+
+        const delay = this.backoffMs * (0.5 + Math.random() / 2);
+        console.log(`Reconnecting in ${{(delay / 1000).toFixed(1)}}s`);
+        setTimeout(() => this.connect(), delay);
+        this.backoffMs = Math.min(this.backoffMs * 2, this.backoffMaxMs);
+    }}
+
+    pump() {{
+        while (this.socket && this.pending.length < this.pipelineDepth && this.waiting.length) {{
+            const request = this.waiting.shift();
+            request.sent = process.hrtime.bigint();
+            request.timer = setTimeout(() => this.socket && this.socket.destroy(new Error('response timeout')),
+                                       this.responseTimeoutMs);
+            this.pending.push(request);
+            this.socket.write(request.bytes);
+        }}
+    }}
+
+    request(bytes) {{
+        if (!this.socket) return Promise.reject(new Error('not connected'));
+        return new Promise((resolve, reject) => {{
+            this.waiting.push({{ bytes, resolve, reject }});
+            this.pump();
+        }});
+    }}
+
+    status() {{
+        return this.request(STATUS_REQUEST);
+    }}
+
+    openAisle(aisle) {{
+        return this.request(openAisleRequest(aisle));
+    }}
+
+    startPolling(intervalMs, onStatus) {{
+        return setInterval(() => {{
+            // Skip a tick instead of queueing unboundedly behind a slow controller
+            if (!this.socket || this.waiting.length >= this.pipelineDepth) return;
+            this.status().then(onStatus).catch((err) => console.error('Poll failed:', err.message));
+        }}, intervalMs);
+    }}
+
+    close() {{
+        this.stopped = true;
+        if (this.socket) this.socket.end();
+    }}
+}}
+
+// Usage example
+const client = new WMSProductionClient();
+client.connect();
+const poller = client.startPolling(1000, ({{ status, latencyMs }}) => {{
+    console.log(`${{latencyMs.toFixed(1)}} ms  auto=${{status.autoMode}} ` +
+                `alarms=0x${{status.alarmWord.toString(16)}} lighting=0x${{status.lightingWord.toString(16)}}`);
+}});
+
+process.on('SIGINT', () => {{
+    clearInterval(poller);
+    client.close();
+}});
+
+module.exports = {{ WMSProductionClient, parseStatus, openAisleRequest }};"""
+
+    def generate_benchmark_code(self, host: str, port: int) -> str:
+        library = self._production_library(host, port)
+        return f"""'use strict';
+// Stow WMS client benchmark
+// Times status requests through WMSProductionClient (the production client,
+// embedded below unchanged) and reports throughput and latency percentiles.
+// Point it at the PLC or a local simulator:
+//
+//     node stow_wms_benchmark.js [host] [port] [requests] [pipelineDepth]
+
+{library}
+const WARMUP = 50;
+
+function percentile(sorted, p) {{
+    const index = Math.min(sorted.length - 1, Math.max(0, Math.round(p / 100 * sorted.length) - 1));
+    return sorted[index];
+}}
+
+async function runBenchmark(host, port, requests, depth) {{
+    const total = WARMUP + requests;
+    const client = new WMSProductionClient({{ host, port, pipelineDepth: depth }});
+    await client.connect();
+
+    const latencies = [];
+    let issued = 0;
+    let start = process.hrtime.bigint();
+
+    // One caller per pipeline slot keeps the client's pipeline full
+    async function caller() {{
+        while (issued < total) {{
+            issued += 1;
+            const {{ latencyMs }} = await client.status();
+            latencies.push(latencyMs);
+            if (latencies.length === WARMUP) start = process.hrtime.bigint();
+        }}
+    }}
+    await Promise.all(Array.from({{ length: depth }}, caller));
+    const elapsed = Number(process.hrtime.bigint() - start) / 1e9;
+    client.close();
+
+    const measured = latencies.slice(WARMUP).sort((a, b) => a - b);
+    console.log(`Target:      ${{host}}:${{port}}  (pipeline depth ${{depth}})`);
+    console.log(`Requests:    ${{requests}} in ${{elapsed.toFixed(3)}} s`);
+    console.log(`Throughput:  ${{(requests / elapsed).toFixed(1)}} req/s`);
+    console.log('Latency ms:  ' + [50, 90, 99].map((p) => `p${{p}}=${{percentile(measured, p).toFixed(2)}}`).join('  ') +
+                `  max=${{measured[measured.length - 1].toFixed(2)}}`);
+}}
+
+const [host = '{host}', port = '{port}', requests = '1000', depth = '1'] = process.argv.slice(2);
+runBenchmark(host, Number(port), Number(requests), Number(depth)).catch((err) => {{
+    console.error('Benchmark failed:', err.message);
+    process.exitCode = 1;
+}});"""
+
+
 class CSharpGenerator(ProtocolGenerator):
     """C# TCP-IP communication code generator (based on Stow example)"""
     
@@ -231,6 +469,7 @@ class CSharpGenerator(ProtocolGenerator):
         super().__init__()
         self.language = "C#"
         self.file_extension = ".cs"
+        self.usage_marker = '    class Program'
     
     def generate_connection_code(self, host: str, port: int) -> str:
         return f"""using System;
@@ -481,6 +720,325 @@ namespace MobileCommTest
 // csc Program.cs
 // Program.exe"""
 
+    def generate_production_client(self, host: str, port: int) -> str:
+        return f"""// Stow WMS production client
+// One persistent connection, 20-byte framing over partial reads,
+// reconnect with exponential backoff and pipelined status polling.
+
+using System;
+using System.Collections.Concurrent;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Net.Sockets;
+using System.Threading;
+using System.Threading.Tasks;
+
+namespace StowWms
+{{
+    public sealed class WmsStatus
+    {{
+        public string SoftwareVersion {{ get; private set; }}
+        public bool TcpConnectionOk {{ get; private set; }}
+        public bool AutoMode {{ get; private set; }}
+        public bool InstallationReleased {{ get; private set; }}
+        public bool ManualMode {{ get; private set; }}
+        public bool NightMode {{ get; private set; }}
+        public bool Moving {{ get; private set; }}
+        public bool PowerOn {{ get; private set; }}
+        public int TrolleyCount {{ get; private set; }}
+        public int ForkliftCount {{ get; private set; }}
+        public ushort AlarmWord {{ get; private set; }}
+        public uint LightingWord {{ get; private set; }}
+        public int AisleToOpen {{ get; private set; }}
+        public int LastOpenAisle {{ get; private set; }}
+
+        // Decode a 20-byte status frame (official WMS-Data mapping, little-endian)
+        public static WmsStatus Parse(byte[] f)
+        {{
+            return new WmsStatus
+            {{
+                SoftwareVersion = $"{{f[2]}}.{{f[3]}}",
+                TcpConnectionOk = (f[5] & 0x01) != 0,
+                AutoMode = (f[5] & 0x02) != 0,
+                InstallationReleased = (f[5] & 0x04) != 0,
+                ManualMode = (f[5] & 0x08) != 0,
+                NightMode = (f[5] & 0x10) != 0,
+                Moving = (f[5] & 0x20) != 0,
+                PowerOn = (f[5] & 0x40) != 0,
+                TrolleyCount = f[6],
+                ForkliftCount = f[7],
+                AlarmWord = (ushort)(f[8] | (f[9] << 8)),
+                LightingWord = (uint)(f[10] | (f[11] << 8) | (f[12] << 16) | (f[13] << 24)),
+                AisleToOpen = f[14],
+                LastOpenAisle = f[15]
+            }};
+        }}
+    }}
+
+    public sealed class WmsProductionClient : IDisposable
+    {{
+        public const int FrameSize = 20;
+        static readonly byte[] StatusRequest = {{ 0x00, 0x02 }};
+
+        sealed class Pending
+        {{
+            public readonly TaskCompletionSource<(byte[] Frame, double LatencyMs)> Result =
+                new TaskCompletionSource<(byte[] Frame, double LatencyMs)>(TaskCreationOptions.RunContinuationsAsynchronously);
+            public long Sent;
+        }}
+
+        readonly string host;
+        readonly int port;
+        readonly int pipelineDepth;
+        readonly TimeSpan responseTimeout;
+        readonly TimeSpan backoffInitial = TimeSpan.FromMilliseconds(500);
+        readonly TimeSpan backoffMax = TimeSpan.FromSeconds(30);
+        readonly ConcurrentQueue<Pending> pending = new ConcurrentQueue<Pending>();
+        readonly SemaphoreSlim writeLock = new SemaphoreSlim(1, 1);
+        readonly Random random = new Random();
+        SemaphoreSlim slots;
+        TimeSpan backoff;
+        TcpClient client;
+        NetworkStream stream;
+
+        public WmsProductionClient(string host = "{host}", int port = {port}, int pipelineDepth = 2, int responseTimeoutMs = 5000)
+        {{
+            this.host = host;
+            this.port = port;
+            this.pipelineDepth = pipelineDepth;
+            this.responseTimeout = TimeSpan.FromMilliseconds(responseTimeoutMs);
+            this.backoff = backoffInitial;
+        }}
+
+        public bool IsConnected => stream != null;
+
+        public async Task ConnectAsync(CancellationToken ct)
+        {{
+            while (true)
+            {{
+                try
+                {{
+                    var tcp = new TcpClient {{ NoDelay = true }};
+                    tcp.Client.SetSocketOption(SocketOptionLevel.Socket, SocketOptionName.KeepAlive, true);
+                    await tcp.ConnectAsync(host, port);
+                    client = tcp;
+                    stream = tcp.GetStream();
+                    slots = new SemaphoreSlim(pipelineDepth, pipelineDepth);
+                    backoff = backoffInitial;
+                    Console.WriteLine($"Connected to {{host}}:{{port}}");
+                    _ = Task.Run(() => ReadLoopAsync(stream));
+                    return;
+                }}
+                catch (SocketException ex)
+                {{
+                    await BackoffAsync($"Connect failed ({{ex.Message}})", ct);
+                }}
+            }}
+        }}
+
+        async Task BackoffAsync(string reason, CancellationToken ct)
+        {{
+            var delay = TimeSpan.FromMilliseconds(backoff.TotalMilliseconds * (0.5 + random.NextDouble() / 2));
+            Console.WriteLine($"{{reason}}, retrying in {{delay.TotalSeconds:F1}}s");
+            await Task.Delay(delay, ct);
+            backoff = TimeSpan.FromMilliseconds(Math.Min(backoff.TotalMilliseconds * 2, backoffMax.TotalMilliseconds));
+        }}
+
+        async Task ReadLoopAsync(NetworkStream s)
+        {{
+            try
+            {{
+                while (true)
+                {{
+                    // ReadAsync may return a partial frame; keep reading until 20 bytes
+                    var frame = new byte[FrameSize];
+                    int filled = 0;
+                    while (filled < FrameSize)
+                    {{
+                        int n = await s.ReadAsync(frame, filled, FrameSize - filled);
+                        if (n == 0) throw new SocketException((int)SocketError.ConnectionReset);
+                        filled += n;
+                    }}
+                    if (pending.TryDequeue(out var request))
+                    {{
+                        slots.Release();
+                        double latencyMs = (Stopwatch.GetTimestamp() - request.Sent) * 1000.0 / Stopwatch.Frequency;
+                        request.Result.TrySetResult((frame, latencyMs));
+                    }}
+                }}
+            }}
+            catch (Exception ex)
+            {{
+                Fault(ex);
+            }}
+        }}
+
+        // Framing is lost with the connection: fail everything in flight
+        void Fault(Exception ex)
+        {{
+            stream = null;
+            client?.Dispose();
+            client = null;
+            while (pending.TryDequeue(out var request))
+                request.Result.TrySetException(ex);
+        }}
+
+        public async Task<(byte[] Frame, double LatencyMs)> RequestAsync(byte[] request, CancellationToken ct)
+        {{
+            var s = stream ?? throw new InvalidOperationException("Not connected");
+            await slots.WaitAsync(ct);
+            var entry = new Pending();
+            await writeLock.WaitAsync(ct);
+            try
+            {{
+                entry.Sent = Stopwatch.GetTimestamp();
+                pending.Enqueue(entry);
+                await s.WriteAsync(request, 0, request.Length, ct);
+            }}
+            catch (Exception ex)
+            {{
+                Fault(ex);
+                throw;
+            }}
+            finally
+            {{
+                writeLock.Release();
+            }}
+
+            var done = await Task.WhenAny(entry.Result.Task, Task.Delay(responseTimeout, ct));
+            if (done != entry.Result.Task)
+                Fault(new TimeoutException("No response within timeout"));
+            return await entry.Result.Task;
+        }}
+
+        public Task<(byte[] Frame, double LatencyMs)> StatusAsync(CancellationToken ct) => RequestAsync(StatusRequest, ct);
+
+        public Task<(byte[] Frame, double LatencyMs)> OpenAisleAsync(int aisle, CancellationToken ct)
+        {{
+            if (aisle < 1 || aisle > 19) throw new ArgumentOutOfRangeException(nameof(aisle));
+            return RequestAsync(new byte[] {{ (byte)aisle, 0x01 }}, ct);
+        }}
+
+        // Keep up to pipelineDepth status requests in flight; reconnect on any error
+        public async Task PollAsync(TimeSpan interval, Action<WmsStatus, double> onStatus, CancellationToken ct)
+        {{
+            while (!ct.IsCancellationRequested)
+            {{
+                await ConnectAsync(ct);
+                var window = new Queue<Task<(byte[] Frame, double LatencyMs)>>();
+                try
+                {{
+                    while (IsConnected && !ct.IsCancellationRequested)
+                    {{
+                        window.Enqueue(StatusAsync(ct));
+                        if (window.Count >= pipelineDepth)
+                        {{
+                            var (frame, latencyMs) = await window.Dequeue();
+                            onStatus(WmsStatus.Parse(frame), latencyMs);
+                        }}
+                        if (interval > TimeSpan.Zero)
+                            await Task.Delay(interval, ct);
+                    }}
+                }}
+                catch (Exception ex) when (!(ex is OperationCanceledException))
+                {{
+                    Fault(ex);
+                    await BackoffAsync($"Connection lost ({{ex.Message}})", ct);
+                }}
+            }}
+        }}
+
+        public void Dispose() => Fault(new ObjectDisposedException(nameof(WmsProductionClient)));
+    }}
+
+    class Program
+    {{
+        static async Task Main()
+        {{
+            using var cts = new CancellationTokenSource();
+            Console.CancelKeyPress += (s, e) => {{ e.Cancel = true; cts.Cancel(); }};
+            using var client = new WmsProductionClient();
+            try
+            {{
+                await client.PollAsync(TimeSpan.FromSeconds(1), (status, latencyMs) =>
+                    Console.WriteLine($"{{latencyMs:F1}} ms  auto={{status.AutoMode}} alarms=0x{{status.AlarmWord:X4}} lighting=0x{{status.LightingWord:X8}}"),
+                    cts.Token);
+            }}
+            catch (OperationCanceledException)
+            {{
+            }}
+        }}
+    }}
+}}"""
+
+    def generate_benchmark_code(self, host: str, port: int) -> str:
+        library = self._production_library(host, port)
+        return f"""// Stow WMS client benchmark
+// Times status requests through WmsProductionClient (the production client,
+// embedded below unchanged) and reports throughput and latency percentiles.
+// Point it at the PLC or a local simulator:
+//
+//     dotnet run -- [host] [port] [requests] [pipelineDepth]
+
+{library}
+    class Benchmark
+    {{
+        const int Warmup = 50;
+
+        static double Percentile(List<double> sorted, double p)
+        {{
+            int index = Math.Min(sorted.Count - 1, Math.Max(0, (int)Math.Round(p / 100 * sorted.Count) - 1));
+            return sorted[index];
+        }}
+
+        static async Task Main(string[] args)
+        {{
+            string host = args.Length > 0 ? args[0] : "{host}";
+            int port = args.Length > 1 ? int.Parse(args[1]) : {port};
+            int requests = args.Length > 2 ? int.Parse(args[2]) : 1000;
+            int depth = args.Length > 3 ? int.Parse(args[3]) : 1;
+            int total = Warmup + requests;
+
+            using var client = new WmsProductionClient(host, port, depth);
+            await client.ConnectAsync(CancellationToken.None);
+
+            var latencies = new List<double>(total);
+            var gate = new object();
+            int issued = 0;
+            long start = Stopwatch.GetTimestamp();
+
+            // One caller per pipeline slot keeps the client's pipeline full
+            async Task Caller()
+            {{
+                while (Interlocked.Increment(ref issued) <= total)
+                {{
+                    var (frame, latencyMs) = await client.StatusAsync(CancellationToken.None);
+                    WmsStatus.Parse(frame);
+                    lock (gate)
+                    {{
+                        latencies.Add(latencyMs);
+                        if (latencies.Count == Warmup) start = Stopwatch.GetTimestamp();
+                    }}
+                }}
+            }}
+            var callers = new Task[depth];
+            for (int i = 0; i < depth; i++)
+                callers[i] = Caller();
+            await Task.WhenAll(callers);
+            double elapsed = (Stopwatch.GetTimestamp() - start) / (double)Stopwatch.Frequency;
+
+            var measured = latencies.GetRange(Warmup, requests);
+            measured.Sort();
+            Console.WriteLine($"Target:      {{host}}:{{port}}  (pipeline depth {{depth}})");
+            Console.WriteLine($"Requests:    {{requests}} in {{elapsed:F3}} s");
+            Console.WriteLine($"Throughput:  {{requests / elapsed:F1}} req/s");
+            Console.WriteLine($"Latency ms:  p50={{Percentile(measured, 50):F2}}  p90={{Percentile(measured, 90):F2}}  " +
+                              $"p99={{Percentile(measured, 99):F2}}  max={{measured[measured.Count - 1]:F2}}");
+        }}
+    }}
+}}"""
+
+
 class RubyGenerator(ProtocolGenerator):
     """Ruby TCP-IP communication code generator"""
     
@@ -488,6 +1046,7 @@ class RubyGenerator(ProtocolGenerator):
         super().__init__()
         self.language = "Ruby"
         self.file_extension = ".rb"
+        self.usage_marker = '# Usage example'
     
     def generate_connection_code(self, host: str, port: int) -> str:
         return f"""require 'socket'
@@ -623,6 +1182,213 @@ if wms.connect
   wms.disconnect
 end"""
 
+    def generate_production_client(self, host: str, port: int) -> str:
+        return f"""# Stow WMS production client
+# One persistent connection, 20-byte framing over partial reads,
+# reconnect with exponential backoff and pipelined status polling.
+
+require 'socket'
+
+FRAME_SIZE = 20
+STATUS_REQUEST = [0x00, 0x02].pack('C*')
+
+def open_aisle_request(aisle)
+  raise ArgumentError, 'aisle must be between 1 and 19' unless (1..19).cover?(aisle)
+  [aisle, 0x01].pack('C*')
+end
+
+# Decode a 20-byte status frame (official WMS-Data mapping)
+def parse_status(frame)
+  b = frame.bytes
+  {{
+    software_version: "#{{b[2]}}.#{{b[3]}}",
+    tcp_connection_ok: b[5] & 0x01 != 0,
+    auto_mode: b[5] & 0x02 != 0,
+    installation_released: b[5] & 0x04 != 0,
+    manual_mode: b[5] & 0x08 != 0,
+    night_mode: b[5] & 0x10 != 0,
+    moving: b[5] & 0x20 != 0,
+    power_on: b[5] & 0x40 != 0,
+    trolley_count: b[6],
+    forklift_count: b[7],
+    alarm_word: frame.byteslice(8, 2).unpack1('S<'),
+    lighting_word: frame.byteslice(10, 4).unpack1('L<'),
+    aisle_to_open: b[14],
+    last_open_aisle: b[15]
+  }}
+end
+
+class WMSProductionClient
+  def initialize(host: '{host}', port: {port}, pipeline_depth: 2, response_timeout: 5.0,
+                 backoff_initial: 0.5, backoff_max: 30.0)
+    @host = host
+    @port = port
+    @pipeline_depth = pipeline_depth
+    @response_timeout = response_timeout
+    @backoff_initial = backoff_initial
+    @backoff_max = backoff_max
+    @backoff = backoff_initial
+    @socket = nil
+    @buffer = String.new(encoding: Encoding::BINARY)
+    @pending = []          # [label, send time] of in-flight requests, in order
+    @commands = Queue.new  # open-aisle requests from other threads
+  end
+
+  def connect
+    loop do
+      begin
+        socket = Socket.tcp(@host, @port, connect_timeout: @response_timeout)
+        socket.setsockopt(Socket::IPPROTO_TCP, Socket::TCP_NODELAY, 1)
+        socket.setsockopt(Socket::SOL_SOCKET, Socket::SO_KEEPALIVE, true)
+        @socket = socket
+        @buffer.clear
+        @pending.clear
+        @backoff = @backoff_initial
+        puts "Connected to #{{@host}}:#{{@port}}"
+        return
+      rescue SystemCallError, SocketError, IOError => e
+        backoff_sleep("Connect failed (#{{e.message}})")
+      end
+    end
+  end
+
+  def close
+    @socket&.close
+    @socket = nil
+  end
+
+  def open_aisle(aisle)
+    @commands << open_aisle_request(aisle)
+  end
+
+  def read_frame
+    while @buffer.bytesize < FRAME_SIZE
+      raise IOError, 'response timeout' unless @socket.wait_readable(@response_timeout)
+      @buffer << @socket.readpartial(4096)  # partial or multiple frames
+    end
+    frame = @buffer.byteslice(0, FRAME_SIZE)
+    @buffer = @buffer.byteslice(FRAME_SIZE..-1)
+    label, sent = @pending.shift
+    [label, frame, Process.clock_gettime(Process::CLOCK_MONOTONIC) - sent]
+  end
+
+  def poll_forever(interval: 1.0)
+    next_send = now
+    loop do
+      begin
+        if @socket.nil?
+          connect
+          next_send = now
+        end
+
+        send_request('command', @commands.pop(true)) while @pending.size < @pipeline_depth && !@commands.empty?
+        while @pending.size < @pipeline_depth && now >= next_send
+          send_request('status', STATUS_REQUEST)
+          next_send = [next_send + interval, now].max
+        end
+
+        if @pending.empty?
+          sleep([[next_send - now, 0].max, 0.05].min)
+        else
+          label, frame, latency = read_frame
+          on_status(label, parse_status(frame), latency)
+        end
+      rescue SystemCallError, IOError, EOFError => e
+        # Framing is lost with the connection: drop in-flight requests and reconnect
+        close
+        backoff_sleep("Connection lost (#{{e.message}})")
+      end
+    end
+  end
+
+  def send_request(label, bytes)
+    @socket.write(bytes)
+    @pending << [label, now]
+  end
+
+  private
+
+  def now
+    Process.clock_gettime(Process::CLOCK_MONOTONIC)
+  end
+
+  def backoff_sleep(reason)
+    delay = @backoff * (0.5 + rand / 2)
+    puts "#{{reason}}, retrying in #{{delay.round(1)}}s"
+    sleep(delay)
+    @backoff = [@backoff * 2, @backoff_max].min
+  end
+
+  def on_status(label, status, latency)
+    puts format('[%s] %.1f ms  auto=%s alarms=0x%04X lighting=0x%08X',
+                label, latency * 1000, status[:auto_mode], status[:alarm_word], status[:lighting_word])
+  end
+end
+
+# Usage example
+if __FILE__ == $PROGRAM_NAME
+  client = WMSProductionClient.new
+  begin
+    client.poll_forever(interval: 1.0)
+  rescue Interrupt
+    client.close
+  end
+end"""
+
+    def generate_benchmark_code(self, host: str, port: int) -> str:
+        library = self._production_library(host, port)
+        return f"""# Stow WMS client benchmark
+# Times status requests through WMSProductionClient (the production client,
+# embedded below unchanged) and reports throughput and latency percentiles.
+# Point it at the PLC or a local simulator:
+#
+#     ruby stow_wms_benchmark.rb [host] [port] [requests] [pipeline_depth]
+
+{library}
+WARMUP = 50
+
+def clock
+  Process.clock_gettime(Process::CLOCK_MONOTONIC)
+end
+
+def percentile(sorted, p)
+  index = [[(p / 100.0 * sorted.size).round - 1, 0].max, sorted.size - 1].min
+  sorted[index]
+end
+
+host = ARGV[0] || '{host}'
+port = (ARGV[1] || {port}).to_i
+requests = (ARGV[2] || 1000).to_i
+depth = (ARGV[3] || 1).to_i
+total = WARMUP + requests
+
+client = WMSProductionClient.new(host: host, port: port, pipeline_depth: depth)
+client.connect
+latencies = []
+sent = 0
+start = clock
+
+while latencies.size < total
+  while sent < total && sent - latencies.size < depth
+    client.send_request('status', STATUS_REQUEST)
+    sent += 1
+  end
+  _label, frame, latency = client.read_frame
+  parse_status(frame)
+  latencies << latency
+  start = clock if latencies.size == WARMUP
+end
+elapsed = clock - start
+client.close
+
+measured = latencies.drop(WARMUP).sort
+puts "Target:      #{{host}}:#{{port}}  (pipeline depth #{{depth}})"
+puts format('Requests:    %d in %.3f s', requests, elapsed)
+puts format('Throughput:  %.1f req/s', requests / elapsed)
+puts 'Latency ms:  ' + [50, 90, 99].map {{ |p| format('p%d=%.2f', p, percentile(measured, p) * 1000) }}.join('  ') +
+     format('  max=%.2f', measured.last * 1000)"""
+
+
 class JavaScriptGenerator(ProtocolGenerator):
     """JavaScript (Browser) WebSocket proxy code generator"""
     
@@ -630,6 +1396,7 @@ class JavaScriptGenerator(ProtocolGenerator):
         super().__init__()
         self.language = "JavaScript"
         self.file_extension = ".js"
+        self.usage_marker = '// Start when page loads'
     
     def generate_connection_code(self, host: str, port: int) -> str:
         return f"""// Note: Direct TCP from browser requires WebSocket proxy
@@ -848,6 +1615,190 @@ async function main() {{
 // Start when page loads
 window.addEventListener('load', main);"""
 
+    def generate_production_client(self, host: str, port: int) -> str:
+        return f"""// Stow WMS production client for the browser (requires WebSocket-to-TCP proxy)
+// One persistent WebSocket, 20-byte framing over partial chunks,
+// reconnect with exponential backoff and pipelined status polling.
+
+const FRAME_SIZE = 20;
+const STATUS_REQUEST = [0x00, 0x02];
+
+// Decode a 20-byte status frame (official WMS-Data mapping)
+function parseStatus(frame) {{
+    const view = new DataView(frame.buffer, frame.byteOffset, FRAME_SIZE);
+    const flags = frame[5];
+    return {{
+        softwareVersion: `${{frame[2]}}.${{frame[3]}}`,
+        autoMode: (flags & 0x02) !== 0,
+        manualMode: (flags & 0x08) !== 0,
+        moving: (flags & 0x20) !== 0,
+        powerOn: (flags & 0x40) !== 0,
+        trolleyCount: frame[6],
+        forkliftCount: frame[7],
+        alarmWord: view.getUint16(8, true),
+        lightingWord: view.getUint32(10, true),
+        aisleToOpen: frame[14],
+        lastOpenAisle: frame[15]
+    }};
+}}
+
+class WMSProductionWebClient {{
+    constructor({{ proxyUrl = 'ws://localhost:8080/wms-proxy', host = '{host}', port = {port},
+                  pipelineDepth = 2, responseTimeoutMs = 5000, backoffInitialMs = 500, backoffMaxMs = 30000 }} = {{}}) {{
+        Object.assign(this, {{ proxyUrl, host, port, pipelineDepth, responseTimeoutMs, backoffInitialMs, backoffMaxMs }});
+        this.backoffMs = backoffInitialMs;
+        this.ws = null;
+        this.ready = false;
+        this.buffer = new Uint8Array(0);
+        this.pending = [];
+        this.stopped = false;
+    }}
+
+    connect() {{
+        const ws = new WebSocket(this.proxyUrl);
+        ws.onopen = () => {{
+            ws.send(JSON.stringify({{ action: 'connect', host: this.host, port: this.port }}));
+            this.ws = ws;
+            this.ready = true;
+            this.backoffMs = this.backoffInitialMs;
+            console.log('Connected via proxy');
+        }};
+        ws.onmessage = (event) => {{
+            const message = JSON.parse(event.data);
+            if (message.type === 'response' && message.data) this.onData(new Uint8Array(message.data));
+        }};
+        ws.onerror = (error) => console.error('WebSocket error:', error);
+        ws.onclose = () => this.onClose();
+        return new Promise((resolve) => ws.addEventListener('open', () => resolve(), {{ once: true }}));
+    }}
+
+    onData(chunk) {{
+        // The proxy forwards TCP chunks as-is: reassemble 20-byte frames
+        const merged = new Uint8Array(this.buffer.length + chunk.length);
+        merged.set(this.buffer);
+        merged.set(chunk, this.buffer.length);
+        this.buffer = merged;
+        while (this.buffer.length >= FRAME_SIZE) {{
+            const frame = this.buffer.slice(0, FRAME_SIZE);
+            this.buffer = this.buffer.slice(FRAME_SIZE);
+            const request = this.pending.shift();
+            if (!request) continue;
+            clearTimeout(request.timer);
+            request.resolve({{ frame, status: parseStatus(frame), latencyMs: performance.now() - request.sent }});
+        }}
+    }}
+
+    onClose() {{
+        this.ws = null;
+        this.ready = false;
+        this.buffer = new Uint8Array(0);
+        this.pending.forEach((request) => {{ clearTimeout(request.timer); request.reject(new Error('connection closed')); }});
+        this.pending = [];
+        if (this.stopped) return;
+
+        const delay = this.backoffMs * (0.5 + Math.random() / 2);
+        setTimeout(() => this.connect(), delay);
+        this.backoffMs = Math.min(this.backoffMs * 2, this.backoffMaxMs);
+    }}
+
+    request(bytes) {{
+        if (!this.ready) return Promise.reject(new Error('not connected'));
+        if (this.pending.length >= this.pipelineDepth) return Promise.reject(new Error('pipeline full'));
+        return new Promise((resolve, reject) => {{
+            const request = {{ resolve, reject, sent: performance.now() }};
+            request.timer = setTimeout(() => this.ws && this.ws.close(), this.responseTimeoutMs);
+            this.pending.push(request);
+            this.ws.send(JSON.stringify({{ action: 'send_bytes', data: bytes }}));
+        }});
+    }}
+
+    status() {{
+        return this.request(STATUS_REQUEST);
+    }}
+
+    openAisle(aisle) {{
+        if (aisle < 1 || aisle > 19) return Promise.reject(new RangeError('aisle must be between 1 and 19'));
+        return this.request([aisle, 0x01]);
+    }}
+
+    startPolling(intervalMs, onStatus) {{
+        return setInterval(() => {{
+            if (!this.ready || this.pending.length >= this.pipelineDepth) return;
+            this.status().then(onStatus).catch((err) => console.warn('Poll failed:', err.message));
+        }}, intervalMs);
+    }}
+
+    close() {{
+        this.stopped = true;
+        if (this.ws) this.ws.close();
+    }}
+}}
+
+// Start when page loads
+window.addEventListener('load', () => {{
+    const client = new WMSProductionWebClient();
+    client.connect();
+    client.startPolling(1000, ({{ status, latencyMs }}) => {{
+        console.log(`${{latencyMs.toFixed(1)}} ms`, status);
+    }});
+}});"""
+
+    def generate_benchmark_code(self, host: str, port: int) -> str:
+        library = self._production_library(host, port)
+        return f"""// Stow WMS client benchmark for the browser (requires WebSocket-to-TCP proxy)
+// Times status requests through WMSProductionWebClient (the production
+// client, embedded below unchanged) and reports throughput and latency
+// percentiles. Options come from the page URL, e.g.
+//     benchmark.html?proxy=ws://localhost:8080/wms-proxy&requests=1000&depth=1
+
+{library}
+const WARMUP = 50;
+
+function percentile(sorted, p) {{
+    const index = Math.min(sorted.length - 1, Math.max(0, Math.round(p / 100 * sorted.length) - 1));
+    return sorted[index];
+}}
+
+async function runBenchmark() {{
+    const params = new URLSearchParams(window.location.search);
+    const proxyUrl = params.get('proxy') || 'ws://localhost:8080/wms-proxy';
+    const host = params.get('host') || '{host}';
+    const port = Number(params.get('port') || {port});
+    const requests = Number(params.get('requests') || 1000);
+    const depth = Number(params.get('depth') || 1);
+    const total = WARMUP + requests;
+
+    const client = new WMSProductionWebClient({{ proxyUrl, host, port, pipelineDepth: depth }});
+    await client.connect();
+
+    const latencies = [];
+    let issued = 0;
+    let start = performance.now();
+
+    // One caller per pipeline slot keeps the client's pipeline full
+    async function caller() {{
+        while (issued < total) {{
+            issued += 1;
+            const {{ latencyMs }} = await client.status();
+            latencies.push(latencyMs);
+            if (latencies.length === WARMUP) start = performance.now();
+        }}
+    }}
+    await Promise.all(Array.from({{ length: depth }}, caller));
+    const elapsed = (performance.now() - start) / 1000;
+    client.close();
+
+    const measured = latencies.slice(WARMUP).sort((a, b) => a - b);
+    console.log(`Target:      ${{host}}:${{port}} via ${{proxyUrl}}  (pipeline depth ${{depth}})`);
+    console.log(`Requests:    ${{requests}} in ${{elapsed.toFixed(3)}} s`);
+    console.log(`Throughput:  ${{(requests / elapsed).toFixed(1)}} req/s`);
+    console.log('Latency ms:  ' + [50, 90, 99].map((p) => `p${{p}}=${{percentile(measured, p).toFixed(2)}}`).join('  ') +
+                `  max=${{measured[measured.length - 1].toFixed(2)}}`);
+}}
+
+window.addEventListener('load', () => runBenchmark().catch((err) => console.error('Benchmark failed:', err.message)));"""
+
+
 class PythonGenerator(ProtocolGenerator):
     """Python TCP-IP communication code generator"""
     
@@ -855,6 +1806,7 @@ class PythonGenerator(ProtocolGenerator):
         super().__init__()
         self.language = "Python"
         self.file_extension = ".py"
+        self.usage_marker = 'if __name__ == "__main__":'
     
     def generate_complete_example(self, host: str, port: int) -> str:
         return f"""import socket
@@ -959,6 +1911,214 @@ if __name__ == "__main__":
         
         wms.disconnect()"""
 
+    def generate_production_client(self, host: str, port: int) -> str:
+        return f"""\"\"\"
+Stow WMS production client
+One persistent connection, 20-byte framing over partial reads,
+reconnect with exponential backoff and pipelined status polling.
+\"\"\"
+
+import collections
+import queue
+import random
+import socket
+import time
+
+HOST = '{host}'
+PORT = {port}
+FRAME_SIZE = 20
+STATUS_REQUEST = bytes([0x00, 0x02])
+
+
+def open_aisle_request(aisle):
+    \"\"\"Open aisle request: (aisle, 1)\"\"\"
+    if not 1 <= aisle <= 19:
+        raise ValueError("aisle must be between 1 and 19")
+    return bytes([aisle, 0x01])
+
+
+def parse_status(frame):
+    \"\"\"Decode a 20-byte status frame (official WMS-Data mapping)\"\"\"
+    return {{
+        'software_version': f"{{frame[2]}}.{{frame[3]}}",
+        'tcp_connection_ok': bool(frame[5] & 0x01),
+        'auto_mode': bool(frame[5] & 0x02),
+        'installation_released': bool(frame[5] & 0x04),
+        'manual_mode': bool(frame[5] & 0x08),
+        'night_mode': bool(frame[5] & 0x10),
+        'moving': bool(frame[5] & 0x20),
+        'power_on': bool(frame[5] & 0x40),
+        'trolley_count': frame[6],
+        'forklift_count': frame[7],
+        'alarm_word': frame[8] | (frame[9] << 8),
+        'lighting_word': int.from_bytes(frame[10:14], 'little'),
+        'aisle_to_open': frame[14],
+        'last_open_aisle': frame[15],
+    }}
+
+
+class WMSProductionClient:
+    def __init__(self, host=HOST, port=PORT, pipeline_depth=2, response_timeout=5.0,
+                 backoff_initial=0.5, backoff_max=30.0):
+        self.host = host
+        self.port = port
+        self.pipeline_depth = pipeline_depth
+        self.response_timeout = response_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff = backoff_initial
+        self.sock = None
+        self.buffer = bytearray()
+        self.pending = collections.deque()  # (label, send time) of in-flight requests, in order
+        self.commands = queue.Queue()       # open-aisle requests from other threads
+
+    def connect(self):
+        \"\"\"Connect, retrying with jittered exponential backoff\"\"\"
+        while True:
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=self.response_timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                sock.settimeout(self.response_timeout)
+                self.sock = sock
+                self.buffer.clear()
+                self.pending.clear()
+                self.backoff = self.backoff_initial
+                print(f"Connected to {{self.host}}:{{self.port}}")
+                return
+            except OSError as e:
+                delay = self.backoff * random.uniform(0.5, 1.0)
+                print(f"Connect failed ({{e}}), retrying in {{delay:.1f}}s")
+                time.sleep(delay)
+                self.backoff = min(self.backoff * 2, self.backoff_max)
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def send(self, label, request):
+        self.sock.sendall(request)
+        self.pending.append((label, time.perf_counter()))
+
+    def read_frame(self):
+        \"\"\"Return (label, frame, latency) for the oldest in-flight request\"\"\"
+        while len(self.buffer) < FRAME_SIZE:
+            chunk = self.sock.recv(4096)  # may return a partial frame or several frames
+            if not chunk:
+                raise ConnectionError("connection closed by controller")
+            self.buffer.extend(chunk)
+        frame = bytes(self.buffer[:FRAME_SIZE])
+        del self.buffer[:FRAME_SIZE]
+        label, sent = self.pending.popleft()
+        return label, frame, time.perf_counter() - sent
+
+    def open_aisle(self, aisle):
+        \"\"\"Queue an open-aisle command (thread-safe); sent on the polling connection\"\"\"
+        self.commands.put(open_aisle_request(aisle))
+
+    def on_status(self, label, status, latency):
+        print(f"[{{label}}] {{latency * 1000:.1f}} ms  auto={{status['auto_mode']}} "
+              f"alarms=0x{{status['alarm_word']:04X}} lighting=0x{{status['lighting_word']:08X}}")
+
+    def poll_forever(self, interval=1.0):
+        \"\"\"Keep up to pipeline_depth requests in flight; reconnect on any error\"\"\"
+        next_send = time.monotonic()
+        while True:
+            try:
+                if self.sock is None:
+                    self.connect()
+                    next_send = time.monotonic()
+
+                now = time.monotonic()
+                while len(self.pending) < self.pipeline_depth and not self.commands.empty():
+                    self.send("command", self.commands.get_nowait())
+                while len(self.pending) < self.pipeline_depth and now >= next_send:
+                    self.send("status", STATUS_REQUEST)
+                    next_send = max(next_send + interval, now)
+
+                if self.pending:
+                    label, frame, latency = self.read_frame()
+                    self.on_status(label, parse_status(frame), latency)
+                else:
+                    time.sleep(min(0.05, max(0.0, next_send - time.monotonic())))
+            except (OSError, ConnectionError) as e:
+                # Framing is lost with the connection: drop in-flight requests and reconnect
+                print(f"Connection lost ({{e}}), reconnecting")
+                self.close()
+                delay = self.backoff * random.uniform(0.5, 1.0)
+                time.sleep(delay)
+                self.backoff = min(self.backoff * 2, self.backoff_max)
+
+
+if __name__ == "__main__":
+    client = WMSProductionClient()
+    try:
+        client.poll_forever(interval=1.0)
+    except KeyboardInterrupt:
+        client.close()"""
+
+    def generate_benchmark_code(self, host: str, port: int) -> str:
+        library = self._production_library(host, port)
+        return f"""\"\"\"
+Stow WMS client benchmark
+Times status requests through WMSProductionClient (the production client,
+embedded below unchanged) and reports throughput and latency percentiles.
+Point it at the PLC or a local simulator:
+
+    python stow_wms_benchmark.py [host] [port] [requests] [pipeline_depth]
+\"\"\"
+
+import sys
+
+{library}
+
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run(host, port, requests, depth, warmup=50):
+    client = WMSProductionClient(host, port, pipeline_depth=depth)
+    client.connect()
+    latencies = []
+    sent = 0
+    total = warmup + requests
+
+    start = time.perf_counter()
+    while len(latencies) < total:
+        while sent < total and sent - len(latencies) < depth:
+            client.send("status", STATUS_REQUEST)
+            sent += 1
+        _, frame, latency = client.read_frame()
+        parse_status(frame)
+        latencies.append(latency)
+        if len(latencies) == warmup:
+            start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    measured = sorted(latencies[warmup:])
+    print(f"Target:      {{host}}:{{port}}  (pipeline depth {{depth}})")
+    print(f"Requests:    {{requests}} in {{elapsed:.3f}} s")
+    print(f"Throughput:  {{requests / elapsed:.1f}} req/s")
+    print("Latency ms:  " + "  ".join(
+        f"p{{p}}={{percentile(measured, p) * 1000:.2f}}" for p in (50, 90, 99)
+    ) + f"  max={{measured[-1] * 1000:.2f}}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(
+        host=args[0] if len(args) > 0 else '{host}',
+        port=int(args[1]) if len(args) > 1 else {port},
+        requests=int(args[2]) if len(args) > 2 else 1000,
+        depth=int(args[3]) if len(args) > 3 else 1,
+    )"""
+
 # Protocol generator factory
 PROTOCOL_GENERATORS = {
     "Node.js": NodeJSGenerator(),
@@ -968,12 +2128,27 @@ PROTOCOL_GENERATORS = {
     "Python": PythonGenerator()
 }
 
+# Code types offered by generate_protocol_code (value = UI label)
+CODE_TYPES = {
+    "complete": "Complete Example",
+    "connection": "Connection Only",
+    "command": "Send Command",
+    "parsing": "Parse Response",
+    "production": "Production Client",
+    "benchmark": "Benchmark Harness"
+}
+
 def get_available_languages():
     """Get list of available programming languages"""
     return list(PROTOCOL_GENERATORS.keys())
 
-def generate_protocol_code(language: str, code_type: str, host: str = "1.1.1.2", port: int = 2000, command: int = 0) -> str:
-    """Generate protocol code for specified language and type"""
+def get_code_types() -> Dict[str, str]:
+    """Get supported code types mapped to their display labels"""
+    return dict(CODE_TYPES)
+
+@lru_cache(maxsize=256)
+def _render_protocol_code(language: str, code_type: str, host: str, port: int, command: int) -> str:
+    """Render one template; memoized because the Streamlit page regenerates on every click"""
     if language not in PROTOCOL_GENERATORS:
         return f"Language '{language}' not supported"
     
@@ -988,11 +2163,59 @@ def generate_protocol_code(language: str, code_type: str, host: str = "1.1.1.2",
             return generator.generate_parsing_code()
         elif code_type == "complete":
             return generator.generate_complete_example(host, port)
+        elif code_type == "production":
+            return generator.generate_production_client(host, port)
+        elif code_type == "benchmark":
+            return generator.generate_benchmark_code(host, port)
         else:
             return f"Code type '{code_type}' not supported"
     except Exception as e:
         return f"Error generating code: {e}"
 
+def generate_protocol_code(language: str, code_type: str, host: str = "1.1.1.2", port: int = 2000, command: int = 0) -> str:
+    """Generate protocol code for specified language and type (cached per argument set)"""
+    # Only the command template uses the command code; normalising it keeps
+    # one cache entry per (language, type, host, port) for the other types
+    if code_type != "command":
+        command = 0
+    return _render_protocol_code(language, code_type, str(host), int(port), int(command))
+
+def get_bundle_file_name(language: str) -> str:
+    """File name used for a language inside the bulk export zip"""
+    slug = re.sub(r"[^a-z0-9]", "", language.lower().replace("#", "sharp"))
+    return f"stow_wms_client_{slug}{get_file_extension(language)}"
+
+def generate_protocol_bundle(code_type: str = "complete", host: str = "1.1.1.2", port: int = 2000, command: int = 0) -> bytes:
+    """
+    Generate the code for every available language as one zip archive
+    
+    Built once per (code_type, host, port, command) and reused on every
+    rerun; the command code only counts for the "command" type.
+    
+    Args:
+        code_type (str): Code type (see get_code_types)
+        host (str): Controller IP address
+        port (int): Controller TCP port
+        command (int): Command code for the "command" type
+    
+    Returns:
+        bytes: Zip archive with one file per language
+    """
+    if code_type != "command":
+        command = 0
+    return _build_protocol_bundle(code_type, str(host), int(port), int(command))
+
+@lru_cache(maxsize=32)
+def _build_protocol_bundle(code_type: str, host: str, port: int, command: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for language in get_available_languages():
+            archive.writestr(
+                get_bundle_file_name(language),
+                generate_protocol_code(language, code_type, host, port, command)
+            )
+    return buffer.getvalue()
+
 def get_file_extension(language: str) -> str:
     """Get file extension for specified language"""
     if language in PROTOCOL_GENERATORS:
@@ -3,81 +3,246 @@ TCP-IP Client for Mobile Racking communication
 Based on WMS protocol specification
 """
 
+import os
 import socket
-import struct
+import sys
+import threading
 import time
-from typing import Optional, Tuple, Dict, Any
+from typing import List, Mapping, Optional, Sequence, Tuple, Dict, Any
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+from utils.event_log import EventLogWriter, EventOutcome
+from utils.frame_cache import COUNTER_BYTE, FrameInterner, frame_key
+from utils.metrics import metrics
+from wms_codec import (FixedFrameDecoder, Framing, LegacyFrameDecoder, encode_command,
+                       encode_legacy_open_aisle)
+from wms_negotiation import race_connect
+from wms_protocol import STATUS_FRAME_SIZE, decode_status_frame
+
 logger = logging.getLogger(__name__)
 
+_connection_lock = threading.Lock()
+
+# TCP keepalive: a dead peer is detected after roughly
+# idle + interval * count seconds (11 s by default) instead of at the next
+# command's response timeout. Tuned for the VPN link to the PLC.
+KEEPALIVE_IDLE = int(os.getenv("WMS_KEEPALIVE_IDLE", "5"))
+KEEPALIVE_INTERVAL = int(os.getenv("WMS_KEEPALIVE_INTERVAL", "2"))
+KEEPALIVE_COUNT = int(os.getenv("WMS_KEEPALIVE_COUNT", "3"))
+
+# Distinct status frames whose decoded form is kept (see intern_status_frame)
+STATUS_INTERN_SIZE = int(os.getenv("WMS_STATUS_INTERN_SIZE", "1024"))
+
+def configure_socket(sock: socket.socket, idle: int = KEEPALIVE_IDLE,
+                     interval: int = KEEPALIVE_INTERVAL, count: int = KEEPALIVE_COUNT):
+    """
+    Apply TCP_NODELAY and keepalive settings to a client socket
+    
+    Options the platform does not support are skipped.
+    
+    Args:
+        sock (socket.socket): Socket to configure (before or after connect)
+        idle (int): Seconds of silence before the first probe
+        interval (int): Seconds between unanswered probes
+        count (int): Unanswered probes before the connection is dropped
+    """
+    # 2-byte requests must go out immediately, not wait for Nagle coalescing
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    
+    if sys.platform == "win32" and hasattr(socket, "SIO_KEEPALIVE_VALS"):
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
+        return
+    
+    idle_option = getattr(socket, "TCP_KEEPIDLE", None) or getattr(socket, "TCP_KEEPALIVE", None)
+    for option, value in ((idle_option, idle),
+                          (getattr(socket, "TCP_KEEPINTVL", None), interval),
+                          (getattr(socket, "TCP_KEEPCNT", None), count)):
+        if option is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, option, value)
+    
+    # Linux: also drop the connection when sent data stays unacknowledged
+    if hasattr(socket, "TCP_USER_TIMEOUT"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, (idle + interval * count) * 1000)
+
 class TCPClient:
     """TCP-IP client for communication with Mobile Racking system"""
     
-    def __init__(self, host: str = "1.1.1.2", port: int = 2000):
+    def __init__(self, host: str = "1.1.1.2", port: int = 2000,
+                 event_log: Optional[EventLogWriter] = None,
+                 framing: str = Framing.NATIVE.value, channel: str = "main",
+                 candidates: Optional[Sequence[Tuple[str, int]]] = None):
         """
         Initialize TCP client
         
         Args:
             host (str): IP address of the Mobile Racking controller
             port (int): TCP port (default 2000 per PDF documentation)
+            event_log (Optional[EventLogWriter]): Structured log receiving every exchange
+            framing (str): "native" or "legacy" open-aisle framing (see wms_negotiation)
+            channel (str): Connection role ("main", "poll" or "command"), used as metrics label
+            candidates (Optional[Sequence[Tuple[str, int]]]): (host, port) pairs raced on every
+                connect (see wms_negotiation.candidate_endpoints); host/port follow the winner
         """
         self.host = host
         self.port = port
+        self.framing = Framing(framing)
+        self.channel = channel
+        self.candidates: Optional[List[Tuple[str, int]]] = list(candidates) if candidates else None
         self.socket: Optional[socket.socket] = None
+        self.event_log = event_log
+        self.last_outcome = EventOutcome.OK
+        self.last_exchange = 0.0  # time.monotonic() of the last complete response
+        self.last_latency_ms: Optional[float] = None  # round trip of the last answered command
+        # Per connection, reset on every connect: status frames and STX/ETX replies
+        self._decoder = FixedFrameDecoder()
+        self._legacy_decoder = LegacyFrameDecoder()
+        self._init_metrics()
         self.connected = False
+    
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds since the last complete response (used to schedule heartbeats)"""
+        return time.monotonic() - self.last_exchange
+    
+    @property
+    def controller_id(self) -> str:
+        """Controller identifier used in logs and metrics"""
+        return f"{self.host}:{self.port}"
+    
+    def _init_metrics(self):
+        """Create the per-controller instruments used in the hot path"""
+        labels = {'controller': self.controller_id, 'channel': self.channel}
+        self._m_connected = metrics.gauge("wms_tcp_connected", "1 while the controller connection is up", **labels)
+        self._m_connect = metrics.histogram("wms_tcp_connect_seconds", "TCP connect duration", **labels)
+        self._m_connect_failures = metrics.counter("wms_tcp_connect_failures_total", "Failed connection attempts", **labels)
+        # Registry instruments are shared by label, so connections are counted
+        # per controller across TCPClient instances (app.py makes one per Connect)
+        self._m_connections = metrics.counter("wms_tcp_connections_total", "Established connections", **labels)
+        self._m_reconnects = metrics.counter("wms_tcp_reconnects_total", "Connections after the first one", **labels)
+        self._m_commands = metrics.counter("wms_tcp_commands_total", "Commands sent", **labels)
+        self._m_command = metrics.histogram("wms_tcp_command_seconds", "Command round trip time", **labels)
+        self._m_errors = metrics.counter("wms_tcp_command_errors_total", "Commands without a complete response", **labels)
+        self._m_timeouts = metrics.counter("wms_tcp_timeouts_total", "Response timeouts", **labels)
+        self._m_chunks = metrics.counter("wms_tcp_recv_chunks_total", "recv() calls returning data", **labels)
+        self._m_parse = metrics.histogram("wms_parse_seconds", "Status frame parse time", parser="tcp_client")
+    
+    def _count_connection(self):
+        """Count an established connection; every one after the first per controller is a reconnect"""
+        with _connection_lock:
+            if self._m_connections.value:
+                self._m_reconnects.inc()
+            self._m_connections.inc()
+    
+    @property
+    def connected(self) -> bool:
+        """True while the socket is believed to be usable"""
+        return self._connected
+    
+    @connected.setter
+    def connected(self, value: bool):
+        self._connected = value
+        self._m_connected.set(1 if value else 0)
         
-    def connect(self) -> bool:
+    def connect(self, candidates: Optional[Sequence[Tuple[str, int]]] = None) -> bool:
         """
         Connect to the Mobile Racking controller
         
+        Args:
+            candidates (Optional[Sequence[Tuple[str, int]]]): (host, port) pairs to race
+                instead of host/port (default self.candidates)
+        
         Returns:
             bool: True if connection successful, False otherwise
         """
+        candidates = candidates or self.candidates
+        if candidates:
+            return self._connect_first(candidates)
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(10.0)  # 10 second timeout for PLC via VPN
+            configure_socket(self.socket)
             
-            logger.info(f"Attempting connection to {self.host}:{self.port}...")
+            logger.info("Attempting connection to %s:%s...", self.host, self.port)
             start_time = time.time()
             
             self.socket.connect((self.host, self.port))
             
             end_time = time.time()
             connect_time = (end_time - start_time) * 1000
+            self._m_connect.observe(end_time - start_time)
+            self._count_connection()
             
+            self._reset_decoders()
             self.connected = True
-            logger.info(f"Connected to {self.host}:{self.port} in {connect_time:.0f}ms")
+            self.last_exchange = time.monotonic()
+            logger.info("Connected to %s:%s in %.0fms", self.host, self.port, connect_time)
             return True
             
         except socket.timeout:
-            logger.error(f"Connection timeout to {self.host}:{self.port} (>10s)")
+            logger.error("Connection timeout to %s:%s (>10s)", self.host, self.port)
+            self._m_connect_failures.inc()
             self.connected = False
             return False
         except ConnectionRefusedError:
-            logger.error(f"Connection refused by {self.host}:{self.port} - Service not active")
+            logger.error("Connection refused by %s:%s - Service not active", self.host, self.port)
+            self._m_connect_failures.inc()
             self.connected = False
             return False
         except socket.gaierror as e:
-            logger.error(f"DNS/Host resolution error: {e}")
+            logger.error("DNS/Host resolution error: %s", e)
+            self._m_connect_failures.inc()
             self.connected = False
             return False
         except OSError as e:
             if e.errno == 10061:
-                logger.error(f"Connection refused (Error 10061) - Port {self.port} not open on {self.host}")
+                logger.error("Connection refused (Error 10061) - Port %s not open on %s", self.port, self.host)
             elif e.errno == 10060:
-                logger.error(f"Connection timeout (Error 10060) - Host not reachable")
+                logger.error("Connection timeout (Error 10060) - Host not reachable")
             else:
-                logger.error(f"OS Error {e.errno}: {e}")
+                logger.error("OS Error %s: %s", e.errno, e)
+            self._m_connect_failures.inc()
             self.connected = False
             return False
         except Exception as e:
-            logger.error(f"Unknown error during connection: {e}")
+            logger.error("Unknown error during connection: %s", e)
+            self._m_connect_failures.inc()
             self.connected = False
             return False
     
+    def _connect_first(self, candidates: Sequence[Tuple[str, int]]) -> bool:
+        """Race candidates in parallel and keep the first that answers a status request"""
+        start_time = time.time()
+        result = race_connect(candidates)
+        if result is None:
+            logger.error("None of %d candidate endpoints answered a status request", len(candidates))
+            self._m_connect_failures.inc()
+            self.connected = False
+            return False
+        
+        sock, caps = result
+        if (caps.host, caps.port) != (self.host, self.port):
+            logger.info("Using %s:%s instead of %s:%s", caps.host, caps.port, self.host, self.port)
+            self._m_connected.set(0)
+            self.host, self.port = caps.host, caps.port
+            self._init_metrics()
+        sock.settimeout(10.0)
+        configure_socket(sock)
+        self.socket = sock
+        
+        self._m_connect.observe(time.time() - start_time)
+        self._count_connection()
+        self._reset_decoders()
+        self.connected = True
+        self.last_exchange = time.monotonic()
+        logger.info("Connected to %s:%s in %.0fms", self.host, self.port, (time.time() - start_time) * 1000)
+        return True
+    
+    def _reset_decoders(self):
+        """Drop bytes buffered from a previous connection"""
+        self._decoder.reset()
+        self._legacy_decoder.reset()
+    
     def disconnect(self):
         """Disconnect from the controller"""
         if self.socket:
@@ -90,6 +255,16 @@ class TCPClient:
                 self.socket = None
                 self.connected = False
     
+    def is_legacy(self, command: int) -> bool:
+        """True if command is sent (and answered) in STX/ETX framing"""
+        return self.framing == Framing.LEGACY and 1 <= command <= 19
+    
+    def encode(self, command: int) -> bytes:
+        """Encode a command in the framing this controller speaks"""
+        if self.is_legacy(command):
+            return encode_legacy_open_aisle(command)
+        return encode_command(command)
+    
     def send_command(self, command: int) -> Optional[bytes]:
         """
         Send a 2-byte command and receive 20-byte response
@@ -98,163 +273,150 @@ class TCPClient:
         Args:
             command (int): Command number (0=status, 1-19=open aisle)
             
+        Returns:
+            Optional[bytes]: 20-byte response (the complete STX/ETX reply for a
+            legacy-framed command) or None on error
+        """
+        command_bytes = self.encode(command)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending command %s = %s", command, command_bytes.hex())
+        
+        start_time = time.perf_counter()
+        response = self._exchange(command_bytes, legacy=self.is_legacy(command))
+        elapsed = time.perf_counter() - start_time
+        
+        self._m_commands.inc()
+        if response is None:
+            self._m_errors.inc()
+        else:
+            self._m_command.observe(elapsed)
+            self.last_latency_ms = elapsed * 1000
+        
+        if self.event_log is not None:
+            self.event_log.record(
+                self.controller_id, command_bytes, response,
+                elapsed * 1000, self.last_outcome
+            )
+        return response
+    
+    def _exchange(self, command_bytes: bytes, legacy: bool = False) -> Optional[bytes]:
+        """
+        Write command bytes and read the complete 20-byte response
+        
+        Sets self.last_outcome to describe the result.
+        
+        Args:
+            command_bytes (bytes): Encoded command
+            legacy (bool): Read an STX/ETX framed reply instead of a status frame
+            
         Returns:
             Optional[bytes]: 20-byte response or None on error
         """
         if not self.connected or not self.socket:
             logger.error("No connection")
+            self.last_outcome = EventOutcome.NOT_CONNECTED
             return None
             
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         try:
-            # Prepare command according to PDF specification
-            if command == 0:
-                # Status request: first byte = 0, second byte = 2
-                command_bytes = struct.pack('BB', 0, 2)
-                logger.debug(f"Sending status request: (0, 2) = {command_bytes.hex()}")
-            elif 1 <= command <= 19:
-                # Open aisle: first byte = aisle number, second byte = 1
-                command_bytes = struct.pack('BB', command, 1)
-                logger.debug(f"Sending open aisle {command}: ({command}, 1) = {command_bytes.hex()}")
-            else:
-                # Custom command (fallback to old format)
-                command_bytes = struct.pack('<H', command)
-                logger.debug(f"Sending custom command: {command} = {command_bytes.hex()}")
-            
             self.socket.send(command_bytes)
             
-            # Receive 20-byte response with timeout handling
-            response = b""
+            # Receive the response with timeout handling; bytes past the
+            # frame stay in the connection's decoder for the next exchange
+            decoder = self._legacy_decoder if legacy else self._decoder
+            response = None
             start_time = time.time()
             max_wait_time = 5.0  # 5 second timeout for response
             
-            while len(response) < 20:
+            while response is None:
                 # Check timeout
                 if time.time() - start_time > max_wait_time:
-                    logger.error(f"Timeout receiving response after {max_wait_time}s")
+                    logger.error("Timeout receiving response after %ss", max_wait_time)
+                    self.last_outcome = EventOutcome.TIMEOUT
+                    self._m_timeouts.inc()
                     self.connected = False
                     return None
                 
                 try:
                     # Receive with short timeout per chunk
                     self.socket.settimeout(1.0)
-                    chunk = self.socket.recv(20 - len(response))
+                    chunk = self.socket.recv(64)
                     
                     if not chunk:
                         logger.error("Connection broken during receive")
+                        self.last_outcome = EventOutcome.DISCONNECTED
                         self.connected = False
                         return None
-                        
-                    response += chunk
-                    logger.debug(f"Chunk received: {len(chunk)} bytes, total: {len(response)}/20")
+                    
+                    self._m_chunks.inc()
+                    frames = decoder.feed(chunk)
+                    if frames:
+                        # Only the newest frame answers this request
+                        response = frames[-1].encode() if legacy else frames[-1]
+                    if debug_enabled:
+                        logger.debug("Chunk received: %d bytes, %d buffered", len(chunk), decoder.buffered)
                     
                 except socket.timeout:
                     # Short timeout is OK, try again
                     continue
                 except socket.error as e:
-                    logger.error(f"Socket error during receive: {e}")
+                    logger.error("Socket error during receive: %s", e)
+                    self.last_outcome = EventOutcome.ERROR
                     self.connected = False
                     return None
             
             # Reset socket timeout to original
             self.socket.settimeout(10.0)
             
-            logger.debug(f"Complete response received: {response.hex()}")
+            if debug_enabled:
+                logger.debug("Complete response received: %s", response.hex())
+            self.last_outcome = EventOutcome.OK
+            self.last_exchange = time.monotonic()
             return response
             
         except socket.error as e:
-            logger.error(f"Communication error: {e}")
+            logger.error("Communication error: %s", e)
+            self.last_outcome = EventOutcome.ERROR
             self.connected = False
             return None
         except Exception as e:
-            logger.error(f"Unknown error in send_command: {e}")
+            logger.error("Unknown error in send_command: %s", e)
+            self.last_outcome = EventOutcome.ERROR
             self.connected = False
             return None
     
-    def get_status(self) -> Optional[Dict[str, Any]]:
+    def get_status(self) -> Optional[Mapping[str, Any]]:
         """
         Get complete status from the Mobile Racking system
         
         Returns:
-            Optional[Dict]: Status dictionary or None on error
+            Optional[Mapping]: Read-only status shared by all holders of the
+            same frame (see intern_status_frame), or None on error
         """
         response = self.send_command(0)  # Status request command
         if response:
-            return self.parse_status_response(response)
+            with self._m_parse.time():
+                return intern_status_frame(response)[1]
         return None
     
-    def parse_status_response(self, response: bytes) -> Dict[str, Any]:
+    @staticmethod
+    def parse_status_response(response: bytes) -> Dict[str, Any]:
         """
         Parse the 20-byte status response according to WMS specification
         
+        Decoding is wms_protocol.decode_status_frame (field offsets from
+        WMS_DATA_STRUCTURE); the raw bytes are not part of the result.
+        
         Args:
             response (bytes): 20-byte response
             
         Returns:
-            Dict: Parsed status data
+            Dict: Parsed status data ({} if the response is invalid)
         """
-        if len(response) != 20:
-            logger.error(f"Invalid response length: {len(response)} (expected 20)")
-            return {}
-        
         try:
-            # Parse according to WMS-Data structure
-            status = {}
-            
-            # Byte 0-1: Command Request (Byte)
-            status['command_request'] = struct.unpack('<H', response[0:2])[0]
-            
-            # Byte 2: Command Start Operation (Bool)
-            status['command_start_operation'] = bool(response[2])
-            
-            # Byte 3: Command Request Status (Bool)  
-            status['command_request_status'] = bool(response[3])
-            
-            # Byte 4: Stow Mobile Racking Major (Byte)
-            status['stow_mobile_racking_major'] = response[4]
-            
-            # Byte 5: Stow Mobile Racking Minor (Byte)
-            status['stow_mobile_racking_minor'] = response[5]
-            
-            # Byte 6-7: TCP IP Reserved Message (Byte)
-            status['tcp_ip_reserved_message'] = struct.unpack('<H', response[6:8])[0]
-            
-            # Byte 8: TCP IP Connection (Bool)
-            status['tcp_ip_connection'] = bool(response[8])
-            
-            # Byte 9: Automatic Mode is ON (Bool)
-            status['automatic_mode_on'] = bool(response[9])
-            
-            # Byte 10: Mobiles Are Released (Bool)
-            status['mobiles_are_released'] = bool(response[10])
-            
-            # Byte 11: Manual Mode is ON (Bool)
-            status['manual_mode_on'] = bool(response[11])
-            
-            # Byte 12: Night Mode Activated (Bool)
-            status['night_mode_activated'] = bool(response[12])
-            
-            # Byte 13: Mobiles Are Moving (Bool)
-            status['mobiles_are_moving'] = bool(response[13])
-            
-            # Byte 14: Power ON (Bool)
-            status['power_on'] = bool(response[14])
-            
-            # Byte 15: Mobile Quantity (Byte)
-            status['mobile_quantity'] = response[15]
-            
-            # Byte 16-17: Counter Lift-track inside (Byte)
-            status['counter_lift_track_inside'] = struct.unpack('<H', response[16:18])[0]
-            
-            # Byte 18: Alarm Light Curtain Front (Bool)
-            status['alarm_light_curtain_front'] = bool(response[18])
-            
-            # Byte 19: Alarm Light Curtain Back (Bool)
-            status['alarm_light_curtain_back'] = bool(response[19])
-            
-            return status
-            
-        except Exception as e:
-            logger.error(f"Error parsing response: {e}")
+            return decode_status_frame(response)
+        except ValueError as e:
+            logger.error("Error parsing response: %s", e)
             return {}
     
     def __enter__(self):
@@ -264,3 +426,33 @@ class TCPClient:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
         self.disconnect()
+
+
+def _counter_field(frame: bytes) -> Dict[str, Any]:
+    """The message counter, which changes on every poll, decoded from one frame"""
+    if len(frame) != STATUS_FRAME_SIZE:
+        return {}
+    return {'tcp_ip_reserved_message': frame[COUNTER_BYTE]}
+
+
+_status_frames = FrameInterner("status", TCPClient.parse_status_response, maxsize=STATUS_INTERN_SIZE,
+                               key=frame_key, own_fields=_counter_field)
+
+
+def intern_status_frame(frame: bytes) -> Tuple[bytes, Mapping[str, Any]]:
+    """
+    Decode a status frame, sharing the decode between polls
+    
+    The controller returns the same values for long stretches; only the
+    message counter (byte 4) moves. The decoded fields are kept once per
+    distinct frame_key() and shared by every caller; the counter is read
+    from each frame. The status is read-only (copy with dict() before
+    modifying it).
+    
+    Args:
+        frame (bytes): 20-byte status response
+        
+    Returns:
+        Tuple[bytes, Mapping]: (frame as received, parsed status)
+    """
+    return _status_frames.intern(frame)
@@ -0,0 +1,123 @@
+"""
+Circuit breaker state machine of connection_supervisor
+
+Run: python -m pytest -q test_connection_supervisor.py
+"""
+
+import pytest
+
+import connection_supervisor
+from connection_supervisor import BreakerState, CircuitBreaker
+
+
+class FakeClock:
+    """Stands in for the time module; advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(connection_supervisor, "time", fake)
+    return fake
+
+
+def breaker(**kwargs):
+    options = dict(failure_threshold=3, base_delay=1.0, max_delay=8.0, jitter=0.0)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def trip(cb):
+    for _ in range(cb.failure_threshold):
+        cb.record_failure()
+
+
+def test_stays_closed_below_threshold(clock):
+    cb = breaker()
+    cb.record_failure()
+    cb.record_failure()
+    assert cb.state == BreakerState.CLOSED
+    assert cb.allow()
+    assert cb.retry_in() == 0.0
+
+
+def test_success_resets_failure_count(clock):
+    cb = breaker()
+    cb.record_failure()
+    cb.record_failure()
+    cb.record_success()
+    cb.record_failure()
+    cb.record_failure()
+    assert cb.state == BreakerState.CLOSED
+
+
+def test_closed_open_half_open_closed(clock):
+    cb = breaker()
+    trip(cb)
+    assert cb.state == BreakerState.OPEN
+    assert not cb.allow()
+    assert cb.retry_in() == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert not cb.allow()
+    assert cb.retry_in() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert cb.allow()
+    assert cb.state == BreakerState.HALF_OPEN
+    assert not cb.allow(), "only one half-open probe"
+    assert cb.retry_in() == 0.0
+
+    cb.record_success()
+    assert cb.state == BreakerState.CLOSED
+    assert cb.failures == 0
+    assert cb.allow()
+
+
+def test_failed_probe_reopens_with_doubled_interval(clock):
+    cb = breaker()
+    trip(cb)
+    clock.now += 1.0
+    assert cb.allow()
+    cb.record_failure()
+    assert cb.state == BreakerState.OPEN
+    assert cb.retry_in() == pytest.approx(2.0)
+
+
+def test_backoff_is_capped_at_max_delay(clock):
+    cb = breaker()
+    trip(cb)
+    intervals = [cb.retry_in()]
+    for _ in range(6):
+        clock.now += cb.retry_in()
+        assert cb.allow()
+        cb.record_failure()
+        intervals.append(cb.retry_in())
+    assert intervals == pytest.approx([1.0, 2.0, 4.0, 8.0, 8.0, 8.0, 8.0])
+
+
+def test_success_resets_backoff(clock):
+    cb = breaker()
+    trip(cb)
+    clock.now += 1.0
+    cb.allow()
+    cb.record_failure()
+    clock.now += 2.0
+    cb.allow()
+    cb.record_success()
+    trip(cb)
+    assert cb.retry_in() == pytest.approx(1.0)
+
+
+def test_jitter_only_shortens_the_interval(clock):
+    cb = breaker(jitter=0.5)
+    for _ in range(20):
+        trip(cb)
+        assert 0.5 <= cb.retry_in() <= 1.0
+        cb.record_success()
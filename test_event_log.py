@@ -0,0 +1,123 @@
+"""
+Binary event log: record round-trips, writer restarts and time lookups
+
+Run: python -m pytest -q test_event_log.py
+"""
+
+import os
+
+import pytest
+
+from utils.event_log import (
+    HEADER_SIZE, RECORD_SIZE, EventLogReader, EventLogWriter, EventOutcome, EventRecord,
+    summarize,
+)
+
+STATUS = bytes([0, 0, 2, 5, 9, 0x01, 14]) + bytes(13)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "logs" / "events.bin")
+
+
+def write(path, *events):
+    writer = EventLogWriter(path)
+    try:
+        for event in events:
+            writer.record(**event)
+    finally:
+        writer.close()
+
+
+def event(timestamp, controller="1.1.1.2:2000", command=b"\x00\x02", response=STATUS,
+          latency_ms=1.5, outcome=EventOutcome.OK):
+    return dict(timestamp=timestamp, controller=controller, command=command,
+                response=response, latency_ms=latency_ms, outcome=outcome)
+
+
+def test_record_round_trip(path):
+    write(path,
+          event(100.0),
+          event(101.0, controller="1.1.1.3:2000", command=b"\x05\x01", response=None,
+                latency_ms=10000.0, outcome=EventOutcome.TIMEOUT))
+    with EventLogReader(path) as reader:
+        assert len(reader) == 2
+        assert reader[0] == EventRecord(100.0, "1.1.1.2:2000", b"\x00\x02", STATUS, 1.5, EventOutcome.OK)
+        assert reader[-1] == EventRecord(101.0, "1.1.1.3:2000", b"\x05\x01", b"", 10000.0,
+                                         EventOutcome.TIMEOUT)
+        assert reader.controllers == ["1.1.1.2:2000", "1.1.1.3:2000"]
+        with pytest.raises(IndexError):
+            reader[2]
+
+
+def test_oversized_response_is_truncated(path):
+    write(path, event(1.0, response=STATUS + b"extra"))
+    with EventLogReader(path) as reader:
+        assert reader[0].response == STATUS
+
+
+def test_records_survive_writer_restart(path):
+    write(path, event(1.0, controller="a:1"), event(2.0, controller="b:1"))
+    # A restarted process appends to the same file with a fresh writer
+    write(path, event(3.0, controller="b:1"), event(4.0, controller="c:1"))
+    assert os.path.getsize(path) == HEADER_SIZE + 4 * RECORD_SIZE
+    with EventLogReader(path) as reader:
+        assert [r.timestamp for r in reader.iter_events()] == [1.0, 2.0, 3.0, 4.0]
+        assert [r.controller for r in reader.iter_events()] == ["a:1", "b:1", "b:1", "c:1"]
+        assert reader.controllers == ["a:1", "b:1", "c:1"]
+
+
+def test_moved_log_stays_readable_and_a_new_one_is_started(path):
+    write(path, event(1.0), event(2.0))
+    archived = path + ".1"
+    os.replace(path, archived)
+    os.replace(path + ".controllers", archived + ".controllers")
+    write(path, event(3.0, controller="b:1"))
+
+    with EventLogReader(archived) as reader:
+        assert [(r.timestamp, r.controller) for r in reader.iter_events()] == [
+            (1.0, "1.1.1.2:2000"), (2.0, "1.1.1.2:2000")]
+    with EventLogReader(path) as reader:
+        assert [(r.timestamp, r.controller) for r in reader.iter_events()] == [(3.0, "b:1")]
+
+
+def test_trailing_partial_record_is_ignored(path):
+    write(path, event(1.0), event(2.0))
+    with open(path, "ab") as f:
+        f.write(b"\x00" * (RECORD_SIZE // 2))
+    with EventLogReader(path) as reader:
+        assert len(reader) == 2
+
+
+def test_not_an_event_log(tmp_path):
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"x" * (HEADER_SIZE + RECORD_SIZE))
+    with pytest.raises(ValueError):
+        EventLogReader(str(other))
+
+
+def test_time_range_and_controller_filter(path):
+    write(path, *[event(float(t), controller="a:1" if t % 2 else "b:1") for t in range(10)])
+    with EventLogReader(path) as reader:
+        assert reader.bisect(-1.0) == 0
+        assert reader.bisect(4.0) == 4
+        assert reader.bisect(4.5) == 5
+        assert reader.bisect(99.0) == 10
+        assert [r.timestamp for r in reader.iter_events(3.0, 7.0)] == [3.0, 4.0, 5.0, 6.0]
+        assert [r.timestamp for r in reader.iter_events(3.0, 7.0, "a:1")] == [3.0, 5.0]
+        assert list(reader.iter_events(controller="missing:1")) == []
+
+
+def test_summary(path):
+    write(path,
+          event(1.0, latency_ms=1.0),
+          event(2.0, latency_ms=3.0),
+          event(3.0, command=b"\x05\x01", response=None, outcome=EventOutcome.DISCONNECTED))
+    with EventLogReader(path) as reader:
+        report = summarize(reader.iter_events())
+    assert report['total'] == 3
+    assert report['outcomes'] == {'OK': 2, 'DISCONNECTED': 1}
+    assert report['commands'] == {'0002': 2, '0501': 1}
+    assert report['error_rate'] == pytest.approx(1 / 3)
+    assert report['latency_ms'] == {50: 1.0, 90: 3.0, 99: 3.0}
@@ -0,0 +1,136 @@
+"""
+Frame caches and status interning
+
+Run: python -m pytest -q test_frame_cache.py
+"""
+
+import pytest
+
+import tcp_client
+from tcp_client import intern_status_frame
+from utils.frame_cache import COUNTER_BYTE, FrameCache, FrameInterner, frame_key, status_key
+from wms_protocol import decode_status_frame
+
+# Idle installation: version 2.5, TCP-IP connection bit set, 14 mobiles
+IDLE_FRAME = bytes([0, 0, 2, 5, 9, 0x01, 14, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0])
+
+
+def with_counter(frame, counter):
+    return frame[:COUNTER_BYTE] + bytes([counter]) + frame[COUNTER_BYTE + 1:]
+
+
+class CountingDecoder:
+    """Decoder that records how often it ran"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, frame):
+        self.calls += 1
+        return decode_status_frame(frame)
+
+
+# --- FrameCache -----------------------------------------------------------
+
+def test_cache_computes_once_per_key():
+    cache = FrameCache("test", maxsize=4)
+    calls = []
+    for _ in range(3):
+        assert cache.get(b"a", lambda: calls.append(1) or "A") == "A"
+    assert len(calls) == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = FrameCache("test", maxsize=2)
+    cache.get(b"a", lambda: 1)
+    cache.get(b"b", lambda: 2)
+    cache.get(b"a", lambda: pytest.fail("a is cached"))
+    cache.get(b"c", lambda: 3)  # evicts b, the least recently used
+    assert len(cache) == 2
+    assert cache.get(b"a", lambda: pytest.fail("a was kept")) == 1
+    assert cache.get(b"b", lambda: "recomputed") == "recomputed"
+
+
+def test_cache_does_not_store_unkeyable_values():
+    cache = FrameCache("test")
+    assert cache.get(None, lambda: 1) == 1
+    assert cache.get(None, lambda: 2) == 2
+    assert len(cache) == 0
+
+
+# --- status_key -----------------------------------------------------------
+
+def test_status_key_uses_raw_frame_and_field_names():
+    status = {'a': 1, 'raw_response': IDLE_FRAME}
+    assert status_key(status) == (('a', 'raw_response'), IDLE_FRAME)
+    # Same frame from another parser (other field names) gets another key
+    assert status_key({'b': 1, 'raw_response': IDLE_FRAME}) != status_key(status)
+
+
+def test_status_key_without_raw_frame():
+    assert status_key({'a': 1, 'b': True}) == (('a', 1), ('b', True))
+    assert status_key({'a': 1}) != status_key({'b': 1})
+    assert status_key({'a': [1]}) is None
+
+
+# --- FrameInterner --------------------------------------------------------
+
+def test_interner_shares_equal_frames():
+    decode = CountingDecoder()
+    interner = FrameInterner("test", decode)
+    first = interner.intern(IDLE_FRAME)
+    second = interner.intern(bytearray(IDLE_FRAME))
+    assert first is second
+    assert decode.calls == 1
+    with pytest.raises(TypeError):
+        first[1]['power_on'] = True
+
+
+def test_interner_evicts_least_recently_seen():
+    decode = CountingDecoder()
+    interner = FrameInterner("test", decode, maxsize=2)
+    frames = [with_counter(IDLE_FRAME, n) for n in range(3)]
+    for frame in frames:
+        interner.intern(frame)
+    assert len(interner) == 2
+    interner.intern(frames[2])
+    assert decode.calls == 3
+    interner.intern(frames[0])
+    assert decode.calls == 4
+
+
+def test_interner_keeps_own_fields_of_each_frame():
+    decode = CountingDecoder()
+    interner = FrameInterner("test", decode, key=frame_key,
+                             own_fields=lambda frame: {'tcp_ip_reserved_message': frame[COUNTER_BYTE]})
+    for counter in range(5):
+        frame = with_counter(IDLE_FRAME, counter)
+        received, status = interner.intern(frame)
+        assert received == frame
+        assert status['tcp_ip_reserved_message'] == counter
+        assert dict(status) == decode_status_frame(frame)
+    assert decode.calls == 1
+    assert len(interner) == 1
+
+
+def test_intern_status_frame_does_not_collapse_the_counter():
+    # A frame no other test interns, so the shared interner grows by one
+    base = bytes([0, 0, 2, 5, 0, 0x43, 14, 0, 0b101, 0, 7, 0, 0, 0, 3, 0, 0, 0, 0, 0])
+    before = len(tcp_client._status_frames)
+    seen = []
+    for counter in (10, 11, 12, 255, 0):
+        frame = with_counter(base, counter)
+        received, status = intern_status_frame(frame)
+        assert received == frame
+        assert list(status) == list(decode_status_frame(frame))
+        assert dict(status) == decode_status_frame(frame)
+        seen.append(status['tcp_ip_reserved_message'])
+    assert seen == [10, 11, 12, 255, 0]
+    assert len(tcp_client._status_frames) == before + 1
+
+
+def test_intern_status_frame_distinguishes_installation_changes():
+    a = bytes([0, 0, 2, 5, 1, 0x41, 14]) + bytes(13)
+    b = bytes([0, 0, 2, 5, 1, 0x42, 14]) + bytes(13)
+    assert intern_status_frame(a)[1]['automatic_mode_on'] is False
+    assert intern_status_frame(b)[1]['automatic_mode_on'] is True
@@ -0,0 +1,78 @@
+"""
+Import-time benchmark for the WMS modules
+Measures cold import time in a fresh interpreter and checks that heavy
+libraries are only loaded by the pages that need them.
+
+Run: python -m pytest -q test_import_time.py   (or python test_import_time.py)
+"""
+
+import os
+import subprocess
+import sys
+import importlib.util
+
+import pytest
+
+# Cold import budget per module in seconds (override for slow devices)
+IMPORT_BUDGET = float(os.getenv("IMPORT_BUDGET_S", "5.0"))
+
+# Modules app.py must not import at startup (beyond what streamlit loads itself)
+LAZY_MODULES = ("pandas", "plotly", "protocol_generators")
+
+HEADLESS_MODULES = ("tcp_client", "wms_service", "api_gateway", "wms_ipc")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(sorted(m for m in sys.modules)))
+"""
+
+
+def measure_import(module: str):
+    """
+    Import a module in a fresh interpreter
+
+    Returns:
+        Tuple[float, set]: (seconds, names of all loaded modules)
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, METRICS_PORT="0", PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True, text=True, cwd=repo_dir, env=env, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    lines = result.stdout.strip().splitlines()
+    return float(lines[-2]), set(lines[-1].split(","))
+
+
+def test_headless_imports():
+    """Headless modules load without Streamlit, Pandas or Plotly"""
+    for module in HEADLESS_MODULES:
+        elapsed, loaded = measure_import(module)
+        print(f"{module:<20} {elapsed * 1000:8.1f} ms")
+        heavy = {"streamlit", "pandas", "plotly"} & {name.split(".")[0] for name in loaded}
+        assert not heavy, f"{module} imports {heavy}"
+        assert elapsed < IMPORT_BUDGET, f"{module} took {elapsed:.2f}s"
+
+
+def test_app_import():
+    """app.py defers heavy imports to the pages that use them"""
+    if importlib.util.find_spec("streamlit") is None:
+        pytest.skip("streamlit not installed")
+
+    _, baseline = measure_import("streamlit")
+    elapsed, loaded = measure_import("app")
+    print(f"{'app':<20} {elapsed * 1000:8.1f} ms")
+    added = {name.split(".")[0] for name in loaded - baseline}
+    eager = [name for name in LAZY_MODULES if name in added]
+    assert not eager, f"app.py imports {eager} at startup"
+    assert elapsed < IMPORT_BUDGET, f"app took {elapsed:.2f}s"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
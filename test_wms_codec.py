@@ -0,0 +1,134 @@
+"""
+Streaming decoders and wire encodings of wms_codec
+
+Run: python -m pytest -q test_wms_codec.py
+"""
+
+import pytest
+
+from wms_codec import (
+    ETX, FRAME_SIZE, STX, FixedFrameDecoder, LegacyFrame, LegacyFrameDecoder,
+    decode_command, encode_command, encode_legacy, encode_legacy_open_aisle,
+    is_status_frame,
+)
+
+STATUS = bytes([0, 0, 2, 5, 9, 0x01, 14]) + bytes(FRAME_SIZE - 7)
+
+
+def frames(count):
+    """Distinct status frames (message counter in byte 4)"""
+    return [STATUS[:4] + bytes([n]) + STATUS[5:] for n in range(count)]
+
+
+# --- native framing -------------------------------------------------------
+
+@pytest.mark.parametrize("command", [0, 1, 7, 19, 0x1234])
+def test_command_round_trip(command):
+    request = encode_command(command)
+    assert len(request) == 2
+    assert decode_command(request) == command
+
+
+def test_native_request_layout():
+    assert encode_command(0) == bytes([0, 2])
+    assert encode_command(5) == bytes([5, 1])
+
+
+def test_status_frame_plausibility():
+    assert is_status_frame(STATUS)
+    assert not is_status_frame(STATUS[:-1])
+    assert not is_status_frame(bytes([20]) + STATUS[1:])
+    assert not is_status_frame(STATUS[:9] + bytes([0x20]) + STATUS[10:])
+
+
+def test_fixed_decoder_reassembles_fragments():
+    decoder = FixedFrameDecoder()
+    frame = STATUS
+    assert decoder.feed(frame[:3]) == []
+    assert decoder.feed(frame[3:12]) == []
+    assert decoder.buffered == 12
+    assert decoder.feed(frame[12:]) == [frame]
+    assert decoder.buffered == 0
+
+
+def test_fixed_decoder_byte_by_byte():
+    decoder = FixedFrameDecoder()
+    received = []
+    for byte in STATUS:
+        received += decoder.feed(bytes([byte]))
+    assert received == [STATUS]
+
+
+def test_fixed_decoder_splits_coalesced_frames():
+    first, second, third = frames(3)
+    decoder = FixedFrameDecoder()
+    assert decoder.feed(first + second + third[:5]) == [first, second]
+    assert decoder.buffered == 5
+    assert decoder.feed(third[5:]) == [third]
+
+
+def test_fixed_decoder_reset_drops_partial_frame():
+    decoder = FixedFrameDecoder()
+    decoder.feed(STATUS[:7])
+    decoder.reset()
+    assert decoder.feed(STATUS) == [STATUS]
+
+
+# --- legacy framing -------------------------------------------------------
+
+def test_legacy_round_trip():
+    wire = encode_legacy_open_aisle(7)
+    assert wire[0] == STX and wire[-1] == ETX
+    assert LegacyFrameDecoder().feed(wire) == [LegacyFrame(0x4F, bytes([7]))]
+
+
+def test_legacy_encoder_rejects_bad_input():
+    with pytest.raises(ValueError):
+        encode_legacy_open_aisle(20)
+    with pytest.raises(ValueError):
+        encode_legacy(0x10, bytes(64))
+
+
+def test_legacy_resyncs_after_garbage():
+    frame = encode_legacy(0x53, b"\x01\x02")
+    decoder = LegacyFrameDecoder()
+    assert decoder.feed(b"\xff\x00noise" + frame) == [LegacyFrame(0x53, b"\x01\x02")]
+    assert decoder.discarded_bytes == 7
+    assert decoder.buffered == 0
+
+
+def test_legacy_rejects_bad_checksum_and_resyncs():
+    good = encode_legacy(0x53, b"\x10")
+    corrupt = bytearray(encode_legacy(0x53, b"\x11"))
+    corrupt[-2] ^= 0xFF
+    decoder = LegacyFrameDecoder()
+    assert decoder.feed(bytes(corrupt) + good) == [LegacyFrame(0x53, b"\x10")]
+    assert decoder.checksum_errors == 1
+    assert decoder.discarded_bytes == len(corrupt)
+
+
+def test_legacy_stray_stx_inside_noise():
+    # An STX followed by an implausible length is skipped, not waited on
+    frame = encode_legacy(0x4F, b"\x03")
+    decoder = LegacyFrameDecoder()
+    assert decoder.feed(bytes([STX, 0xFF]) + frame) == [LegacyFrame(0x4F, b"\x03")]
+    assert decoder.framing_errors == 1
+
+
+def test_legacy_missing_etx_is_a_framing_error():
+    bad = bytearray(encode_legacy(0x4F, b"\x03\x05"))  # LEN 3, no STX inside
+    bad[-1] = 0x00
+    good = encode_legacy(0x4F, b"\x04")
+    decoder = LegacyFrameDecoder()
+    assert decoder.feed(bytes(bad) + good) == [LegacyFrame(0x4F, b"\x04")]
+    assert decoder.framing_errors == 1
+
+
+def test_legacy_fragmented_frames():
+    wire = encode_legacy(0x41, b"abc") + encode_legacy(0x42)
+    decoder = LegacyFrameDecoder()
+    received = []
+    for byte in wire:
+        received += decoder.feed(bytes([byte]))
+    assert received == [LegacyFrame(0x41, b"abc"), LegacyFrame(0x42, b"")]
+    assert decoder.buffered == 0
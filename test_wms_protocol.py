@@ -0,0 +1,60 @@
+"""
+Status frame decoding against the WMS-Data specification
+
+Run: python -m pytest -q test_wms_protocol.py
+"""
+
+import pytest
+
+from tcp_client import TCPClient
+from wms_protocol import STATUS_FRAME_SIZE, WMS_DATA_STRUCTURE, decode_status_frame
+
+# Idle installation: version 2.5, TCP-IP connection bit set, 14 mobiles
+IDLE_FRAME = bytes([0, 0, 2, 5, 9, 0x01, 14, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0])
+
+
+def frame_with(**byte_values):
+    """IDLE_FRAME with single bytes replaced (b5=0x42 sets byte 5)"""
+    frame = bytearray(IDLE_FRAME)
+    for name, value in byte_values.items():
+        frame[int(name[1:])] = value
+    return bytes(frame)
+
+
+def test_decodes_every_specified_field_in_order():
+    status = decode_status_frame(IDLE_FRAME)
+    assert list(status) == list(WMS_DATA_STRUCTURE)
+    assert status['stow_mobile_racking_major'] == 2
+    assert status['stow_mobile_racking_minor'] == 5
+    assert status['tcp_ip_reserved_message'] == 9
+    assert status['mobile_quantity'] == 14
+    assert 'raw_response' not in status
+
+
+def test_bool_fields_are_bits():
+    status = decode_status_frame(frame_with(b5=0b0100_0010, b8=0b0000_0001, b9=0b0001_0000))
+    assert status['tcp_ip_connection'] is False
+    assert status['automatic_mode_on'] is True
+    assert status['power_on'] is True
+    assert status['manual_mode_on'] is False
+    assert status['alarm_light_curtain_front'] is True
+    active = [key for key, field in WMS_DATA_STRUCTURE.items()
+              if key.startswith('alarm_') and status[key]]
+    assert len(active) == 2
+
+
+def test_lighting_word_is_little_endian_dword():
+    status = decode_status_frame(frame_with(b10=0x01, b11=0x00, b12=0x00, b13=0x80, b14=7))
+    assert status['lighting_rules'] == 0x8000_0001
+    assert status['selected_aisle_to_open'] == 7
+
+
+@pytest.mark.parametrize("size", [0, STATUS_FRAME_SIZE - 1, STATUS_FRAME_SIZE + 1])
+def test_wrong_length_is_rejected(size):
+    with pytest.raises(ValueError):
+        decode_status_frame(bytes(size))
+    assert TCPClient.parse_status_response(bytes(size)) == {}
+
+
+def test_client_parser_uses_the_same_decoder():
+    assert TCPClient.parse_status_response(IDLE_FRAME) == decode_status_frame(IDLE_FRAME)
@@ -0,0 +1,113 @@
+"""
+Seqlock reads and writer restarts of the shared frame segment
+
+Run: python -m pytest -q test_wms_shared_state.py
+"""
+
+import uuid
+
+import pytest
+
+import wms_shared_state
+from wms_codec import FRAME_SIZE
+from wms_shared_state import SEQ_OFFSET, SharedFrameReader, SharedFrameWriter
+
+FRAME = bytes(range(FRAME_SIZE))
+OTHER = bytes(reversed(FRAME))
+
+
+@pytest.fixture
+def controller():
+    """Controller id with its own segment"""
+    return f"test-{uuid.uuid4().hex[:12]}:2000"
+
+
+@pytest.fixture
+def writer(controller):
+    w = SharedFrameWriter(controller)
+    yield w
+    if w._buf is not None:
+        w.close()
+
+
+@pytest.fixture
+def reader(controller):
+    r = SharedFrameReader(controller)
+    yield r
+    r.close()
+
+
+class ScriptedSeq:
+    """Replaces _SEQ for readers; returns scripted sequence values"""
+
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def unpack_from(self, buf, offset):
+        assert offset == SEQ_OFFSET
+        return (self.values.pop(0) if len(self.values) > 1 else self.values[0],)
+
+
+def test_no_writer(reader):
+    assert reader.read() is None
+
+
+def test_nothing_published_yet(writer, reader):
+    assert reader.read() is None
+
+
+def test_round_trip(writer, reader):
+    writer.publish(1234.5, FRAME)
+    sample = reader.read()
+    assert (sample.seq, sample.timestamp, sample.frame) == (2, 1234.5, FRAME)
+    writer.publish(1235.0, OTHER)
+    assert reader.read().frame == OTHER
+    assert reader.read().seq == 4
+
+
+def test_write_in_progress_is_not_returned(writer, reader):
+    writer.publish(1.0, FRAME)
+    # Writer stopped between its two counter updates: odd sequence
+    wms_shared_state._SEQ.pack_into(writer._buf, SEQ_OFFSET, 3)
+    assert reader.read() is None
+    wms_shared_state._SEQ.pack_into(writer._buf, SEQ_OFFSET, 4)
+    assert reader.read().seq == 4
+
+
+def test_torn_read_is_retried(writer, reader, monkeypatch):
+    writer.publish(1.0, FRAME)
+    # The counter moves from 2 to 4 while the payload is copied, then stays
+    monkeypatch.setattr(wms_shared_state, "_SEQ", ScriptedSeq(2, 4, 4, 4))
+    sample = reader.read()
+    assert sample.seq == 4
+    assert sample.frame == FRAME
+
+
+def test_reader_gives_up_on_a_busy_segment(writer, reader, monkeypatch):
+    writer.publish(1.0, FRAME)
+    values = list(range(2, 2 * wms_shared_state.READ_RETRIES + 4))
+    monkeypatch.setattr(wms_shared_state, "_SEQ", ScriptedSeq(*values))
+    assert reader.read() is None
+
+
+def test_cleared_magic_detaches_and_reattaches(controller, writer, reader):
+    writer.publish(1.0, FRAME)
+    assert reader.read().frame == FRAME
+    writer.close()
+    assert reader.read() is None
+    assert reader._segment is None
+
+    restarted = SharedFrameWriter(controller)
+    try:
+        restarted.publish(2.0, OTHER)
+        sample = reader.read()
+        assert sample.frame == OTHER
+        assert sample.seq == 2
+    finally:
+        restarted.close()
+
+
+@pytest.mark.skipif(wms_shared_state.fcntl is None, reason="writer lock needs flock")
+def test_second_writer_is_rejected(controller, writer):
+    with pytest.raises(RuntimeError):
+        SharedFrameWriter(controller)
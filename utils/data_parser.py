@@ -3,9 +3,13 @@ Data parsing utilities for WMS system
 """
 
 import struct
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
+from utils.frame_cache import FrameCache, status_key
+
+_validation_cache = FrameCache("validation")
+
 def format_hex_data(data: bytes) -> str:
     """
     Format bytes data as hex string for debugging
@@ -50,6 +54,41 @@ def create_lighting_rules(aisles: List[int]) -> int:
             dword_value |= (1 << (aisle - 1))
     return dword_value
 
+# Alarm flags in the status dictionary
+ALARM_FIELDS = [
+    'alarm_light_curtain_front',
+    'alarm_light_curtain_back', 
+    'alarm_emergency_shutdown',
+    'alarm_under_drive_section',
+    'alarm_light_beam_forward',
+    'alarm_light_beam_fall',
+    'alarm_contactor_50k',
+    'alarm_emergency_shutdown_2',
+    'alarm_under_drive_section_2',
+    'alarm_light_beam_forward_2',
+    'alarm_light_beam_fall_2',
+    'alarm_contactor_50k_2'
+]
+
+def detect_alarm_transitions(previous: Dict[str, Any], current: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    """
+    Compare alarm flags of two status dictionaries
+    
+    Args:
+        previous (Dict): Previous status (empty dict for the first poll)
+        current (Dict): Current status
+        
+    Returns:
+        List[Tuple[str, bool]]: (alarm field, True=raised / False=cleared) per change
+    """
+    transitions = []
+    for field in ALARM_FIELDS:
+        was_active = bool(previous.get(field, False))
+        is_active = bool(current.get(field, False))
+        if was_active != is_active:
+            transitions.append((field, is_active))
+    return transitions
+
 def validate_status_data(status: Dict[str, Any]) -> Dict[str, List[str]]:
     """
     Validate status data and return warnings/errors
@@ -63,22 +102,7 @@ def validate_status_data(status: Dict[str, Any]) -> Dict[str, List[str]]:
     result = {'warnings': [], 'errors': []}
     
     # Check for alarms
-    alarm_fields = [
-        'alarm_light_curtain_front',
-        'alarm_light_curtain_back', 
-        'alarm_emergency_shutdown',
-        'alarm_under_drive_section',
-        'alarm_light_beam_forward',
-        'alarm_light_beam_fall',
-        'alarm_contactor_50k',
-        'alarm_emergency_shutdown_2',
-        'alarm_under_drive_section_2',
-        'alarm_light_beam_forward_2',
-        'alarm_light_beam_fall_2',
-        'alarm_contactor_50k_2'
-    ]
-    
-    for field in alarm_fields:
+    for field in ALARM_FIELDS:
         if status.get(field, False):
             result['errors'].append(f"ALARM: {field.replace('_', ' ').title()}")
     
@@ -103,6 +127,14 @@ def validate_status_data(status: Dict[str, Any]) -> Dict[str, List[str]]:
     
     return result
 
+def validate_status_frame(status: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    validate_status_data computed once per distinct raw frame
+    
+    The result is shared between callers and must not be modified.
+    """
+    return _validation_cache.get(status_key(status), lambda: validate_status_data(status))
+
 def format_timestamp() -> str:
     """Return formatted timestamp"""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,406 @@
+"""
+Structured event log for WMS command traffic
+
+Every command exchange is stored as a fixed-size binary record instead of
+a free-text log line, so reports can be produced without grep/regex
+parsing. Fixed-size records make the file its own index: record N lives at
+HEADER_SIZE + N * RECORD_SIZE, and because timestamps are appended in
+order, time ranges are located with a binary search.
+
+Record layout (little-endian, 38 bytes):
+    d   timestamp (epoch seconds)
+    H   controller index (see <log>.controllers sidecar file)
+    B   outcome (EventOutcome)
+    B   response length (0-20)
+    f   latency in ms
+    2s  command bytes
+    20s response bytes (zero padded)
+"""
+
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer per log assumed
+    fcntl = None
+
+FILE_MAGIC = b"WMSEVT01"
+HEADER_FORMAT = "<8sII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_FORMAT = "<dHBBf2s20s"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+RESPONSE_SIZE = 20
+
+_record_struct = struct.Struct(RECORD_FORMAT)
+_timestamp_struct = struct.Struct("<d")
+
+
+class EventOutcome(IntEnum):
+    """Outcome of a single command exchange"""
+    OK = 0
+    TIMEOUT = 1
+    DISCONNECTED = 2
+    ERROR = 3
+    NOT_CONNECTED = 4
+
+
+@dataclass(frozen=True)
+class EventRecord:
+    """Decoded event log record"""
+    timestamp: float
+    controller: str
+    command: bytes
+    response: bytes
+    latency_ms: float
+    outcome: EventOutcome
+
+    @property
+    def ok(self) -> bool:
+        """True when a complete response was received"""
+        return self.outcome == EventOutcome.OK
+
+
+class EventLogWriter:
+    """
+    Append-only writer for the binary event log
+
+    Several processes (Streamlit workers, wms_service, the gateways) may
+    append to the same log. The file is opened with O_APPEND and every
+    record is written with a single os.write, so records from different
+    writers never interleave. Controller indexes are assigned under an
+    exclusive lock on the .controllers sidecar, so all writers agree on them.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize writer
+
+        Args:
+            path (str): Path to event log file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._controllers: Dict[str, int] = {}
+
+    def _open(self):
+        """Open (and if needed create) the log file"""
+        log_dir = os.path.dirname(self.path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        if not os.path.exists(self.path):
+            _create_log(self.path)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0))
+
+    def _controller_index(self, controller: str) -> int:
+        """Return the index of a controller, registering new ones in the shared sidecar"""
+        index = self._controllers.get(controller)
+        if index is not None:
+            return index
+        with open(self.path + ".controllers", "a+", encoding="utf-8") as f:
+            _lock_file(f)
+            f.seek(0)
+            names = [line.rstrip("\n") for line in f if line.strip()]
+            if controller not in names:
+                f.write(controller + "\n")
+                f.flush()
+                names.append(controller)
+            # Closing the file releases the lock
+        self._controllers = {name: i for i, name in enumerate(names)}
+        return self._controllers[controller]
+
+    def record(self, controller: str, command: bytes, response: Optional[bytes],
+               latency_ms: float, outcome: EventOutcome = EventOutcome.OK,
+               timestamp: Optional[float] = None):
+        """
+        Append one command exchange
+
+        Args:
+            controller (str): Controller identifier, e.g. "1.1.1.2:2000"
+            command (bytes): Command bytes sent (2 bytes)
+            response (Optional[bytes]): Response bytes or None
+            latency_ms (float): Round trip time in milliseconds
+            outcome (EventOutcome): Result of the exchange
+            timestamp (Optional[float]): Epoch seconds (default: now)
+        """
+        response = response or b""
+        with self._lock:
+            if self._fd is None:
+                self._open()
+            os.write(self._fd, _record_struct.pack(
+                time.time() if timestamp is None else timestamp,
+                self._controller_index(controller),
+                int(outcome),
+                min(len(response), RESPONSE_SIZE),
+                latency_ms,
+                command[:2],
+                response[:RESPONSE_SIZE]
+            ))
+
+    def flush(self):
+        """Records are written unbuffered; kept for callers flushing on shutdown"""
+
+    def close(self):
+        """Close the log file"""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def _create_log(path: str):
+    """Create a log file with its header atomically (no-op if another writer won)"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, RECORD_SIZE, 0))
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp)
+
+
+def _lock_file(f):
+    """Exclusive lock held until the file is closed (advisory, POSIX only)"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+class EventLogReader:
+    """
+    Random-access reader for the binary event log
+
+    The file is memory-mapped; records are decoded on access only.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open event log for reading
+
+        Args:
+            path (str): Path to event log file
+        """
+        self.path = path
+        self.controllers = _read_controllers(path)
+        if os.path.getsize(path) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a WMS event log")
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, record_size, _ = struct.unpack_from(HEADER_FORMAT, self._mm, 0)
+        if magic != FILE_MAGIC or record_size != RECORD_SIZE:
+            raise ValueError(f"{path} is not a WMS event log (magic={magic!r})")
+
+        # Ignore a trailing partial record from an interrupted write
+        self._count = (size - HEADER_SIZE) // RECORD_SIZE
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> EventRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("event index out of range")
+        ts, ctl, outcome, resp_len, latency, command, response = _record_struct.unpack_from(
+            self._mm, HEADER_SIZE + index * RECORD_SIZE
+        )
+        return EventRecord(
+            timestamp=ts,
+            controller=self.controllers[ctl] if ctl < len(self.controllers) else str(ctl),
+            command=command,
+            response=response[:resp_len],
+            latency_ms=latency,
+            outcome=EventOutcome(outcome)
+        )
+
+    def _timestamp(self, index: int) -> float:
+        """Read only the timestamp of a record"""
+        return _timestamp_struct.unpack_from(self._mm, HEADER_SIZE + index * RECORD_SIZE)[0]
+
+    def bisect(self, timestamp: float) -> int:
+        """
+        Find the first record at or after timestamp
+
+        Args:
+            timestamp (float): Epoch seconds
+
+        Returns:
+            int: Record index (len(self) if all records are older)
+        """
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iter_events(self, start: Optional[float] = None, end: Optional[float] = None,
+                    controller: Optional[str] = None) -> Iterator[EventRecord]:
+        """
+        Iterate events within a time range
+
+        Args:
+            start (Optional[float]): Inclusive start time (epoch seconds)
+            end (Optional[float]): Exclusive end time (epoch seconds)
+            controller (Optional[str]): Only events of this controller
+
+        Yields:
+            EventRecord: Matching events in chronological order
+        """
+        first = self.bisect(start) if start is not None else 0
+        last = self.bisect(end) if end is not None else self._count
+        ctl_index = self.controllers.index(controller) if controller in self.controllers else None
+        if controller is not None and ctl_index is None:
+            return
+
+        for index in range(first, last):
+            if ctl_index is not None:
+                ctl = struct.unpack_from("<H", self._mm, HEADER_SIZE + index * RECORD_SIZE + 8)[0]
+                if ctl != ctl_index:
+                    continue
+            yield self[index]
+
+    def close(self):
+        """Release the memory map and file"""
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _read_controllers(path: str) -> List[str]:
+    """Read the controller table belonging to an event log"""
+    try:
+        with open(path + ".controllers", "r", encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def command_counts(events: Iterable[EventRecord]) -> Dict[str, int]:
+    """
+    Count events per command
+
+    Args:
+        events (Iterable[EventRecord]): Events to aggregate
+
+    Returns:
+        Dict[str, int]: Count per command, keyed by command hex ("0002", "0501", ...)
+    """
+    counts: Dict[str, int] = {}
+    for event in events:
+        key = event.command.hex()
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def error_rate(events: Iterable[EventRecord]) -> float:
+    """
+    Fraction of events that did not produce a complete response
+
+    Args:
+        events (Iterable[EventRecord]): Events to aggregate
+
+    Returns:
+        float: Error rate between 0.0 and 1.0 (0.0 for no events)
+    """
+    total = failed = 0
+    for event in events:
+        total += 1
+        if not event.ok:
+            failed += 1
+    return failed / total if total else 0.0
+
+
+def latency_percentiles(events: Iterable[EventRecord],
+                        percentiles: Sequence[float] = (50, 90, 99)) -> Dict[float, float]:
+    """
+    Latency percentiles (nearest-rank) of successful exchanges
+
+    Args:
+        events (Iterable[EventRecord]): Events to aggregate
+        percentiles (Sequence[float]): Percentiles to compute (0-100)
+
+    Returns:
+        Dict[float, float]: Latency in ms per percentile (empty if no successes)
+    """
+    return _nearest_rank(sorted(event.latency_ms for event in events if event.ok), percentiles)
+
+
+def _nearest_rank(latencies: List[float], percentiles: Sequence[float]) -> Dict[float, float]:
+    """Nearest-rank percentiles of sorted latencies"""
+    if not latencies:
+        return {}
+    result = {}
+    for p in percentiles:
+        rank = max(1, min(len(latencies), int(-(-p * len(latencies) // 100))))
+        result[p] = latencies[rank - 1]
+    return result
+
+
+def summarize(events: Iterable[EventRecord]) -> Dict[str, object]:
+    """
+    Build a summary report in a single pass over the events
+
+    Args:
+        events (Iterable[EventRecord]): Events to aggregate
+
+    Returns:
+        Dict: total, outcome counts, command counts, error rate and latency percentiles
+    """
+    total = failed = 0
+    outcomes: Dict[str, int] = {}
+    commands: Dict[str, int] = {}
+    latencies: List[float] = []
+    for event in events:
+        total += 1
+        outcomes[event.outcome.name] = outcomes.get(event.outcome.name, 0) + 1
+        key = event.command.hex()
+        commands[key] = commands.get(key, 0) + 1
+        if event.ok:
+            latencies.append(event.latency_ms)
+        else:
+            failed += 1
+    latencies.sort()
+    return {
+        'total': total,
+        'outcomes': outcomes,
+        'commands': commands,
+        'error_rate': failed / total if total else 0.0,
+        'latency_ms': _nearest_rank(latencies, (50, 90, 99)),
+    }
+
+
+# Global event log instance
+wms_event_log = EventLogWriter(os.getenv("WMS_EVENT_LOG", "logs/wms_events.bin"))
+atexit.register(wms_event_log.close)
+
+
+if __name__ == "__main__":
+    import sys
+
+    log_path = sys.argv[1] if len(sys.argv) > 1 else "logs/wms_events.bin"
+    with EventLogReader(log_path) as reader:
+        report = summarize(reader.iter_events())
+        print(f"Events: {report['total']} ({', '.join(reader.controllers) or 'no controllers'})")
+        print(f"Outcomes: {report['outcomes']}")
+        print(f"Commands: {report['commands']}")
+        print(f"Error rate: {report['error_rate']:.2%}")
+        print(f"Latency (ms): {report['latency_ms']}")
@@ -0,0 +1,168 @@
+"""
+Bounded LRU caches keyed by raw status frames
+
+The controller answers with the same 20 bytes for long stretches, so views
+derived from a frame (the detailed table, validation, safety assessment)
+are computed once per distinct frame and reused until the frame changes.
+Each view has its own cache, and parsed statuses are keyed by their field
+names as well as their values or frame (see status_key), so statuses
+decoded by different parsers never share an entry. Cached values are
+shared between reruns and sessions and must be treated as read-only by
+callers.
+
+FrameInterner applies the same idea to decoding itself: every distinct
+frame is decoded once and all holders (history entries, sessions,
+subscribers) share one read-only status mapping. Status frames are
+interned on frame_key(), so polls that differ only in the message counter
+share the decoded fields; the counter itself is decoded from each frame.
+"""
+
+import threading
+from collections import ChainMap, OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from utils.metrics import metrics
+
+
+# Byte 4 counts received messages and changes on every poll
+COUNTER_BYTE = 4
+
+
+def frame_key(frame: bytes) -> bytes:
+    """Frame bytes that describe the installation (all but the message counter)"""
+    return frame[:COUNTER_BYTE] + frame[COUNTER_BYTE + 1:]
+
+
+def status_key(status: Mapping[str, Any]) -> Optional[Hashable]:
+    """
+    Cache key of a parsed status
+
+    Statuses that carry their raw frame ('raw_response') are keyed by their
+    field names (which identify the parser that built it) and that frame;
+    others by their (field, value) pairs.
+
+    Returns:
+        Optional[Hashable]: Key, or None when the status cannot be keyed
+    """
+    raw = status.get('raw_response')
+    if raw:
+        return tuple(status), bytes(raw)
+    key = tuple(status.items())
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class FrameCache:
+    """Thread-safe LRU of frame (or status_key) -> derived value"""
+
+    def __init__(self, name: str, maxsize: int = 128):
+        """
+        Initialize cache
+
+        Args:
+            name (str): Cache name (metrics label)
+            maxsize (int): Distinct frames kept
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._m_hits = metrics.counter("wms_frame_cache_hits_total", "Frame cache hits", cache=name)
+        self._m_misses = metrics.counter("wms_frame_cache_misses_total", "Frame cache misses", cache=name)
+
+    def get(self, frame: Optional[Hashable], compute: Callable[[], Any]) -> Any:
+        """
+        Cached value for a frame, computing it on a miss
+
+        Args:
+            frame (Optional[Hashable]): Raw frame or status_key (None = not cacheable, always computed)
+            compute (Callable): Builds the value; must depend only on the key
+
+        Returns:
+            Any: Cached or freshly computed value
+        """
+        if frame is None:
+            return compute()
+        with self._lock:
+            if frame in self._entries:
+                self._entries.move_to_end(frame)
+                self._m_hits.inc()
+                return self._entries[frame]
+        value = compute()
+        self._m_misses.inc()
+        with self._lock:
+            self._entries[frame] = value
+            self._entries.move_to_end(frame)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FrameInterner:
+    """Read-only decoded status per frame, sharing the decode between equal frames"""
+
+    def __init__(self, name: str, decode: Callable[[bytes], Dict[str, Any]], maxsize: int = 1024,
+                 key: Optional[Callable[[bytes], bytes]] = None,
+                 own_fields: Optional[Callable[[bytes], Dict[str, Any]]] = None):
+        """
+        Initialize interner
+
+        Args:
+            name (str): Cache name (metrics label)
+            decode (Callable): Frame decoder; must depend only on the frame
+            maxsize (int): Distinct keys kept (least recently seen are evicted)
+            key (Optional[Callable]): Bytes that identify a frame (default: the
+                whole frame); frames with equal keys share one decode
+            own_fields (Optional[Callable]): Decodes the fields that differ
+                between frames with equal keys; they are always taken from
+                the frame being interned, never from the shared entry
+        """
+        self._decode = decode
+        self._key = key
+        self._own_fields = own_fields
+        self._cache = FrameCache(name, maxsize)
+
+    def _shared(self, frame: bytes) -> Dict[str, Any]:
+        status = self._decode(frame)
+        if self._own_fields is not None:
+            # Placeholders keep the field order; the values come from each frame
+            for field in self._own_fields(frame):
+                if field in status:
+                    status[field] = None
+        return status
+
+    def intern(self, frame: bytes) -> Tuple[bytes, Mapping[str, Any]]:
+        """
+        Decoded form of a frame
+
+        Args:
+            frame (bytes): Raw frame
+
+        Returns:
+            Tuple[bytes, Mapping]: The frame (as bytes) and its decoded status,
+            read-only (copy with dict() to modify). Without own_fields the
+            pair is shared by all equal frames; with them, the decoded fields
+            are shared and the own fields are this frame's.
+        """
+        frame = bytes(frame)
+        if self._key is None:
+            return self._cache.get(frame, lambda: (frame, MappingProxyType(self._decode(frame))))
+        shared = self._cache.get(self._key(frame), lambda: self._shared(frame))
+        if self._own_fields is None:
+            return frame, MappingProxyType(shared)
+        return frame, MappingProxyType(ChainMap(self._own_fields(frame), shared))
+
+    def __len__(self) -> int:
+        return len(self._cache)
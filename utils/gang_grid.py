@@ -0,0 +1,96 @@
+"""
+Static gang-grid component (static/gang_grid.html)
+
+The grid is plain HTML/JS/SVG: it is drawn once and then updated with the
+32-bit lighting word (bytes 10-13 of the status frame, bit 0 = aisle 1),
+either from a server-sent event stream (api_gateway /lighting) or by a
+postMessage from a sibling frame. An update is 8 hex characters and only
+the gangs whose bit flipped change a class attribute.
+
+Dashboards embed the grid with a constant document so Streamlit keeps the
+same iframe across reruns; without a stream they add the tiny
+render_lighting_push() document next to it, which is the only part that
+changes with the word.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+GANG_GRID_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "static", "gang_grid.html")
+GANG_GRID_HEIGHT = 380  # pixels when embedded with st.components.v1.html
+LIGHTING_PUSH_HEIGHT = 0  # the push document has no visible content
+
+_CONFIG_PLACEHOLDER = "/*GANG_GRID_CONFIG*/{}"
+
+
+@lru_cache(maxsize=1)
+def _template() -> str:
+    with open(GANG_GRID_PATH, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def lighting_word(aisle_lighting: Dict[int, bool]) -> int:
+    """
+    Pack an aisle -> lit mapping (as decoded by enhanced_response_parser)
+    back into the 32-bit lighting word
+
+    Args:
+        aisle_lighting (Dict[int, bool]): Aisle number (1-32) -> lit
+
+    Returns:
+        int: Lighting word, bit 0 = aisle 1
+    """
+    word = 0
+    for aisle, lit in aisle_lighting.items():
+        if lit and 1 <= aisle <= 32:
+            word |= 1 << (aisle - 1)
+    return word
+
+
+def frame_lighting_word(frame: bytes) -> int:
+    """Lighting word from a raw 20-byte status frame"""
+    return int.from_bytes(frame[10:14], "little")
+
+
+@lru_cache(maxsize=64)
+def render_gang_grid(word: int = 0, stream_url: Optional[str] = None) -> str:
+    """
+    Component HTML with its initial state
+
+    Args:
+        word (int): Initial lighting word
+        stream_url (Optional[str]): SSE URL pushing lighting words (e.g. http://revpi:8080/lighting)
+
+    Returns:
+        str: Self-contained HTML document
+    """
+    config: Dict[str, Any] = {"word": word}
+    if stream_url:
+        config["stream"] = stream_url
+    return _template().replace(_CONFIG_PLACEHOLDER, json.dumps(config), 1)
+
+
+@lru_cache(maxsize=64)
+def render_lighting_push(word: int) -> str:
+    """
+    Document that pushes a lighting word to the gang grids on the parent page
+
+    The word is posted to every sibling frame and left on the parent window,
+    where a grid embedded later picks it up on load.
+
+    Args:
+        word (int): Lighting word
+
+    Returns:
+        str: Self-contained HTML document (embed with height LIGHTING_PUSH_HEIGHT)
+    """
+    return (
+        "<script>(function () {"
+        "var word = %d, host = window.parent;"
+        "try { host.gangGridWord = word; } catch (e) {}"
+        "for (var i = 0; i < host.frames.length; i++) host.frames[i].postMessage({lightingWord: word}, \"*\");"
+        "})();</script>" % (word & 0xFFFFFFFF)
+    )
@@ -1,83 +1,384 @@
 """
 Logging utilities for WMS system
+
+Records are handed to a queue on the calling thread and formatted/written
+by a single background writer thread, so disk I/O on SD-card backed
+RevPi devices never adds latency to command handling.
 """
 
+import atexit
 import logging
 import os
-from datetime import datetime
-from typing import Optional
+import queue
+import threading
+import time
+import traceback
+from logging.handlers import QueueHandler
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer per log file assumed
+    fcntl = None
+
+# Writer tuning defaults
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0          # seconds
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024   # 5 MB per log file
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_ROTATE_INTERVAL = 24 * 3600   # rotate at least once a day
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that defers message formatting to the writer thread
+
+    The stdlib QueueHandler formats every record on the calling thread
+    before enqueueing it. We keep the raw msg/args so the f-string cost
+    is only paid for records that are actually written. Callers must not
+    mutate objects passed as log arguments after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return the record unchanged (formatting happens in the writer)"""
+        return record
+
+
+class BatchingRotatingFileHandler(logging.Handler):
+    """
+    File handler that buffers formatted records and writes them in batches
+
+    The file is rotated when it would grow beyond max_bytes or when it is
+    older than rotate_interval seconds, whichever comes first. Rotation
+    follows the RotatingFileHandler naming scheme (wms.log.1, wms.log.2...).
+
+    Several processes (Streamlit workers, wms_service) share one log file.
+    Each batch is written, and the file rotated, under an exclusive lock on
+    <log>.lock; a writer whose file was rotated by another process reopens
+    the new one before writing.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 backup_count: int = DEFAULT_BACKUP_COUNT,
+                 rotate_interval: Optional[float] = DEFAULT_ROTATE_INTERVAL,
+                 auto_flush: bool = False):
+        """
+        Initialize batching file handler
+
+        Args:
+            filename (str): Path to log file
+            max_bytes (int): Rotate when the file would exceed this size (0 = never)
+            backup_count (int): Number of rotated files to keep
+            rotate_interval (Optional[float]): Rotate after this many seconds (None = never)
+            auto_flush (bool): Write every record immediately (synchronous mode)
+        """
+        super().__init__()
+        self.filename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.auto_flush = auto_flush
+        self._buffer: List[str] = []
+        self._stream = None
+        self._opened_at = 0.0
+        self._lock_file = None
+
+    def _open(self):
+        """Open the log file in append mode"""
+        self._stream = open(self.filename, "a", encoding="utf-8")
+        # Age counts from when this handler opened the file; the mtime of an
+        # appended file moves with every write and would never age out
+        self._opened_at = time.time()
+
+    def _lock_writers(self):
+        """Exclusive lock shared with other processes writing this log (POSIX only)"""
+        if fcntl is None:
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.filename + ".lock", "a")
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_writers(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _rotated_elsewhere(self) -> bool:
+        """True when another process rotated or removed the open file"""
+        try:
+            return os.stat(self.filename).st_ino != os.fstat(self._stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def emit(self, record: logging.LogRecord):
+        """Format record and add it to the pending batch"""
+        try:
+            self._buffer.append(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+            return
+        if self.auto_flush:
+            self.flush()
+
+    def _should_rollover(self, pending: int) -> bool:
+        """Check size and age limits for the current file"""
+        # Other processes append too: use the file's size, not our position
+        size = os.fstat(self._stream.fileno()).st_size
+        if self.max_bytes > 0 and size + pending > self.max_bytes:
+            return size > 0
+        if self.rotate_interval and time.time() - self._opened_at >= self.rotate_interval:
+            return size > 0
+        return False
+
+    def _do_rollover(self):
+        """Close the current file and shift backups"""
+        self._stream.close()
+        self._stream = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.filename}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.filename}.{i + 1}")
+            os.replace(self.filename, f"{self.filename}.1")
+        else:
+            os.remove(self.filename)
+        self._open()
+
+    def flush(self):
+        """Write the pending batch with a single write call (kept for a retry if it fails)"""
+        self.acquire()
+        try:
+            if not self._buffer:
+                return
+            data = "".join(self._buffer)
+            self._lock_writers()
+            try:
+                if self._stream is not None and self._rotated_elsewhere():
+                    self._stream.close()
+                    self._stream = None
+                if self._stream is None:
+                    self._open()
+                if self._should_rollover(len(data)):
+                    self._do_rollover()
+                self._stream.write(data)
+                self._stream.flush()
+            finally:
+                self._unlock_writers()
+            self._buffer.clear()
+        except Exception:
+            # Reopen on the next flush rather than reuse a stream in an unknown state
+            self._discard_stream()
+            if logging.raiseExceptions:
+                traceback.print_exc()
+        finally:
+            self.release()
+
+    def _discard_stream(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+    def close(self):
+        """Flush remaining records and close the file"""
+        try:
+            self.flush()
+            if self._stream:
+                self._stream.close()
+                self._stream = None
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+        finally:
+            super().close()
+
+
+class BatchQueueListener:
+    """
+    Background writer draining a log queue in batches
+
+    Works like logging.handlers.QueueListener, but handlers are only
+    flushed once batch_size records are pending or flush_interval seconds
+    have passed since the first pending record, so a burst of records
+    becomes a single disk write.
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize listener
+
+        Args:
+            log_queue (queue.Queue): Queue fed by a LazyQueueHandler
+            handlers (logging.Handler): Target handlers
+            batch_size (int): Maximum records per batch
+            flush_interval (float): Maximum seconds a record may stay buffered
+        """
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._monitor, name="wms-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the writer thread after all queued records are written"""
+        if self._thread:
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+    def _handle(self, record: logging.LogRecord):
+        """Dispatch a record to all handlers honouring their levels"""
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _flush_all(self):
+        """Flush all handlers"""
+        for handler in self.handlers:
+            handler.flush()
+
+    def _monitor(self):
+        """Writer loop: collect records until the batch is full or the interval expires"""
+        pending = 0
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = False
+
+            if record is self._sentinel:
+                self._flush_all()
+                return
+
+            if record is not False:
+                self._handle(record)
+                pending += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._flush_all()
+                pending = 0
+                deadline = None
+
 
 class WMSLogger:
     """Custom logger for WMS application"""
-    
-    def __init__(self, name: str = "WMS", log_file: Optional[str] = None):
+
+    def __init__(self, name: str = "WMS", log_file: Optional[str] = None,
+                 async_mode: Optional[bool] = None):
         """
         Initialize logger
-        
+
         Args:
             name (str): Logger name
             log_file (Optional[str]): Path to log file
+            async_mode (Optional[bool]): Write through the background writer
+                (default: enabled unless WMS_LOG_SYNC=1)
         """
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
-        
+        # Records are written by our own handlers only; propagating them would
+        # format and print each one again, synchronously, via the root logger
+        self.logger.propagate = False
+        self.listener: Optional[BatchQueueListener] = None
+
+        if async_mode is None:
+            async_mode = os.getenv("WMS_LOG_SYNC", "0") != "1"
+
         # Prevent duplicate handlers
         if not self.logger.handlers:
             # Console handler
             console_handler = logging.StreamHandler()
             console_handler.setLevel(logging.INFO)
-            
+
             # Formatter
             formatter = logging.Formatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
-            
+            handlers: List[logging.Handler] = [console_handler]
+
             # File handler (optional)
             if log_file:
-                os.makedirs(os.path.dirname(log_file), exist_ok=True)
-                file_handler = logging.FileHandler(log_file)
+                log_dir = os.path.dirname(log_file)
+                if log_dir:
+                    os.makedirs(log_dir, exist_ok=True)
+                file_handler = BatchingRotatingFileHandler(
+                    log_file,
+                    max_bytes=int(os.getenv("WMS_LOG_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    backup_count=int(os.getenv("WMS_LOG_BACKUPS", DEFAULT_BACKUP_COUNT)),
+                    auto_flush=not async_mode
+                )
                 file_handler.setLevel(logging.DEBUG)
                 file_handler.setFormatter(formatter)
-                self.logger.addHandler(file_handler)
-    
-    def info(self, message: str):
+                handlers.append(file_handler)
+
+            if async_mode:
+                log_queue: queue.Queue = queue.Queue(-1)
+                self.logger.addHandler(LazyQueueHandler(log_queue))
+                self.listener = BatchQueueListener(log_queue, *handlers)
+                self.listener.start()
+                atexit.register(self.close)
+            else:
+                for handler in handlers:
+                    self.logger.addHandler(handler)
+
+    def close(self):
+        """Flush pending records and stop the background writer"""
+        if self.listener:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
+    def info(self, message: str, *args):
         """Log info message"""
-        self.logger.info(message)
-    
-    def warning(self, message: str):
+        self.logger.info(message, *args)
+
+    def warning(self, message: str, *args):
         """Log warning message"""
-        self.logger.warning(message)
-    
-    def error(self, message: str):
+        self.logger.warning(message, *args)
+
+    def error(self, message: str, *args):
         """Log error message"""
-        self.logger.error(message)
-    
-    def debug(self, message: str):
+        self.logger.error(message, *args)
+
+    def debug(self, message: str, *args):
         """Log debug message"""
-        self.logger.debug(message)
-    
+        self.logger.debug(message, *args)
+
     def log_connection(self, host: str, port: int, success: bool):
         """Log connection attempt"""
-        status = "successful" if success else "failed"
-        self.info(f"Connection to {host}:{port} {status}")
-    
+        self.info("Connection to %s:%s %s", host, port, "successful" if success else "failed")
+
     def log_command(self, command: int, response_length: Optional[int] = None):
         """Log command sending"""
         if response_length is not None:
-            self.info(f"Command {command} sent, {response_length} bytes received")
+            self.info("Command %s sent, %s bytes received", command, response_length)
         else:
-            self.warning(f"Command {command} sent, no response")
-    
+            self.warning("Command %s sent, no response", command)
+
     def log_status_update(self, status_summary: str):
         """Log status update"""
-        self.info(f"Status update: {status_summary}")
-    
+        self.info("Status update: %s", status_summary)
+
     def log_alarm(self, alarm_type: str):
         """Log alarm"""
-        self.error(f"ALARM: {alarm_type}")
+        self.error("ALARM: %s", alarm_type)
 
 # Global logger instance
 wms_logger = WMSLogger("WMS-App", "logs/wms.log")
@@ -0,0 +1,334 @@
+"""
+Lightweight metrics registry for the WMS client stack
+
+Counters, gauges and HDR-style latency histograms that can be left in the
+hot path: when the registry is disabled every update is a single
+attribute check. Enable with WMS_METRICS=1 or metrics.enable().
+
+Usage:
+    from utils.metrics import metrics
+
+    commands = metrics.counter("wms_tcp_commands_total", "Commands sent", controller="1.1.1.2:2000")
+    latency = metrics.histogram("wms_tcp_command_seconds", "Command round trip")
+
+    commands.inc()
+    with latency.time():
+        ...
+
+    metrics.snapshot()
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Sub-buckets per power of two; relative bucket error is 1 / (2 * SUB_BUCKETS)
+SUB_BUCKETS = 16
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Instrument:
+    """Base class for all instruments"""
+
+    kind = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labels: LabelKey):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.name = name
+        self.help = help_text
+        self.labels = dict(labels)
+
+
+class Counter(_Instrument):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        """Increase counter by amount"""
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> Dict[str, float]:
+        return {'value': self.value}
+
+
+class Gauge(_Instrument):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.value = 0.0
+
+    def set(self, value: float):
+        """Set gauge to value"""
+        if not self._registry.enabled:
+            return
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        """Increase gauge by amount"""
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        """Decrease gauge by amount"""
+        self.inc(-amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {'value': self.value}
+
+
+class _Timer:
+    """Context manager recording elapsed seconds into a histogram"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: "Histogram"):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    """Shared no-op timer used while metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram(_Instrument):
+    """
+    HDR-style histogram with log-linear buckets
+
+    Each power of two is split into SUB_BUCKETS linear buckets, so any
+    recorded value is reproduced within ~3% regardless of scale (micro-
+    seconds for parsing, seconds for connects) without configuring bounds.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket_index(value: float) -> int:
+        """Map a value to its log-linear bucket index (buckets are (lower, upper])"""
+        if value <= 0:
+            return -(1 << 30)
+        mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+        # A value on a bucket edge belongs to the bucket it closes, so
+        # "count of values <= upper bound" is exact for edge bounds (1.0, 2.5, ...)
+        return exponent * SUB_BUCKETS + math.ceil((mantissa - 0.5) * 2 * SUB_BUCKETS) - 1
+
+    @staticmethod
+    def _bucket_upper(index: int) -> float:
+        """Upper bound of a bucket"""
+        if index == -(1 << 30):
+            return 0.0
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        return math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+
+    def observe(self, value: float):
+        """Record a value"""
+        if not self._registry.enabled:
+            return
+        index = self._bucket_index(value)
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def time(self):
+        """Context manager timing the enclosed block in seconds"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self)
+
+    def percentile(self, p: float) -> float:
+        """
+        Approximate percentile
+
+        Args:
+            p (float): Percentile (0-100)
+
+        Returns:
+            float: Bucket upper bound containing the percentile (0.0 if empty)
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, math.ceil(p / 100.0 * self.count))
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= target:
+                    return min(self._bucket_upper(index), self.max)
+            return self.max
+
+    def cumulative_buckets(self, bounds: Sequence[float]) -> List[Tuple[float, int]]:
+        """
+        Cumulative counts for fixed upper bounds (for exporters)
+
+        Args:
+            bounds (Sequence[float]): Sorted upper bounds
+
+        Returns:
+            List[Tuple[float, int]]: (bound, count of values <= bound)
+        """
+        with self._lock:
+            items = sorted(self._buckets.items())
+            largest = self.max
+        result = []
+        seen = 0
+        i = 0
+        for bound in bounds:
+            # Every value of a bucket is <= its upper bound and <= the largest observation
+            while i < len(items) and min(self._bucket_upper(items[i][0]), largest) <= bound:
+                seen += items[i][1]
+                i += 1
+            result.append((bound, seen))
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """Registry holding all instruments by name and labels"""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize registry
+
+        Args:
+            enabled (bool): Record updates (disabled instruments are no-ops)
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._instruments: Dict[Tuple[str, LabelKey], _Instrument] = {}
+
+    def enable(self):
+        """Start recording updates"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording updates"""
+        self.enabled = False
+
+    def _get(self, cls, name: str, help_text: str, labels: Dict[str, str]):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        instrument = self._instruments.get(key)
+        if instrument is None:
+            with self._lock:
+                instrument = self._instruments.get(key)
+                if instrument is None:
+                    instrument = cls(self, name, help_text, key[1])
+                    self._instruments[key] = instrument
+        if not isinstance(instrument, cls):
+            raise ValueError(f"Metric {name} already registered as {instrument.kind}")
+        return instrument
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        """Get or create a counter"""
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", **labels) -> Gauge:
+        """Get or create a gauge"""
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str = "", **labels) -> Histogram:
+        """Get or create a histogram"""
+        return self._get(Histogram, name, help_text, labels)
+
+    def instruments(self) -> Iterable[_Instrument]:
+        """All registered instruments, sorted by name"""
+        with self._lock:
+            items = list(self._instruments.items())
+        return [instrument for _, instrument in sorted(items, key=lambda item: item[0])]
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """
+        Point-in-time copy of all metrics
+
+        Returns:
+            Dict: metric name -> list of {'type', 'labels', values...}
+        """
+        result: Dict[str, List[Dict]] = {}
+        for instrument in self.instruments():
+            entry = {'type': instrument.kind, 'labels': dict(instrument.labels)}
+            entry.update(instrument.snapshot())
+            result.setdefault(instrument.name, []).append(entry)
+        return result
+
+    def reset(self):
+        """Remove all instruments"""
+        with self._lock:
+            self._instruments.clear()
+
+
+def find(snapshot: Dict[str, List[Dict]], name: str, **labels) -> Optional[Dict]:
+    """
+    Look up one series in a snapshot
+
+    Args:
+        snapshot (Dict): Result of MetricsRegistry.snapshot()
+        name (str): Metric name
+        labels: Label values that must match
+
+    Returns:
+        Optional[Dict]: Matching entry or None
+    """
+    for entry in snapshot.get(name, []):
+        if all(entry['labels'].get(k) == str(v) for k, v in labels.items()):
+            return entry
+    return None
+
+
+# Global registry instance
+metrics = MetricsRegistry(enabled=os.getenv("WMS_METRICS", "0") == "1")
@@ -0,0 +1,192 @@
+"""
+Prometheus text-format exporter for the WMS metrics registry
+
+Serves GET /metrics (text exposition format 0.0.4) and GET /health from a
+small daemon thread, so monitoring can scrape PLC reachability, poll and
+command statistics without rendering the Streamlit UI. /health answers
+200 while the PLC connection is up and 503 otherwise.
+
+    python -m utils.metrics_exporter        # standalone on METRICS_PORT
+"""
+
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.metrics import Histogram, MetricsRegistry, metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9108
+
+# Histogram bucket bounds in seconds (network round trips and render times)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict, extra: Optional[dict] = None) -> str:
+    """Render {k="v",...} (empty string when there are no labels)"""
+    items = dict(labels)
+    if extra:
+        items.update(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_prometheus(registry: MetricsRegistry = metrics, buckets=DEFAULT_BUCKETS) -> str:
+    """
+    Render all instruments in Prometheus text format
+
+    Args:
+        registry (MetricsRegistry): Registry to export
+        buckets: Histogram bucket upper bounds
+
+    Returns:
+        str: Exposition text
+    """
+    lines: List[str] = []
+    seen_names = set()
+    for instrument in registry.instruments():
+        if instrument.name not in seen_names:
+            seen_names.add(instrument.name)
+            if instrument.help:
+                lines.append(f"# HELP {instrument.name} {instrument.help}")
+            lines.append(f"# TYPE {instrument.name} {instrument.kind}")
+
+        if isinstance(instrument, Histogram):
+            for bound, count in instrument.cumulative_buckets(buckets):
+                lines.append(f"{instrument.name}_bucket{_format_labels(instrument.labels, {'le': _format_value(bound)})} {count}")
+            lines.append(f"{instrument.name}_bucket{_format_labels(instrument.labels, {'le': '+Inf'})} {instrument.count}")
+            lines.append(f"{instrument.name}_sum{_format_labels(instrument.labels)} {_format_value(instrument.sum)}")
+            lines.append(f"{instrument.name}_count{_format_labels(instrument.labels)} {instrument.count}")
+        else:
+            lines.append(f"{instrument.name}{_format_labels(instrument.labels)} {_format_value(instrument.value)}")
+    return "\n".join(lines) + "\n"
+
+
+def connection_health(registry: MetricsRegistry = metrics) -> Dict[str, Any]:
+    """
+    Health from the wms_tcp_connected gauges
+
+    Returns:
+        Dict: 'ok' (a controller connection is up, or none was configured yet)
+        and 'connections' ({"controller/channel": connected})
+    """
+    connections = {
+        f"{instrument.labels.get('controller')}/{instrument.labels.get('channel')}": bool(instrument.value)
+        for instrument in registry.instruments() if instrument.name == "wms_tcp_connected"
+    }
+    return {'ok': not connections or any(connections.values()), 'connections': connections}
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """HTTP handler serving /metrics and /health"""
+
+    registry: MetricsRegistry = metrics
+    health: Optional[Callable[[], Dict[str, Any]]] = None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        code = 200
+        if path == "/metrics":
+            body = render_prometheus(self.registry).encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/health":
+            state = self.health() if self.health is not None else connection_health(self.registry)
+            code = 200 if state.get('ok') else 503
+            body = json.dumps(state).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep scrapes out of the application log"""
+        logger.debug("metrics %s - %s", self.address_string(), format % args)
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "0.0.0.0",
+                         registry: MetricsRegistry = metrics,
+                         health: Optional[Callable[[], Dict[str, Any]]] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Start the exporter in a daemon thread (once per process)
+
+    Streamlit re-executes the app script on every interaction, so repeated
+    calls return the already running server.
+
+    Args:
+        port (Optional[int]): Listen port (default METRICS_PORT or 9108)
+        host (str): Listen address
+        registry (MetricsRegistry): Registry to export (enabled on start)
+        health (Optional[Callable]): Returns the /health state with an 'ok' key
+            (default: connection_health of the registry)
+
+    Returns:
+        Optional[ThreadingHTTPServer]: Running server, or None if the port is unavailable
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        if port is None:
+            port = int(os.getenv("METRICS_PORT", DEFAULT_PORT))
+
+        handler = type("BoundMetricsHandler", (MetricsHandler,),
+                       {"registry": registry, "health": staticmethod(health) if health else None})
+        try:
+            server = ThreadingHTTPServer((host, port), handler)
+        except OSError as e:
+            logger.error("Metrics exporter could not bind %s:%s: %s", host, port, e)
+            return None
+        server.daemon_threads = True
+
+        registry.enable()
+        thread = threading.Thread(target=server.serve_forever, name="wms-metrics-exporter", daemon=True)
+        thread.start()
+        logger.info("Metrics exporter listening on %s:%s", host, server.server_address[1])
+        _server = server
+        return server
+
+
+def stop_metrics_server():
+    """Stop the exporter started by start_metrics_server"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
+
+
+if __name__ == "__main__":
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+    if start_metrics_server() is not None:
+        while True:
+            time.sleep(3600)
@@ -0,0 +1,79 @@
+"""
+Templated status cards for the Streamlit dashboards
+
+Each dashboard section (a row of metric cards, the alert list) is rendered
+as one HTML block from precompiled templates, so a section costs a single
+st.markdown element instead of one per card. Rendering is memoized on the
+section's inputs: an unchanged section returns the identical string without
+formatting again, and the browser keeps its DOM (no reflow) because the
+element content did not change.
+"""
+
+from functools import lru_cache
+from html import escape
+from string import Template
+from typing import NamedTuple, Sequence, Tuple
+
+_CARD = Template(
+    '<div class="metric-card">'
+    '<h4 style="margin: 0; color: $color;">$title</h4>'
+    '<p style="margin: 0.5rem 0 0 0; font-size: $size; font-weight: bold;">$value</p>'
+    '</div>'
+)
+_ROW = Template(
+    '<div style="display: grid; grid-template-columns: repeat($columns, minmax(0, 1fr)); '
+    'gap: 1rem; margin-bottom: 1rem;">$cards</div>'
+)
+_ALERT = Template(
+    '<div style="background: $background; color: white; padding: 1rem; border-radius: 5px; margin: 0.5rem 0;">'
+    '$icon <strong>$label:</strong> $message</div>'
+)
+
+
+class Card(NamedTuple):
+    """One metric card (hashable, so sections can be memoized)"""
+    title: str
+    value: str
+    color: str
+    size: str = "1.2rem"
+
+
+@lru_cache(maxsize=256)
+def _render_row(cards: Tuple[Card, ...]) -> str:
+    body = "".join(
+        _CARD.substitute(title=escape(card.title), value=escape(card.value), color=card.color, size=card.size)
+        for card in cards
+    )
+    return _ROW.substitute(columns=len(cards), cards=body)
+
+
+def render_card_row(cards: Sequence[Card]) -> str:
+    """
+    HTML for a row of cards in one block
+
+    Args:
+        cards (Sequence[Card]): Cards left to right
+
+    Returns:
+        str: HTML for st.markdown(..., unsafe_allow_html=True)
+    """
+    return _render_row(tuple(cards))
+
+
+@lru_cache(maxsize=256)
+def _render_alerts(errors: Tuple[str, ...], warnings: Tuple[str, ...]) -> str:
+    parts = [_ALERT.substitute(background="#e74c3c", icon="🚨", label="Error", message=escape(error))
+             for error in errors]
+    parts += [_ALERT.substitute(background="#f39c12", icon="⚠️", label="Warning", message=escape(warning))
+              for warning in warnings]
+    return "".join(parts)
+
+
+def render_alerts(errors: Sequence[str], warnings: Sequence[str]) -> str:
+    """
+    HTML for all validation errors and warnings in one block
+
+    Returns:
+        str: HTML, empty if there is nothing to show
+    """
+    return _render_alerts(tuple(errors), tuple(warnings))
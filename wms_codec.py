@@ -0,0 +1,246 @@
+"""
+Wire codec for Mobile Racking communication
+
+Two framings are in use:
+
+    native  2-byte requests ((0, 2) status, (aisle, 1) open aisle) answered
+            by fixed 20-byte status frames
+    legacy  STX LEN CMD DATA... CHK ETX, where LEN counts CMD + DATA and
+            CHK is the XOR of LEN, CMD and DATA
+
+The streaming decoders accept arbitrary chunks from recv() (partial or
+several frames at once) and return complete frames, so one connection
+can carry many requests back to back.
+"""
+
+import struct
+from dataclasses import dataclass
+from enum import Enum
+from typing import List
+
+FRAME_SIZE = 20
+
+STX = 0x02
+ETX = 0x03
+LEGACY_OPEN_AISLE = 0x4F  # 'O'
+LEGACY_OVERHEAD = 4       # STX, LEN, CHK, ETX
+LEGACY_MAX_LENGTH = 64    # larger LEN values are treated as noise
+
+
+class Framing(str, Enum):
+    """Framing variant spoken by a controller"""
+    NATIVE = "native"
+    LEGACY = "legacy"
+
+
+@dataclass(frozen=True)
+class LegacyFrame:
+    """Decoded STX/ETX frame"""
+    command: int
+    data: bytes
+
+    def encode(self) -> bytes:
+        return encode_legacy(self.command, self.data)
+
+
+def encode_command(command: int) -> bytes:
+    """
+    Encode a command number into its 2-byte native wire format
+
+    Args:
+        command (int): Command number (0=status, 1-19=open aisle)
+
+    Returns:
+        bytes: (0,2) for status, (aisle,1) for open aisle,
+               little-endian word for legacy/custom commands
+    """
+    if command == 0:
+        # Status request: first byte = 0, second byte = 2
+        return struct.pack('BB', 0, 2)
+    if 1 <= command <= 19:
+        # Open aisle: first byte = aisle number, second byte = 1
+        return struct.pack('BB', command, 1)
+    # Custom command (fallback to old format)
+    return struct.pack('<H', command)
+
+
+def decode_command(request: bytes) -> int:
+    """
+    Inverse of encode_command for a 2-byte native request
+
+    Args:
+        request (bytes): 2 bytes as sent by a client
+
+    Returns:
+        int: Command number (0=status, 1-19=open aisle, else legacy word)
+    """
+    first, second = request[0], request[1]
+    if first == 0 and second == 2:
+        return 0
+    if second == 1 and 1 <= first <= 19:
+        return first
+    return struct.unpack('<H', request)[0]
+
+
+def is_status_frame(frame: bytes) -> bool:
+    """
+    Plausibility check for a 20-byte status frame
+
+    Rejects replies from other services (e.g. S7 on port 102) that happen
+    to be 20 bytes long: the command byte must be 0-19 and the reserved
+    bits (1.2-1.7, 5.7, 9.5-9.7) must be clear.
+    """
+    return (len(frame) == FRAME_SIZE and frame[0] <= 19 and not frame[1] & 0xFC
+            and not frame[5] & 0x80 and not frame[9] & 0xE0)
+
+
+def xor_checksum(data: bytes) -> int:
+    """XOR of all bytes"""
+    checksum = 0
+    for byte in data:
+        checksum ^= byte
+    return checksum
+
+
+def encode_legacy(command: int, data: bytes = b"") -> bytes:
+    """
+    Build a legacy STX LEN CMD DATA CHK ETX frame
+
+    Args:
+        command (int): Command byte (e.g. 0x4F 'O' = open aisle)
+        data (bytes): Payload bytes
+
+    Returns:
+        bytes: Complete frame
+    """
+    length = len(data) + 1
+    if length > LEGACY_MAX_LENGTH:
+        raise ValueError(f"Legacy payload too long: {len(data)} bytes")
+    body = bytes([length, command]) + data
+    return bytes([STX]) + body + bytes([xor_checksum(body), ETX])
+
+
+def encode_legacy_open_aisle(aisle: int) -> bytes:
+    """Legacy frame opening an aisle (1-19)"""
+    if not 1 <= aisle <= 19:
+        raise ValueError(f"Aisle must be between 1 and 19, got {aisle}")
+    return encode_legacy(LEGACY_OPEN_AISLE, bytes([aisle]))
+
+
+class FixedFrameDecoder:
+    """Incremental decoder for fixed-size (20-byte) native responses"""
+
+    def __init__(self, frame_size: int = FRAME_SIZE):
+        self.frame_size = frame_size
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        Add received bytes
+
+        Args:
+            chunk (bytes): Data from recv()
+
+        Returns:
+            List[bytes]: Complete frames, oldest first (possibly empty)
+        """
+        buffer = self._buffer
+        buffer += chunk
+        size = self.frame_size
+        count = len(buffer) // size
+        if not count:
+            return []
+        end = count * size
+        frames = [bytes(buffer[i:i + size]) for i in range(0, end, size)]
+        del buffer[:end]
+        return frames
+
+    @property
+    def buffered(self) -> int:
+        """Bytes of an incomplete frame waiting for more data"""
+        return len(self._buffer)
+
+    def reset(self):
+        """Discard buffered bytes (after reconnecting)"""
+        self._buffer.clear()
+
+
+class LegacyFrameDecoder:
+    """
+    Incremental decoder for STX/ETX frames with resynchronization
+
+    Bytes before an STX are skipped. A candidate frame whose length, ETX
+    or checksum does not match is rejected by dropping only its STX byte
+    and scanning for the next one, so a corrupted frame costs at most
+    the bytes up to the next valid frame start.
+    """
+
+    def __init__(self, max_length: int = LEGACY_MAX_LENGTH):
+        self.max_length = max_length
+        self._buffer = bytearray()
+        self.checksum_errors = 0
+        self.framing_errors = 0
+        self.discarded_bytes = 0
+
+    def feed(self, chunk: bytes) -> List[LegacyFrame]:
+        """
+        Add received bytes
+
+        Args:
+            chunk (bytes): Data from recv()
+
+        Returns:
+            List[LegacyFrame]: Valid frames, oldest first (possibly empty)
+        """
+        buffer = self._buffer
+        buffer += chunk
+        frames: List[LegacyFrame] = []
+        pos = 0
+        while True:
+            start = buffer.find(STX, pos)
+            if start < 0:
+                self.discarded_bytes += len(buffer) - pos
+                pos = len(buffer)
+                break
+            self.discarded_bytes += start - pos
+            pos = start
+
+            if len(buffer) - pos < 2:
+                break
+            length = buffer[pos + 1]
+            if not 1 <= length <= self.max_length:
+                self.framing_errors += 1
+                self.discarded_bytes += 1
+                pos += 1
+                continue
+
+            end = pos + length + LEGACY_OVERHEAD
+            if len(buffer) < end:
+                break
+            if buffer[end - 1] != ETX:
+                self.framing_errors += 1
+                self.discarded_bytes += 1
+                pos += 1
+                continue
+            body = buffer[pos + 1:end - 2]
+            if xor_checksum(body) != buffer[end - 2]:
+                self.checksum_errors += 1
+                self.discarded_bytes += 1
+                pos += 1
+                continue
+
+            frames.append(LegacyFrame(body[1], bytes(body[2:])))
+            pos = end
+
+        del buffer[:pos]
+        return frames
+
+    @property
+    def buffered(self) -> int:
+        """Bytes of an incomplete frame waiting for more data"""
+        return len(self._buffer)
+
+    def reset(self):
+        """Discard buffered bytes (after reconnecting)"""
+        self._buffer.clear()
+
@@ -0,0 +1,325 @@
+"""
+Engine <-> UI IPC over a Unix domain socket
+
+One long-lived engine process owns the PLC connection and history
+(WMSService); Streamlit workers and scripts on the same host are thin
+clients. Messages are length-prefixed binary and carry raw 20-byte frames
+exactly as received from the controller (message counter included), which
+clients decode themselves (enhanced_response_parser / TCPClient).
+
+Message: <I payload length> <B type> <payload>
+
+    request              payload           reply
+    0x01 SNAPSHOT        -                 0x81 FRAME <d ts><20s frame>, or 0x80 EMPTY
+    0x02 SUBSCRIBE       -                 0x81 FRAME (if any), then 0x82 DELTA
+                                           <I seq><d ts><20s frame> per changed frame
+    0x03 COMMAND         <H cmd><d timeout> 0x83 RESULT <20s frame>, empty if no response
+    0x04 HISTORY         <d since><I limit> 0x84 SAMPLES <I n> n x <d ts><20s frame>
+                         (since NaN = all)
+    any error                              0xFF ERROR utf-8 message
+
+A SUBSCRIBE connection only receives DELTA messages afterwards; clients
+decode each frame (TCPClient.parse_status_response) and track transitions
+with their own AlarmEngine.
+
+Usage:
+    python wms_ipc.py --host 1.1.1.2 --socket /tmp/wms-engine.sock
+
+    client = IPCClient("/tmp/wms-engine.sock")
+    timestamp, frame = client.snapshot()
+"""
+
+import logging
+import math
+import os
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Iterator, List, Optional, Tuple
+
+from utils.metrics import metrics
+from wms_codec import FRAME_SIZE
+from wms_service import WMSService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = os.getenv("WMS_IPC_SOCKET", "/tmp/wms-engine.sock")
+MAX_MESSAGE = 1 << 24
+COMMAND_TIMEOUT = 10.0
+
+# Requests
+SNAPSHOT = 0x01
+SUBSCRIBE = 0x02
+COMMAND = 0x03
+HISTORY = 0x04
+# Replies
+EMPTY = 0x80
+FRAME = 0x81
+DELTA = 0x82
+RESULT = 0x83
+SAMPLES = 0x84
+ERROR = 0xFF
+
+_HEADER = struct.Struct("<IB")
+_SAMPLE = struct.Struct(f"<d{FRAME_SIZE}s")
+_DELTA = struct.Struct(f"<Id{FRAME_SIZE}s")
+_COMMAND = struct.Struct("<Hd")
+_HISTORY = struct.Struct("<dI")
+_COUNT = struct.Struct("<I")
+
+Sample = Tuple[float, bytes]
+
+_m_requests = {kind: metrics.counter("wms_ipc_requests_total", "IPC requests", kind=kind)
+               for kind in ("snapshot", "subscribe", "command", "history")}
+_m_clients = metrics.gauge("wms_ipc_clients", "Connected IPC clients")
+
+
+class IPCError(Exception):
+    """Engine replied with an error or an unexpected message"""
+
+
+def encode_message(kind: int, payload: bytes = b"") -> bytes:
+    """Frame one message"""
+    return _HEADER.pack(len(payload), kind) + payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("IPC peer closed the connection")
+        data += chunk
+    return bytes(data)
+
+
+def read_message(sock: socket.socket) -> Tuple[int, bytes]:
+    """
+    Read one message
+
+    Returns:
+        Tuple[int, bytes]: (type, payload)
+
+    Raises:
+        ConnectionError: Peer closed the connection
+        IPCError: Oversized message
+    """
+    length, kind = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    if length > MAX_MESSAGE:
+        raise IPCError(f"Message too large: {length} bytes")
+    return kind, _recv_exactly(sock, length) if length else b""
+
+
+class IPCHandler(socketserver.BaseRequestHandler):
+    """One UI client; the WMSService is attached by IPCServer"""
+
+    service: WMSService = None
+
+    def setup(self):
+        _m_clients.inc()
+
+    def finish(self):
+        _m_clients.dec()
+
+    def handle(self):
+        try:
+            while True:
+                kind, payload = read_message(self.request)
+                if kind == SUBSCRIBE:
+                    _m_requests["subscribe"].inc()
+                    self._stream()
+                    return
+                self.request.sendall(self._reply(kind, payload))
+        except (ConnectionError, OSError):
+            pass
+        except IPCError as e:
+            logger.warning("IPC client dropped: %s", e)
+
+    def _reply(self, kind: int, payload: bytes) -> bytes:
+        if kind == SNAPSHOT:
+            _m_requests["snapshot"].inc()
+            sample = self.service.snapshot()
+            if sample is None:
+                return encode_message(EMPTY)
+            return encode_message(FRAME, _SAMPLE.pack(sample[0], sample[1]))
+
+        if kind == COMMAND and len(payload) == _COMMAND.size:
+            _m_requests["command"].inc()
+            command, timeout = _COMMAND.unpack(payload)
+            try:
+                response = self.service.submit_command(command).result(timeout=timeout or COMMAND_TIMEOUT)
+            except FutureTimeout:
+                response = None
+            except Exception as e:
+                # Not the client's connection: report it instead of dropping the client
+                logger.warning("IPC command %s failed: %s", command, e)
+                return encode_message(ERROR, f"command {command} failed: {e}".encode("utf-8"))
+            return encode_message(RESULT, response or b"")
+
+        if kind == HISTORY and len(payload) == _HISTORY.size:
+            _m_requests["history"].inc()
+            since, limit = _HISTORY.unpack(payload)
+            samples = self.service.recorder.history(since=None if math.isnan(since) else since, limit=limit)
+            body = bytearray(_COUNT.pack(len(samples)))
+            for timestamp, frame, _ in samples:
+                body += _SAMPLE.pack(timestamp, frame)
+            return encode_message(SAMPLES, bytes(body))
+
+        return encode_message(ERROR, f"bad request type 0x{kind:02x} ({len(payload)} bytes)".encode("utf-8"))
+
+    def _stream(self):
+        """Snapshot, then one DELTA per changed frame until the client leaves or falls behind"""
+        subscriber = self.service.frames.subscribe()
+        try:
+            sample = self.service.snapshot()
+            if sample is not None:
+                self.request.sendall(encode_message(FRAME, _SAMPLE.pack(sample[0], sample[1])))
+            while True:
+                event = subscriber.get()
+                if event is None:
+                    return
+                self.request.sendall(encode_message(
+                    DELTA, _DELTA.pack(event['seq'], event['timestamp'], event['frame'])))
+        finally:
+            self.service.frames.unsubscribe(subscriber)
+
+
+class _IPCServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class IPCServer:
+    """Unix socket server thread exposing a WMSService"""
+
+    def __init__(self, service: WMSService, path: str = DEFAULT_SOCKET):
+        """
+        Initialize server
+
+        Args:
+            service (WMSService): Service owning the PLC connection
+            path (str): Socket path (a stale socket file is replaced)
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        handler = type("BoundIPCHandler", (IPCHandler,), {"service": service})
+        self.service = service
+        self.path = path
+        self.server = _IPCServer(path, handler)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Serve clients in a daemon thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="wms-ipc", daemon=True)
+        self._thread.start()
+        logger.info("IPC server listening on %s", self.path)
+
+    def stop(self):
+        """Stop serving and remove the socket file"""
+        self.server.shutdown()
+        self.server.server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class IPCClient:
+    """Blocking client of the engine; one request at a time per instance"""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = COMMAND_TIMEOUT + 5.0):
+        """
+        Initialize client (connects on first use)
+
+        Args:
+            path (str): Engine socket path
+            timeout (float): Socket timeout in seconds
+        """
+        self.path = path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _request(self, kind: int, payload: bytes = b"") -> Tuple[int, bytes]:
+        with self._lock:
+            if self._sock is None:
+                self._sock = self._connect()
+            try:
+                self._sock.sendall(encode_message(kind, payload))
+                reply = read_message(self._sock)
+            except OSError:
+                self.close()
+                raise
+        if reply[0] == ERROR:
+            raise IPCError(reply[1].decode("utf-8", "replace"))
+        return reply
+
+    def snapshot(self) -> Optional[Sample]:
+        """Latest (timestamp, frame) or None if the engine has no frame yet"""
+        kind, payload = self._request(SNAPSHOT)
+        if kind == EMPTY:
+            return None
+        return _SAMPLE.unpack(payload)
+
+    def submit_command(self, command: int, timeout: float = COMMAND_TIMEOUT) -> Optional[bytes]:
+        """Run a command on the engine's connection; 20-byte response or None (IPCError if it failed)"""
+        _, payload = self._request(COMMAND, _COMMAND.pack(command, timeout))
+        return payload or None
+
+    def history(self, since: Optional[float] = None, limit: int = 100) -> List[Sample]:
+        """Recorded (timestamp, frame) samples, oldest first"""
+        _, payload = self._request(HISTORY, _HISTORY.pack(math.nan if since is None else since, limit))
+        count = _COUNT.unpack_from(payload)[0]
+        return [_SAMPLE.unpack_from(payload, _COUNT.size + i * _SAMPLE.size) for i in range(count)]
+
+    def subscribe(self) -> Iterator[Tuple[int, float, bytes]]:
+        """
+        Stream of (seq, timestamp, frame) on a dedicated connection
+
+        The first item is the current frame with seq 0; the generator ends
+        when the engine drops the subscription.
+        """
+        sock = self._connect()
+        sock.settimeout(None)
+        try:
+            sock.sendall(encode_message(SUBSCRIBE))
+            while True:
+                try:
+                    kind, payload = read_message(sock)
+                except ConnectionError:
+                    return
+                if kind == FRAME:
+                    yield (0,) + _SAMPLE.unpack(payload)
+                elif kind == DELTA:
+                    yield _DELTA.unpack(payload)
+        finally:
+            sock.close()
+
+    def close(self):
+        """Close the request connection"""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the service with IPC enabled (wms_service.main, --socket defaults to WMS_IPC_SOCKET)"""
+    from wms_service import main as service_main
+    service_main(argv, defaults={'ipc_socket': DEFAULT_SOCKET})
+
+
+if __name__ == "__main__":
+    main()
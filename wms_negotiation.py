@@ -0,0 +1,409 @@
+"""
+Protocol negotiation and capability cache per controller
+
+A controller is probed once: which port answers (2000 or 2001), which
+framing it replies with, and its software version (bytes 2-3 of the
+status frame). The result is stored on disk so later connections start
+with the right settings instead of trying ports and formats again.
+
+Probing only sends the status request (0, 2); it never sends an
+open-aisle command, since that would move the racking.
+
+For sites where the address is uncertain, race_connect tries the
+configured endpoint, the last winner and any endpoints listed in
+WMS_CANDIDATES in parallel (staggered, happy-eyeballs style) and keeps the
+first connection that answers with a valid status frame.
+
+Usage:
+    from wms_negotiation import negotiate
+
+    caps = negotiate("1.1.1.2")
+    client = TCPClient(caps.host, caps.port, framing=caps.framing)
+"""
+
+import errno
+import json
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from wms_codec import FixedFrameDecoder, Framing, LegacyFrameDecoder, encode_command, is_status_frame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = (2000, 2001)
+PROBE_TIMEOUT = 3.0              # seconds per port
+CACHE_MAX_AGE = 7 * 24 * 3600    # re-probe after a week
+
+# Alternative endpoints raced besides the configured one: "host[:port],..."
+CANDIDATES = os.getenv("WMS_CANDIDATES", "")
+RACE_STAGGER = 0.1               # seconds between starting successive attempts
+RACE_TIMEOUT = 3.0               # overall budget for race_connect
+
+
+@dataclass(frozen=True)
+class ControllerCapabilities:
+    """What a controller was found to support"""
+    host: str
+    port: int
+    framing: str
+    software_version: str
+    probed_at: float
+    latency_ms: float
+
+
+class CapabilityCache:
+    """JSON file of ControllerCapabilities keyed by host (host:port for raced candidate lists)"""
+
+    def __init__(self, path: str, max_age: float = CACHE_MAX_AGE):
+        """
+        Initialize cache
+
+        Args:
+            path (str): JSON file (created on first put)
+            max_age (float): Seconds after which an entry is ignored
+        """
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable capability cache %s: %s", self.path, e)
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, host: str) -> Optional[ControllerCapabilities]:
+        """Cached capabilities for host (or key), or None if missing or stale"""
+        with self._lock:
+            entry = self._load().get(host)
+        if entry is None:
+            return None
+        try:
+            caps = ControllerCapabilities(**entry)
+        except TypeError:
+            return None
+        if time.time() - caps.probed_at > self.max_age:
+            return None
+        return caps
+
+    def put(self, caps: ControllerCapabilities, key: Optional[str] = None):
+        """Store capabilities under key (default caps.host), written to disk immediately"""
+        with self._lock:
+            self._load()[key or caps.host] = asdict(caps)
+            self._save()
+
+    def invalidate(self, host: str):
+        """Forget a controller, e.g. after its cached port stopped answering"""
+        with self._lock:
+            if self._load().pop(host, None) is not None:
+                self._save()
+
+
+def probe_port(host: str, port: int, timeout: float = PROBE_TIMEOUT) -> Optional[ControllerCapabilities]:
+    """
+    Probe one port with a status request
+
+    Args:
+        host (str): Controller IP address
+        port (int): TCP port
+        timeout (float): Connect plus response budget in seconds
+
+    Returns:
+        Optional[ControllerCapabilities]: None if the port does not answer with a status frame
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            start = time.perf_counter()
+            sock.sendall(encode_command(0))
+            native = FixedFrameDecoder()
+            legacy = LegacyFrameDecoder()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.info("Probe %s:%s: no complete status frame", host, port)
+                    return None
+                sock.settimeout(remaining)
+                chunk = sock.recv(64)
+                if not chunk:
+                    logger.info("Probe %s:%s: connection closed", host, port)
+                    return None
+                latency_ms = (time.perf_counter() - start) * 1000
+
+                # A status frame wins: its bytes can look like an STX frame by chance
+                frames = native.feed(chunk)
+                if frames and is_status_frame(frames[0]):
+                    frame = frames[0]
+                    return ControllerCapabilities(host, port, Framing.NATIVE.value,
+                                                  f"{frame[2]}.{frame[3]}", time.time(), latency_ms)
+
+                replies = legacy.feed(chunk)
+                if replies:
+                    # Only a wrapped status frame carries the version bytes
+                    data = replies[0].data
+                    version = f"{data[2]}.{data[3]}" if is_status_frame(data) else "unknown"
+                    return ControllerCapabilities(host, port, Framing.LEGACY.value, version, time.time(), latency_ms)
+    except OSError as e:
+        logger.info("Probe %s:%s failed: %s", host, port, e)
+        return None
+
+
+def probe_controller(host: str, ports: Sequence[int] = DEFAULT_PORTS,
+                     timeout: float = PROBE_TIMEOUT) -> Optional[ControllerCapabilities]:
+    """
+    Probe ports in order and return the first that answers
+
+    Args:
+        host (str): Controller IP address
+        ports (Sequence[int]): Candidate ports
+        timeout (float): Budget per port in seconds
+
+    Returns:
+        Optional[ControllerCapabilities]: None if no port answered
+    """
+    for port in ports:
+        caps = probe_port(host, port, timeout)
+        if caps is not None:
+            logger.info("Controller %s: port %s, %s framing, software %s (%.0f ms)",
+                        host, caps.port, caps.framing, caps.software_version, caps.latency_ms)
+            return caps
+    return None
+
+
+def negotiate(host: str, ports: Sequence[int] = DEFAULT_PORTS, refresh: bool = False,
+              cache: Optional[CapabilityCache] = None,
+              timeout: float = PROBE_TIMEOUT) -> Optional[ControllerCapabilities]:
+    """
+    Capabilities for a controller: from the cache, or probed once and cached
+
+    Args:
+        host (str): Controller IP address
+        ports (Sequence[int]): Candidate ports (a cached port is tried first on refresh)
+        refresh (bool): Ignore the cached entry and probe again
+        cache (Optional[CapabilityCache]): Cache to use (default capability_cache)
+        timeout (float): Probe budget per port in seconds
+
+    Returns:
+        Optional[ControllerCapabilities]: None if the controller could not be reached
+    """
+    cache = cache or capability_cache
+    cached = cache.get(host)
+    if cached is not None and not refresh:
+        return cached
+
+    if cached is not None:
+        ports = [cached.port] + [p for p in ports if p != cached.port]
+    caps = probe_controller(host, ports, timeout)
+    if caps is not None:
+        cache.put(caps)
+    return caps
+
+
+def negotiated_endpoint(host: str, port: int) -> Tuple[int, str]:
+    """
+    Port and framing to use for host, preferring port when probing
+
+    Returns:
+        Tuple[int, str]: (port, framing); (port, "native") if the controller is unreachable
+    """
+    caps = negotiate(host, ports=[port] + [p for p in DEFAULT_PORTS if p != port])
+    if caps is None:
+        return port, Framing.NATIVE.value
+    return caps.port, caps.framing
+
+
+def parse_endpoints(spec: str, default_port: int) -> List[Tuple[str, int]]:
+    """(host, port) pairs from "host[:port],..." (WMS_CANDIDATES format)"""
+    endpoints = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, port = item.partition(":")
+        endpoints.append((host, int(port) if port else default_port))
+    return endpoints
+
+
+def candidate_endpoints(host: str, port: int, extra: Optional[str] = None,
+                        cache: Optional[CapabilityCache] = None) -> List[Tuple[str, int]]:
+    """
+    Candidate list for race_connect: the configured endpoint first, then
+    the winner cached for it, then the endpoints listed in extra
+
+    Args:
+        host (str): Configured controller address
+        port (int): Configured port
+        extra (Optional[str]): "host[:port],..." alternatives (default WMS_CANDIDATES)
+        cache (Optional[CapabilityCache]): Cache holding earlier winners (default capability_cache)
+
+    Returns:
+        List[Tuple[str, int]]: Unique (host, port) pairs in preference order
+    """
+    cache = cache or capability_cache
+    endpoints = [(host, port)]
+    cached = cache.get(f"{host}:{port}")
+    if cached is not None:
+        endpoints.append((cached.host, cached.port))
+    endpoints += parse_endpoints(CANDIDATES if extra is None else extra, port)
+    return list(dict.fromkeys(endpoints))
+
+
+class _Attempt:
+    """One non-blocking connect + status request in a race"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.decoder = FixedFrameDecoder()
+        self.started = time.perf_counter()
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def race_connect(candidates: Sequence[Tuple[str, int]], stagger: float = RACE_STAGGER,
+                 timeout: float = RACE_TIMEOUT, cache: Optional[CapabilityCache] = None
+                 ) -> Optional[Tuple[socket.socket, ControllerCapabilities]]:
+    """
+    Connect to the first candidate that answers a status request
+
+    Attempts start stagger seconds apart, or immediately when the previous
+    one failed; a cached winner for this candidate list is tried first.
+    Every attempt sends the status request (0, 2); the first one to return
+    a valid status frame (wms_codec.is_status_frame) wins and all others
+    are closed. The winner is cached under the first candidate.
+
+    Args:
+        candidates (Sequence[Tuple[str, int]]): (host, port) pairs in preference order
+        stagger (float): Seconds between starting successive attempts
+        timeout (float): Overall budget in seconds
+        cache (Optional[CapabilityCache]): Cache for the winner (default capability_cache)
+
+    Returns:
+        Optional[Tuple[socket.socket, ControllerCapabilities]]: Connected blocking
+        socket (status frame consumed) and the winner, or None
+    """
+    if not candidates:
+        return None
+    cache = cache or capability_cache
+    key = "{}:{}".format(*candidates[0])
+    pending = list(candidates)
+    cached = cache.get(key)
+    if cached is not None and (cached.host, cached.port) in pending:
+        pending.remove((cached.host, cached.port))
+        pending.insert(0, (cached.host, cached.port))
+
+    selector = selectors.DefaultSelector()
+    attempts: List[_Attempt] = []
+    deadline = time.monotonic() + timeout
+    next_start = 0.0
+    winner: Optional[Tuple[_Attempt, bytes]] = None
+
+    def fail(attempt: _Attempt):
+        nonlocal next_start
+        selector.unregister(attempt.sock)
+        attempt.close()
+        attempts.remove(attempt)
+        next_start = 0.0  # do not wait out the stagger after a refusal
+
+    try:
+        while winner is None:
+            now = time.monotonic()
+            if now >= deadline or (not pending and not attempts):
+                logger.info("No candidate answered within %.1fs (%d tried)", timeout, len(candidates))
+                return None
+
+            if pending and now >= next_start:
+                attempt = _Attempt(*pending.pop(0))
+                err = attempt.sock.connect_ex((attempt.host, attempt.port))
+                if err in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", -1)):
+                    attempts.append(attempt)
+                    selector.register(attempt.sock, selectors.EVENT_WRITE, attempt)
+                    next_start = now + stagger
+                else:
+                    attempt.close()
+                    next_start = 0.0
+                continue
+
+            wait = deadline - now
+            if pending:
+                wait = min(wait, max(0.0, next_start - now))
+            for key_event, _ in selector.select(wait):
+                attempt = key_event.data
+                if attempt not in attempts:
+                    continue
+                try:
+                    if key_event.events == selectors.EVENT_WRITE:
+                        if attempt.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                            fail(attempt)
+                            continue
+                        attempt.sock.send(encode_command(0))
+                        selector.modify(attempt.sock, selectors.EVENT_READ, attempt)
+                    else:
+                        chunk = attempt.sock.recv(64)
+                        if not chunk:
+                            fail(attempt)
+                            continue
+                        frames = attempt.decoder.feed(chunk)
+                        if frames:
+                            if not is_status_frame(frames[0]):
+                                logger.info("Candidate %s:%s answered with a non-status frame",
+                                            attempt.host, attempt.port)
+                                fail(attempt)
+                                continue
+                            winner = (attempt, frames[0])
+                            break
+                except OSError:
+                    fail(attempt)
+    finally:
+        for attempt in attempts:
+            selector.unregister(attempt.sock)
+            if winner is None or attempt is not winner[0]:
+                attempt.close()
+        selector.close()
+
+    attempt, frame = winner
+    latency_ms = (time.perf_counter() - attempt.started) * 1000
+    caps = ControllerCapabilities(attempt.host, attempt.port, Framing.NATIVE.value,
+                                  f"{frame[2]}.{frame[3]}", time.time(), latency_ms)
+    logger.info("Candidate %s:%s answered first (%.0f ms)", attempt.host, attempt.port, latency_ms)
+    if cached is None or (cached.host, cached.port) != (caps.host, caps.port):
+        cache.put(caps, key)
+    attempt.sock.setblocking(True)
+    return attempt.sock, caps
+
+
+# Global cache instance
+capability_cache = CapabilityCache(os.getenv("WMS_CAPABILITY_CACHE", "logs/controller_capabilities.json"))
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    result = negotiate(sys.argv[1] if len(sys.argv) > 1 else "1.1.1.2", refresh="--refresh" in sys.argv)
+    print(json.dumps(asdict(result), indent=2) if result else "Controller not reachable")
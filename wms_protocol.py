@@ -3,6 +3,7 @@ WMS Protocol Definition
 Based on Mobile Racking WMS-Data specification
 """
 
+import struct
 from enum import Enum
 from dataclasses import dataclass
 from typing import Dict, Any
@@ -229,6 +230,46 @@ WMS_DATA_STRUCTURE = {
     )
 }
 
+# Size of a status response frame in bytes
+STATUS_FRAME_SIZE = 20
+
+# (field, byte, bit, type) per WMS-Data field; offset "5.3" is bit 3 of byte 5.
+# Byte 4 (tcp_ip_reserved_message) counts received messages and changes on
+# every poll; everything else only changes with the installation's state.
+_STATUS_LAYOUT = [
+    (key, int(field.offset), round(field.offset * 10) % 10, field.data_type)
+    for key, field in WMS_DATA_STRUCTURE.items()
+]
+
+def decode_status_frame(frame: bytes) -> Dict[str, Any]:
+    """
+    Decode a status frame field by field from WMS_DATA_STRUCTURE
+    
+    Bool fields are single bits (offset 5.3 = bit 3 of byte 5), DWord fields
+    are little-endian 32-bit words and Byte fields are single bytes.
+    
+    Args:
+        frame (bytes): 20-byte status response
+        
+    Returns:
+        Dict: Field name -> value, in WMS_DATA_STRUCTURE order
+        
+    Raises:
+        ValueError: If the frame is not STATUS_FRAME_SIZE bytes long
+    """
+    if len(frame) != STATUS_FRAME_SIZE:
+        raise ValueError(f"Invalid status frame length: {len(frame)} (expected {STATUS_FRAME_SIZE})")
+    
+    status = {}
+    for key, index, bit, data_type in _STATUS_LAYOUT:
+        if data_type == DataType.BOOL:
+            status[key] = bool(frame[index] & (1 << bit))
+        elif data_type == DataType.DWORD:
+            status[key] = struct.unpack_from('<I', frame, index)[0]
+        else:
+            status[key] = frame[index]
+    return status
+
 class WMSCommands:
     """
     WMS Command definitions according to PDF specification
@@ -0,0 +1,759 @@
+"""
+Headless WMS service
+Runs status polling, recording, alarm detection and the command queue
+without Streamlit, Pandas or Plotly.
+
+Usage:
+    python wms_service.py --host 1.1.1.2 --port 2000 --interval 1.0
+    python wms_service.py --api-port 8080 --proxy-port 2000 --ipc-socket /tmp/wms-engine.sock
+
+The Streamlit apps are optional clients; monitoring keeps running when no
+browser tab is open.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from connection_supervisor import CircuitBreaker
+from tcp_client import TCPClient, intern_status_frame
+from utils.data_parser import ALARM_FIELDS, parse_lighting_rules
+from utils.event_log import wms_event_log
+from utils.frame_cache import frame_key
+from utils.logger import wms_logger
+from utils.metrics import metrics
+from wms_codec import Framing
+from wms_negotiation import candidate_endpoints, negotiated_endpoint
+from wms_shared_state import SharedFrameWriter
+
+logger = logging.getLogger(__name__)
+
+# Non-alarm fields whose changes are reported as state changes
+MODE_FIELDS = [
+    'tcp_ip_connection',
+    'automatic_mode_on',
+    'manual_mode_on',
+    'night_mode_activated',
+    'mobiles_are_released',
+    'mobiles_are_moving',
+    'power_on',
+]
+
+# Lighting word (bytes 10-13) and values pushed to subscribers when they
+# change. The received-message counter (tcp_ip_reserved_message, byte 4)
+# moves on every poll and is deliberately not watched.
+LIGHTING_FIELD = 'lighting_rules'
+VALUE_FIELDS = [
+    'command_request',
+    'mobile_quantity',
+    'counter_lift_track_inside',
+    'selected_aisle_to_open',
+]
+
+
+@dataclass(frozen=True)
+class StateChange:
+    """A single detected change of a status field"""
+    timestamp: float
+    field: str
+    old: Any
+    new: Any
+    is_alarm: bool = False
+
+
+class AlarmEngine:
+    """
+    Detects alarm and mode transitions between consecutive status polls
+
+    Listeners are called on the poller thread with a list of StateChange.
+    """
+
+    def __init__(self, alarm_fields: Optional[List[str]] = None,
+                 mode_fields: Optional[List[str]] = None):
+        """
+        Initialize alarm engine
+
+        Args:
+            alarm_fields (Optional[List[str]]): Status fields treated as alarms
+            mode_fields (Optional[List[str]]): Other status fields to watch
+        """
+        self.alarm_fields = list(alarm_fields if alarm_fields is not None else ALARM_FIELDS)
+        self.mode_fields = list(mode_fields if mode_fields is not None else MODE_FIELDS)
+        self.active_alarms: Dict[str, float] = {}
+        self._previous: Dict[str, Any] = {}
+        self._listeners: List[Callable[[List[StateChange]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[StateChange]], None]):
+        """Register a callback receiving lists of changes"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[StateChange]], None]):
+        """Unregister a callback"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def process(self, status: Mapping[str, Any], timestamp: Optional[float] = None) -> List[StateChange]:
+        """
+        Compare a new status with the previous one
+
+        Args:
+            status (Mapping): Parsed status
+            timestamp (Optional[float]): Poll time (default: now)
+
+        Returns:
+            List[StateChange]: Detected changes (empty if nothing changed)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        previous = self._previous
+        changes = []
+
+        for field in self.alarm_fields:
+            old, new = bool(previous.get(field, False)), bool(status.get(field, False))
+            if old != new:
+                changes.append(StateChange(timestamp, field, old, new, is_alarm=True))
+                if new:
+                    self.active_alarms[field] = timestamp
+                    wms_logger.log_alarm(field)
+                else:
+                    self.active_alarms.pop(field, None)
+                metrics.counter(
+                    "wms_alarm_transitions_total", "Alarm raised/cleared transitions",
+                    alarm=field, state="raised" if new else "cleared"
+                ).inc()
+
+        if previous:
+            for field in self.mode_fields:
+                if field in status and status.get(field) != previous.get(field):
+                    changes.append(StateChange(timestamp, field, previous.get(field), status.get(field)))
+
+        self._previous = dict(status)
+        if changes:
+            for listener in list(self._listeners):
+                try:
+                    listener(changes)
+                except Exception as e:
+                    logger.error("State change listener failed: %s", e)
+        return changes
+
+
+def changes_to_delta(changes: List[StateChange]) -> Dict[str, Any]:
+    """
+    Push payload for the changes AlarmEngine detected in one poll
+
+    Args:
+        changes (List[StateChange]): Result of AlarmEngine.process
+
+    Returns:
+        Dict with any of 'modes', 'alarms', 'lighting', 'values' (empty if none)
+    """
+    delta: Dict[str, Any] = {}
+    for change in changes:
+        if change.is_alarm:
+            alarms = delta.setdefault('alarms', {'raised': [], 'cleared': []})
+            alarms['raised' if change.new else 'cleared'].append(change.field)
+        elif change.field == LIGHTING_FIELD:
+            old, new = change.old or 0, change.new or 0
+            delta['lighting'] = {
+                'word': new,
+                'on': parse_lighting_rules(new & ~old),
+                'off': parse_lighting_rules(old & ~new),
+            }
+        elif change.field in VALUE_FIELDS:
+            delta.setdefault('values', {})[change.field] = change.new
+        else:
+            delta.setdefault('modes', {})[change.field] = change.new
+    return delta
+
+
+class DeltaBroadcaster:
+    """
+    Fans decoded frame deltas out to push subscribers (SSE clients)
+
+    Each subscriber gets a bounded queue; a subscriber that falls behind is
+    dropped rather than slowing down the poller.
+    """
+
+    def __init__(self, max_queue: int = 256, stream: str = "deltas"):
+        """
+        Initialize broadcaster
+
+        Args:
+            max_queue (int): Pending events per subscriber before it is dropped
+            stream (str): Metrics label ("deltas" for SSE, "frames" for raw-frame IPC)
+        """
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: List["queue.Queue[Optional[Dict[str, Any]]]"] = []
+        self._seq = 0
+        self._m_subscribers = metrics.gauge("wms_push_subscribers", "Connected push subscribers", stream=stream)
+        self._m_events = metrics.counter("wms_push_events_total", "Delta events published", stream=stream)
+
+    def subscribe(self) -> "queue.Queue[Optional[Dict[str, Any]]]":
+        """Register a subscriber; None in its queue means it was dropped"""
+        subscriber: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(self.max_queue)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            self._m_subscribers.set(len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber"""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            self._m_subscribers.set(len(self._subscribers))
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        """
+        Send an event to all subscribers
+
+        Args:
+            event (Dict): Delta payload (a 'seq' number is added)
+
+        Returns:
+            int: Sequence number of the event
+        """
+        with self._lock:
+            self._seq += 1
+            event['seq'] = self._seq
+            subscribers = list(self._subscribers)
+        self._m_events.inc()
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                self.unsubscribe(subscriber)
+                # Make room for the drop marker so the reader wakes up and closes
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(None)
+        return event['seq']
+
+
+class Recorder:
+    """
+    Bounded in-memory status history
+
+    Samples are kept in a ring of timestamps plus the frame as received and
+    its status from tcp_client.intern_status_frame. Frames that differ only
+    in the message counter share one decoded dict, so a sample costs its
+    20 bytes and a small read-only view holding its own counter.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize recorder
+
+        Args:
+            max_entries (int): Number of samples kept in memory
+        """
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self._timestamps = array('d', bytes(8 * max_entries))
+        self._frames: List[Optional[bytes]] = [None] * max_entries
+        self._statuses: List[Optional[Mapping[str, Any]]] = [None] * max_entries
+        self._next = 0
+        self._count = 0
+
+    def record(self, timestamp: float, frame: bytes, status: Mapping[str, Any]):
+        """Store one poll result (frame and status are stored by reference)"""
+        with self._lock:
+            index = self._next
+            self._timestamps[index] = timestamp
+            self._frames[index] = frame
+            self._statuses[index] = status
+            self._next = (index + 1) % self.max_entries
+            self._count = min(self._count + 1, self.max_entries)
+
+    def history(self, since: Optional[float] = None, limit: Optional[int] = None) -> List[Tuple[float, bytes, Mapping[str, Any]]]:
+        """
+        Recorded samples in chronological order
+
+        Args:
+            since (Optional[float]): Only samples newer than this epoch time
+            limit (Optional[int]): Only the most recent N samples (<= 0 returns none)
+
+        Returns:
+            List: (timestamp, raw frame, parsed status) tuples
+        """
+        if limit is not None and limit <= 0:
+            return []
+        with self._lock:
+            start = self._next - self._count
+            indexes = [(start + i) % self.max_entries for i in range(self._count)]
+            if since is not None:
+                indexes = [index for index in indexes if self._timestamps[index] > since]
+            if limit is not None:
+                indexes = indexes[-limit:]
+            return [(self._timestamps[index], self._frames[index], self._statuses[index]) for index in indexes]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class CommandQueue:
+    """
+    Commands waiting for the single connection owner (the poller thread)
+
+    Submitting returns a Future resolved with the 20-byte response or None.
+    Identical commands submitted while one is still pending are coalesced
+    onto the same Future, so N concurrent callers cost one PLC round trip.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[int, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._m_coalesced = metrics.counter("wms_commands_coalesced_total", "Commands merged into a pending identical command")
+
+    def submit(self, command: int) -> Future:
+        """
+        Queue a command
+
+        Args:
+            command (int): Command number (0=status, 1-19=open aisle)
+
+        Returns:
+            Future: Resolves to Optional[bytes]
+        """
+        with self._lock:
+            future = self._pending.get(command)
+            if future is not None:
+                self._m_coalesced.inc()
+                return future
+            future = Future()
+            self._pending[command] = future
+        self._queue.put((command, future))
+        return future
+
+    def _take(self, item: Tuple[int, Future]) -> Tuple[int, Future]:
+        """Mark a command as no longer pending (later submits queue a new one)"""
+        with self._lock:
+            if self._pending.get(item[0]) is item[1]:
+                del self._pending[item[0]]
+        return item
+
+    def get(self, timeout: Optional[float]) -> Optional[Tuple[int, Future]]:
+        """Wait up to timeout seconds for the next command"""
+        try:
+            return self._take(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+    def get_nowait(self) -> Optional[Tuple[int, Future]]:
+        """Next command if one is waiting"""
+        try:
+            return self._take(self._queue.get_nowait())
+        except queue.Empty:
+            return None
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+
+class ChannelWorker(ABC):
+    """
+    Background thread owning one PLC connection, with its own circuit
+    breaker, that executes commands from a CommandQueue
+    """
+
+    thread_name = "wms-channel"
+
+    def __init__(self, client: TCPClient, commands: Optional[CommandQueue],
+                 on_frame: Callable[[float, bytes], None], reconnect_interval: float = 30.0):
+        """
+        Initialize worker
+
+        Args:
+            client (TCPClient): Connection to the controller
+            commands (Optional[CommandQueue]): Queue of pending commands (None = not served here)
+            on_frame (Callable): Called with (timestamp, frame) for every status frame
+            reconnect_interval (float): Upper bound for the reconnect backoff in seconds
+        """
+        self.client = client
+        self.commands = commands
+        self.on_frame = on_frame
+        name = client.controller_id if client.channel == "main" else f"{client.controller_id}/{client.channel}"
+        self.breaker = CircuitBreaker(name, max_delay=reconnect_interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the worker thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker thread and disconnect"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.client.disconnect()
+
+    def _ensure_connected(self) -> bool:
+        """Connect if needed, unless the circuit breaker is open"""
+        if self.client.connected:
+            return True
+        if not self.breaker.allow():
+            return False
+        if self.client.connect():
+            return True
+        self.breaker.record_failure()
+        return False
+
+    def _execute(self, command: int, future: Future):
+        """Run one queued command"""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            response = self.client.send_command(command) if self._ensure_connected() else None
+            if command == 0 and response is not None:
+                self.on_frame(time.time(), response)
+            future.set_result(response)
+        except Exception as e:
+            future.set_exception(e)
+
+    def _wait_disconnected(self):
+        """Fail queued commands instead of letting callers hang, then back off"""
+        if self.commands is not None:
+            item = self.commands.get_nowait()
+            while item is not None:
+                future = item[1]
+                # A caller that timed out may have cancelled its future already
+                if not future.done() and future.set_running_or_notify_cancel():
+                    future.set_result(None)
+                item = self.commands.get_nowait()
+        self._stop.wait(max(0.05, self.breaker.retry_in()))
+
+    @abstractmethod
+    def _run(self):
+        """Worker loop, runs until stop() is called"""
+
+
+class StatusPoller(ChannelWorker):
+    """
+    Polls status on an interval. Given a CommandQueue it also executes
+    queued commands in between, so polls and commands never interleave
+    on the socket; without one it only polls (see CommandChannel).
+    """
+
+    thread_name = "wms-poller"
+
+    def __init__(self, client: TCPClient, commands: Optional[CommandQueue],
+                 on_frame: Callable[[float, bytes], None],
+                 interval: float = 1.0, reconnect_interval: float = 30.0):
+        """
+        Initialize poller
+
+        Args:
+            client (TCPClient): Connection to the controller
+            commands (Optional[CommandQueue]): Queue of pending commands (None = poll only)
+            on_frame (Callable): Called with (timestamp, frame) for every status frame
+            interval (float): Seconds between status polls
+            reconnect_interval (float): Upper bound for the reconnect backoff in seconds
+        """
+        super().__init__(client, commands, on_frame, reconnect_interval)
+        self.interval = interval
+        self._m_polls = metrics.counter("wms_polls_total", "Status polls", controller=client.controller_id)
+        self._m_poll_failures = metrics.counter("wms_poll_failures_total", "Status polls without response", controller=client.controller_id)
+
+    def poll_once(self) -> Optional[bytes]:
+        """Send one status request and publish the frame"""
+        self._m_polls.inc()
+        frame = self.client.send_command(0)
+        if frame is None:
+            self._m_poll_failures.inc()
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        self.on_frame(time.time(), frame)
+        return frame
+
+    def _run(self):
+        """Poll loop"""
+        next_poll = 0.0
+        while not self._stop.is_set():
+            if not self._ensure_connected():
+                self._wait_disconnected()
+                continue
+
+            now = time.monotonic()
+            if now >= next_poll:
+                self.poll_once()
+                next_poll = now + self.interval
+                continue
+
+            if self.commands is None:
+                self._stop.wait(next_poll - now)
+                continue
+
+            item = self.commands.get(timeout=min(next_poll - now, 0.5))
+            while item is not None:
+                # Run every waiting command back to back before the next poll
+                self._execute(*item)
+                item = self.commands.get_nowait()
+
+
+class CommandChannel(ChannelWorker):
+    """
+    Executes queued commands on a dedicated connection, so an aisle open
+    never waits behind a slow status read on the polling connection
+    """
+
+    thread_name = "wms-commands"
+
+    def _execute(self, command: int, future: Future):
+        super()._execute(command, future)
+        if future.done() and future.exception() is None:
+            if future.result() is None:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    def _run(self):
+        """Command loop"""
+        while not self._stop.is_set():
+            if not self._ensure_connected():
+                self._wait_disconnected()
+                continue
+            item = self.commands.get(timeout=0.5)
+            if item is not None:
+                self._execute(*item)
+
+
+class WMSService:
+    """Poller, recorder, alarm engine and command queue for one controller"""
+
+    def __init__(self, host: str = "1.1.1.2", port: int = 2000, interval: float = 1.0,
+                 history_size: int = 10000, framing: str = Framing.NATIVE.value,
+                 command_port: Optional[int] = None, dual_channel: bool = False,
+                 discover: bool = False, shared_memory: bool = False):
+        """
+        Initialize service
+
+        Args:
+            host (str): Controller IP address
+            port (int): Controller TCP port
+            interval (float): Seconds between status polls
+            history_size (int): Samples kept in memory
+            framing (str): Open-aisle framing ("native" or "legacy")
+            command_port (Optional[int]): Port for a separate command connection (e.g. HMI_PORT 2001)
+            dual_channel (bool): Separate command connection on the polling port
+            discover (bool): Race cached/configured alternatives on connect (see wms_negotiation.race_connect)
+            shared_memory (bool): Publish every frame to a shared-memory segment (see wms_shared_state)
+        """
+        dual_channel = dual_channel or command_port is not None
+        self.client = TCPClient(host, port, event_log=wms_event_log, framing=framing,
+                                channel="poll" if dual_channel else "main",
+                                candidates=candidate_endpoints(host, port) if discover else None)
+        self.commands = CommandQueue()
+        self.recorder = Recorder(history_size)
+        self.alarms = AlarmEngine(mode_fields=MODE_FIELDS + [LIGHTING_FIELD] + VALUE_FIELDS)
+        self.deltas = DeltaBroadcaster()
+        self.frames = DeltaBroadcaster(stream="frames")  # {'timestamp', 'frame'} when more than the counter changed
+        self._lock = threading.Lock()
+        self._frame_lock = threading.Lock()
+        self._latest: Optional[Tuple[float, bytes, Mapping[str, Any]]] = None
+        self._last_key: Optional[bytes] = None
+        self._shared_id = self.client.controller_id if shared_memory else None
+        self.shared: Optional[SharedFrameWriter] = None
+        if dual_channel:
+            command_port = command_port or port
+            self.command_client = TCPClient(host, command_port, event_log=wms_event_log,
+                                            framing=framing, channel="command",
+                                            candidates=candidate_endpoints(host, command_port) if discover else None)
+            self.poller = StatusPoller(self.client, None, self._on_frame, interval=interval)
+            self.command_channel: Optional[CommandChannel] = CommandChannel(
+                self.command_client, self.commands, self._on_frame)
+        else:
+            self.command_client = self.client
+            self.poller = StatusPoller(self.client, self.commands, self._on_frame, interval=interval)
+            self.command_channel = None
+
+    def _on_frame(self, timestamp: float, frame: bytes):
+        """Handle a status frame from the poller (or a status command)"""
+        frame, status = intern_status_frame(frame)
+        with self._frame_lock:
+            with self._lock:
+                self._latest = (timestamp, frame, status)
+            if self.shared is not None:
+                self.shared.publish(timestamp, frame)
+            self.recorder.record(timestamp, frame, status)
+            delta = changes_to_delta(self.alarms.process(status, timestamp))
+            if delta:
+                delta['timestamp'] = timestamp
+                self.deltas.publish(delta)
+            key = frame_key(frame)
+            if key != self._last_key:
+                wms_logger.log_status_update(frame.hex())
+                self.frames.publish({'timestamp': timestamp, 'frame': frame})
+                self._last_key = key
+
+    def start(self):
+        """Start polling (and the command channel)"""
+        if self._shared_id is not None and self.shared is None:
+            self.shared = SharedFrameWriter(self._shared_id)
+        self.poller.start()
+        if self.command_channel is not None:
+            self.command_channel.start()
+
+    def stop(self):
+        """Stop polling and flush logs"""
+        self.poller.stop()
+        if self.command_channel is not None:
+            self.command_channel.stop()
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+        wms_event_log.flush()
+
+    def snapshot(self) -> Optional[Tuple[float, bytes, Mapping[str, Any]]]:
+        """Latest (timestamp, raw frame, parsed status) or None"""
+        with self._lock:
+            return self._latest
+
+    def state(self) -> Optional[Dict[str, Any]]:
+        """Decoded state of the latest frame (initial push snapshot) or None"""
+        sample = self.snapshot()
+        if sample is None:
+            return None
+        timestamp, _, status = sample
+        lighting = status.get(LIGHTING_FIELD, 0)
+        return {
+            'modes': {field: status.get(field) for field in MODE_FIELDS},
+            'alarms': [field for field in self.alarms.alarm_fields if status.get(field)],
+            'lighting': lighting,
+            'lit_aisles': parse_lighting_rules(lighting),
+            'values': {field: status.get(field) for field in VALUE_FIELDS},
+            'software_version': f"{status.get('stow_mobile_racking_major')}.{status.get('stow_mobile_racking_minor')}",
+            'timestamp': timestamp,
+        }
+
+    def submit_command(self, command: int) -> Future:
+        """Queue a command for the controller (see CommandQueue.submit)"""
+        return self.commands.submit(command)
+
+    @property
+    def connected(self) -> bool:
+        return self.client.connected
+
+    def health(self) -> Dict[str, Any]:
+        """Connection state for health checks ('ok' while the PLC connection is up)"""
+        return {'ok': self.connected, 'connected': self.connected, 'latency_ms': self.channel_latency()}
+
+    def channel_latency(self) -> Dict[str, Optional[float]]:
+        """Last round trip in ms per channel ("main", or "poll" and "command")"""
+        clients = {self.client.channel: self.client, self.command_client.channel: self.command_client}
+        return {name: client.last_latency_ms for name, client in clients.items()}
+
+
+def add_connection_arguments(parser: argparse.ArgumentParser):
+    """Connection and publishing options shared by the service entry points"""
+    command_port = os.getenv("WMS_COMMAND_PORT")
+    parser.add_argument("--command-port", type=int, default=int(command_port) if command_port else None,
+                        help="Send commands over a separate connection to this port (e.g. HMI_PORT 2001)")
+    parser.add_argument("--dual-channel", action="store_true", default=os.getenv("WMS_DUAL_CHANNEL") == "1",
+                        help="Send commands over a separate connection to --port")
+    parser.add_argument("--discover", action="store_true", default=os.getenv("WMS_DISCOVER") == "1",
+                        help="Race the cached winner and WMS_CANDIDATES endpoints and keep the first that answers")
+    parser.add_argument("--shared-memory", action="store_true", default=os.getenv("WMS_SHARED_MEMORY") == "1",
+                        help="Publish the latest frame to shared memory for local readers")
+
+
+def add_frontend_arguments(parser: argparse.ArgumentParser):
+    """Front-ends attached to the service's single PLC connection (all off by default)"""
+    api_port, proxy_port = os.getenv("API_PORT"), os.getenv("PROXY_PORT")
+    parser.add_argument("--api-port", type=int, default=int(api_port) if api_port else None,
+                        help="Serve the HTTP/JSON API gateway on this port (api_gateway.py)")
+    parser.add_argument("--proxy-port", "--listen-port", dest="proxy_port", type=int,
+                        default=int(proxy_port) if proxy_port else None,
+                        help="Serve the native-protocol proxy on this port (native_proxy.py)")
+    parser.add_argument("--ipc-socket", "--socket", dest="ipc_socket", default=os.getenv("WMS_IPC_SOCKET"),
+                        help="Serve engine IPC on this Unix socket (wms_ipc.py)")
+
+
+def create_frontends(service: "WMSService", args: argparse.Namespace) -> List[Any]:
+    """Front-end servers selected by add_frontend_arguments, all sharing service"""
+    frontends: List[Any] = []
+    if args.api_port is not None:
+        from api_gateway import APIGateway
+        frontends.append(APIGateway(service, args.api_port))
+    if args.proxy_port is not None:
+        from native_proxy import NativeProxy
+        frontends.append(NativeProxy(service, args.proxy_port))
+    if args.ipc_socket:
+        from wms_ipc import IPCServer
+        frontends.append(IPCServer(service, args.ipc_socket))
+    return frontends
+
+
+def main(argv: Optional[List[str]] = None, defaults: Optional[Dict[str, Any]] = None):
+    """
+    Run one service, its front-ends and the metrics exporter until SIGINT/SIGTERM
+
+    api_gateway.py, native_proxy.py and wms_ipc.py call this with their
+    front-end enabled by default, so any combination of front-ends runs in
+    one process on one PLC connection, e.g.:
+
+        python wms_service.py --api-port 8080 --proxy-port 2000 --ipc-socket /tmp/wms-engine.sock
+
+    Args:
+        argv (Optional[List[str]]): Command line (default sys.argv)
+        defaults (Optional[Dict]): Option defaults overriding the built-in ones
+    """
+    parser = argparse.ArgumentParser(description="Headless WMS Mobile Racking service")
+    parser.add_argument("--host", default=os.getenv("PLC_IP", "1.1.1.2"), help="Controller IP address")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PLC_PORT", "2000")), help="Controller TCP port")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("POLL_INTERVAL", "1.0")), help="Seconds between status polls")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "9108")), help="Prometheus port (0 = off)")
+    parser.add_argument("--negotiate", action="store_true", default=os.getenv("WMS_NEGOTIATE") == "1",
+                        help="Use cached/probed port and framing instead of --port")
+    add_connection_arguments(parser)
+    add_frontend_arguments(parser)
+    if defaults:
+        parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    framing = Framing.NATIVE.value
+    if args.negotiate:
+        args.port, framing = negotiated_endpoint(args.host, args.port)
+
+    service = WMSService(args.host, args.port, args.interval, framing=framing,
+                         command_port=args.command_port, dual_channel=args.dual_channel,
+                         discover=args.discover, shared_memory=args.shared_memory)
+    frontends = create_frontends(service, args)
+    if args.metrics_port:
+        from utils.metrics_exporter import start_metrics_server
+        start_metrics_server(args.metrics_port, health=service.health)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    service.start()
+    for frontend in frontends:
+        frontend.start()
+    logger.info("WMS service polling %s every %.1fs", service.client.controller_id, args.interval)
+    stop.wait()
+    for frontend in reversed(frontends):
+        frontend.stop()
+    service.stop()
+    logger.info("WMS service stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Shared-memory latest-frame segment per controller
+
+The process that polls the PLC (wms_service / api_gateway) publishes every
+status frame into a small multiprocessing.shared_memory segment. Streamlit
+workers and other local processes read the current frame from it with a
+memcpy instead of polling the controller or making an IPC round trip.
+
+Segment layout (little-endian, 44 bytes):
+
+    0   4s   magic b"WMS1"
+    4   4x   padding
+    8   Q    sequence counter (odd while a write is in progress)
+    16  d    timestamp (time.time() of the frame)
+    24  20s  raw status frame
+
+Writes use a seqlock: the counter is made odd, the payload written, and
+the counter made even again. Readers copy the payload and retry if the
+counter was odd or changed meanwhile, so they never block the writer.
+
+There is exactly one writer per segment: it holds an exclusive lock on
+<tempdir>/<segment>.lock for its lifetime, and a second writer fails. A
+writer clears the magic before removing the segment, so readers notice a
+restart and attach to the new segment.
+
+Usage:
+    writer = SharedFrameWriter("1.1.1.2:2000")      # in the polling process
+    writer.publish(time.time(), frame)
+
+    reader = SharedFrameReader("1.1.1.2:2000")      # in any other process
+    sample = reader.read()                          # SharedFrame or None
+"""
+
+import logging
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+from wms_codec import FRAME_SIZE
+
+try:
+    import fcntl
+except ImportError:  # Windows: a segment disappears with its last handle
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WMS1"
+_HEADER = struct.Struct("<4s4x")
+_SEQ = struct.Struct("<Q")
+_PAYLOAD = struct.Struct(f"<d{FRAME_SIZE}s")
+SEQ_OFFSET = _HEADER.size
+PAYLOAD_OFFSET = SEQ_OFFSET + _SEQ.size
+SEGMENT_SIZE = PAYLOAD_OFFSET + _PAYLOAD.size
+
+READ_RETRIES = 100
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    """Consistent copy of the segment"""
+    seq: int
+    timestamp: float
+    frame: bytes
+
+    @property
+    def age(self) -> float:
+        """Seconds since the frame was received"""
+        return time.time() - self.timestamp
+
+
+def segment_name(controller_id: str) -> str:
+    """Shared memory name for a controller id such as "1.1.1.2:2000" """
+    return "wms_" + re.sub(r"[^0-9A-Za-z]", "_", controller_id)
+
+
+# Segments written by this process (their tracker registration must stay)
+_written = set()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing segment without handing it to this process' resource tracker"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the segment, and the tracker would
+    # unlink it when this reader exits (bpo-39959)
+    segment = shared_memory.SharedMemory(name=name)
+    if fcntl is not None and name not in _written:
+        # A writer in this process owns the registration and unlinks the segment itself
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _lock_writer(name: str) -> Optional[int]:
+    """
+    Take the writer lock of a segment (released by the OS if the writer dies)
+
+    Returns:
+        Optional[int]: Lock file descriptor (None where flock is unavailable)
+
+    Raises:
+        RuntimeError: Another process is already writing this segment
+    """
+    if fcntl is None:
+        return None
+    fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        raise RuntimeError(f"Shared frame segment {name} already has a writer")
+    return fd
+
+
+class SharedFrameWriter:
+    """Single writer of a controller's segment"""
+
+    def __init__(self, controller_id: str):
+        """
+        Create (or take over) the segment for a controller
+
+        Args:
+            controller_id (str): Controller identifier (TCPClient.controller_id)
+        """
+        self.name = segment_name(controller_id)
+        self._lock_fd = _lock_writer(self.name)
+        try:
+            self._segment = shared_memory.SharedMemory(name=self.name, create=True, size=SEGMENT_SIZE)
+        except FileExistsError:
+            if self._lock_fd is None:
+                raise RuntimeError(f"Shared frame segment {self.name} already has a writer")
+            # We hold the lock, so this was left behind by a writer that died
+            self._segment = shared_memory.SharedMemory(name=self.name)
+            if self._segment.size < SEGMENT_SIZE:
+                self._release_lock()
+                raise
+        _written.add(self.name)
+        self._buf = self._segment.buf
+        self._seq = 0
+        _SEQ.pack_into(self._buf, SEQ_OFFSET, 0)
+        _HEADER.pack_into(self._buf, 0, MAGIC)
+
+    def publish(self, timestamp: float, frame: bytes):
+        """Write a frame; never blocks on readers"""
+        buf = self._buf
+        self._seq += 1
+        _SEQ.pack_into(buf, SEQ_OFFSET, self._seq)
+        _PAYLOAD.pack_into(buf, PAYLOAD_OFFSET, timestamp, frame)
+        self._seq += 1
+        _SEQ.pack_into(buf, SEQ_OFFSET, self._seq)
+
+    def close(self, unlink: bool = True):
+        """Release the segment (and remove it, so readers see it is gone)"""
+        if unlink:
+            # Readers still mapping the removed segment re-attach on their next read
+            _HEADER.pack_into(self._buf, 0, b"\0" * len(MAGIC))
+        self._buf = None
+        self._segment.close()
+        if unlink:
+            try:
+                self._segment.unlink()
+            except FileNotFoundError:
+                pass
+        _written.discard(self.name)
+        self._release_lock()
+
+    def _release_lock(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class SharedFrameReader:
+    """Lock-free reader of a controller's segment, attaching lazily"""
+
+    def __init__(self, controller_id: str):
+        """
+        Initialize reader
+
+        Args:
+            controller_id (str): Controller identifier (TCPClient.controller_id)
+        """
+        self.name = segment_name(controller_id)
+        self._segment: Optional[shared_memory.SharedMemory] = None
+
+    def _buffer(self) -> Optional[memoryview]:
+        if self._segment is not None and _HEADER.unpack_from(self._segment.buf, 0)[0] != MAGIC:
+            # The writer shut down; a restarted writer creates a new segment
+            self.close()
+        if self._segment is None:
+            try:
+                segment = _attach(self.name)
+            except FileNotFoundError:
+                return None
+            if segment.size < SEGMENT_SIZE or _HEADER.unpack_from(segment.buf, 0)[0] != MAGIC:
+                segment.close()
+                return None
+            self._segment = segment
+        return self._segment.buf
+
+    def read(self) -> Optional[SharedFrame]:
+        """
+        Latest frame
+
+        Returns:
+            Optional[SharedFrame]: None if no writer exists or nothing was published yet
+        """
+        buf = self._buffer()
+        if buf is None:
+            return None
+        for _ in range(READ_RETRIES):
+            before = _SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if before & 1:
+                continue
+            payload = bytes(buf[PAYLOAD_OFFSET:SEGMENT_SIZE])
+            if _SEQ.unpack_from(buf, SEQ_OFFSET)[0] == before:
+                if before == 0:
+                    return None
+                timestamp, frame = _PAYLOAD.unpack(payload)
+                return SharedFrame(before, timestamp, frame)
+        logger.debug("Shared frame %s kept changing during %d reads", self.name, READ_RETRIES)
+        return None
+
+    def read_fresh(self, max_age: float) -> Optional[SharedFrame]:
+        """Latest frame if it is at most max_age seconds old"""
+        sample = self.read()
+        if sample is None or sample.age > max_age:
+            return None
+        return sample
+
+    def close(self):
+        """Detach (the writer keeps the segment)"""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+
+if __name__ == "__main__":
+    controller = sys.argv[1] if len(sys.argv) > 1 else "1.1.1.2:2000"
+    sample = SharedFrameReader(controller).read()
+    if sample is None:
+        print(f"No shared frame for {controller}")
+    else:
+        print(f"seq={sample.seq} age={sample.age:.2f}s frame={sample.frame.hex()}")